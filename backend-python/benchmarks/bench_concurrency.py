@@ -0,0 +1,88 @@
+"""Measure event-loop responsiveness while ClickHouse queries run concurrently.
+
+A probe coroutine stands in for cheap requests such as /status polling: it
+wakes every few milliseconds and records how late it was. The same set of
+heavy queries is run once called inline (the old behaviour) and once through
+the ClickHouse worker pool, and probe latency is reported for both.
+
+    python benchmarks/bench_concurrency.py --queries 16 --rows 300000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.clickhouse_service import clickhouse_service
+
+PROBE_INTERVAL_S = 0.005
+
+
+async def probe(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL_S)
+        lags.append((time.perf_counter() - started - PROBE_INTERVAL_S) * 1000)
+
+
+async def run_inline(query: str, count: int) -> None:
+    async def one():
+        # An async handler calling the blocking client directly
+        clickhouse_service.execute_query(query)
+
+    await asyncio.gather(*(one() for _ in range(count)))
+
+
+async def run_pooled(query: str, count: int) -> None:
+    await asyncio.gather(*(
+        clickhouse_service.run(clickhouse_service.execute_query, query)
+        for _ in range(count)
+    ))
+
+
+async def measure(name: str, runner, query: str, count: int) -> dict:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    prober = asyncio.create_task(probe(stop, lags))
+
+    started = time.perf_counter()
+    await runner(query, count)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await prober
+    lags.sort()
+
+    return {
+        "mode": name,
+        "seconds": elapsed,
+        "probes": len(lags),
+        "p50_ms": statistics.median(lags) if lags else 0.0,
+        "p99_ms": lags[int(len(lags) * 0.99) - 1] if lags else 0.0,
+        "max_ms": lags[-1] if lags else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=16, help="concurrent heavy queries")
+    parser.add_argument("--rows", type=int, default=300_000_000, help="rows scanned per query")
+    args = parser.parse_args()
+
+    query = f"SELECT sum(cityHash64(number)) AS s FROM numbers({args.rows})"
+    print(f"{args.queries} concurrent queries scanning {args.rows:,} rows each")
+
+    for name, runner in (("inline", run_inline), ("pooled", run_pooled)):
+        result = await measure(name, runner, query, args.queries)
+        print(f"{result['mode']:>7}: {result['seconds']:.2f}s total, "
+              f"{result['probes']} probes, loop lag p50 {result['p50_ms']:.1f}ms "
+              f"p99 {result['p99_ms']:.1f}ms max {result['max_ms']:.1f}ms")
+
+    clickhouse_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Compare source extraction throughput: keyset fetch vs COPY text streaming.
+
+Reads an existing PostgreSQL table (configured through the usual POSTGRES_*
+environment variables) without writing anything to ClickHouse.
+
+    python benchmarks/bench_extraction.py --table events --batch-size 10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.schema import FieldMapping
+from services.postgres_service import postgres_service
+from services.mapping_service import mapping_service
+from utils.transform_plan import build_copy_expressions
+
+
+async def bench_fetch(table: str, schema: str, columns: list[str], key_columns: list[str], batch_size: int) -> dict:
+    start = time.perf_counter()
+    rows = 0
+    last_key = None
+
+    while True:
+        data = await postgres_service.extract_data_keyset(
+            table, schema, columns, key_columns, last_key, batch_size
+        )
+        if not data:
+            break
+        rows += len(data)
+        last_key = tuple(data[-1][k] for k in key_columns)
+
+    return {"rows": rows, "seconds": time.perf_counter() - start}
+
+
+async def bench_copy(table: str, schema: str, expressions: list[str], batch_size: int) -> dict:
+    start = time.perf_counter()
+    rows = 0
+    size = 0
+
+    async for chunk, count in postgres_service.stream_copy(table, schema, expressions, batch_rows=batch_size):
+        rows += count
+        size += len(chunk)
+
+    return {"rows": rows, "seconds": time.perf_counter() - start, "mb": size / 1024 / 1024}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--schema", default="public")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    source = await postgres_service.get_table_schema(args.table, args.schema)
+    mappings = [FieldMapping(**m) for m in mapping_service.generate_mappings(source, args.table)["mappings"]]
+    columns = [m.source_field for m in mappings]
+    key_columns = [c.name for c in source.columns if c.primary_key]
+
+    print(f"Table {args.schema}.{args.table}: {source.row_count} rows, {len(columns)} columns")
+
+    if key_columns:
+        result = await bench_fetch(args.table, args.schema, columns, key_columns, args.batch_size)
+        print(f"fetch (keyset): {result['rows']} rows in {result['seconds']:.2f}s "
+              f"= {result['rows'] / result['seconds']:,.0f} rows/s")
+    else:
+        print("fetch (keyset): skipped, table has no primary key")
+
+    expressions = build_copy_expressions(mappings)
+    result = await bench_copy(args.table, args.schema, expressions, args.batch_size)
+    print(f"copy (text):    {result['rows']} rows in {result['seconds']:.2f}s "
+          f"= {result['rows'] / result['seconds']:,.0f} rows/s, {result['mb'] / result['seconds']:.1f} MB/s")
+
+    await postgres_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
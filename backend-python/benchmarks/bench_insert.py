@@ -0,0 +1,116 @@
+"""Compare ClickHouse insert throughput across insert modes and transport compression.
+
+Synthetic rows (ints, floats, low- and high-cardinality strings, timestamps)
+are inserted into a scratch MergeTree table through each combination of
+row / columnar / native mode and none / lz4 / zstd compression, plus the
+TabSeparated path COPY migrations use. MB/s is measured on the in-memory
+size of the batches, so every mode is scored against the same payload.
+Native mode is skipped when clickhouse-driver is not installed.
+
+    python benchmarks/bench_insert.py --rows 1000000 --batch-size 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.migration import InsertMode, InsertCompression
+from services.clickhouse_service import clickhouse_service, NativeClient
+from utils.batch_sizer import estimate_rows_bytes
+
+TABLE = "bench_insert_modes"
+COLUMNS = ["id", "user_id", "amount", "status", "payload", "created_at"]
+DDL = f"""
+CREATE TABLE {TABLE} (
+    id Int64,
+    user_id Int32,
+    amount Float64,
+    status String,
+    payload String,
+    created_at DateTime
+) ENGINE = MergeTree()
+ORDER BY id
+"""
+
+
+def make_rows(count: int) -> list[tuple]:
+    rng = random.Random(42)
+    statuses = ["new", "paid", "shipped", "cancelled"]
+    start = datetime(2024, 1, 1)
+    return [
+        (
+            i,
+            rng.randrange(100_000),
+            round(rng.random() * 1000, 2),
+            rng.choice(statuses),
+            f"item-{rng.getrandbits(64):x}",
+            start + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+
+def to_tsv(rows: list[tuple]) -> bytes:
+    return "".join(
+        "\t".join(str(v) for v in row) + "\n" for row in rows
+    ).encode()
+
+
+def bench(name: str, batches: list, insert) -> dict:
+    clickhouse_service.execute_query(f"TRUNCATE TABLE {TABLE}")
+    start = time.perf_counter()
+    for batch in batches:
+        insert(batch)
+    return {"mode": name, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    row_batches = [rows[i:i + args.batch_size] for i in range(0, len(rows), args.batch_size)]
+    column_batches = [[list(c) for c in zip(*batch)] for batch in row_batches]
+    tsv_batches = [to_tsv(batch) for batch in row_batches]
+    payload_mb = sum(estimate_rows_bytes(batch) for batch in row_batches) / 1024 / 1024
+
+    clickhouse_service.execute_query(f"DROP TABLE IF EXISTS {TABLE}")
+    clickhouse_service.create_table(DDL)
+    print(f"{args.rows:,} rows in batches of {args.batch_size:,}, {payload_mb:.1f} MB in memory")
+
+    # "tsv" is the pre-encoded text path COPY migrations load through
+    for mode in ("row", "columnar", "native", "tsv"):
+        if mode == InsertMode.NATIVE and NativeClient is None:
+            print(f"{'native':>8}: skipped, clickhouse-driver is not installed")
+            continue
+
+        for compression in InsertCompression:
+            if mode == InsertMode.ROW:
+                batches = row_batches
+                insert = lambda b: clickhouse_service.insert_rows(TABLE, b, COLUMNS, compression=compression)
+            elif mode == "tsv":
+                batches = tsv_batches
+                insert = lambda b: clickhouse_service.insert_raw(TABLE, b, COLUMNS, compression=compression)
+            else:
+                batches = column_batches
+                insert = lambda b: clickhouse_service.insert_columns(
+                    TABLE, b, COLUMNS, mode=InsertMode(mode), compression=compression
+                )
+
+            result = bench(mode, batches, insert)
+            print(f"{result['mode']:>8} / {compression.value:<4}: {result['seconds']:.2f}s "
+                  f"= {args.rows / result['seconds']:,.0f} rows/s, "
+                  f"{payload_mb / result['seconds']:.1f} MB/s")
+
+    clickhouse_service.execute_query(f"DROP TABLE IF EXISTS {TABLE}")
+    clickhouse_service.close()
+
+
+if __name__ == "__main__":
+    main()
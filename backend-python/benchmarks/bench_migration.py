@@ -0,0 +1,250 @@
+"""End-to-end migration benchmark: seeded Postgres table -> ClickHouse, per mode, as JSON.
+
+Seeds a synthetic source table in the configured Postgres (POSTGRES_*),
+deterministically via setseed, with a configurable row count, width and
+type mix, then runs the full MigrationService into the configured
+ClickHouse once per extraction method / insert mode. Each run reports
+rows/s, MB/s (of the source table's on-disk size, so modes are scored
+against the same bytes), peak RSS of this process and per-stage stats.
+Results are written as JSON so runs from different commits can be diffed.
+Python rarely returns freed memory, so a run's peak RSS includes what earlier
+runs left behind; for isolated figures run one mode per invocation.
+
+    python benchmarks/bench_migration.py --rows 1000000 --width 12 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.migration import ExtractionMethod, InsertCompression, InsertMode, MigrationRequest
+from services.postgres_service import postgres_service
+from services.clickhouse_service import clickhouse_service
+from services.mapping_service import mapping_service
+from services.migration_service import migration_service
+
+# Postgres column type and generator expression (over generate_series value g) per kind
+TYPE_KINDS = {
+    "int": ("integer", "(random() * 1000000)::int"),
+    "numeric": ("numeric(12,2)", "round((random() * 100000)::numeric, 2)"),
+    "text": ("text", "md5(g::text || random()::text)"),
+    "jsonb": ("jsonb", "jsonb_build_object('id', g, 'score', round(random()::numeric, 3), 'tag', left(md5(g::text), 8))"),
+    "array": ("integer[]", "ARRAY[g % 100, g % 1000, (random() * 100)::int]"),
+    "timestamp": ("timestamp", "timestamp '2024-01-01' + g * interval '1 second'"),
+}
+RSS_SAMPLE_SECONDS = 0.05
+
+
+def current_rss_bytes() -> int:
+    """Resident set size now (Linux), or the process peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def sample_rss(stop: asyncio.Event, peak: list[int]) -> None:
+    while not stop.is_set():
+        peak[0] = max(peak[0], current_rss_bytes())
+        await asyncio.sleep(RSS_SAMPLE_SECONDS)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def column_plan(width: int, kinds: list[str]) -> list[tuple[str, str, str]]:
+    """(name, type, expression) for width columns cycling through kinds, after the id key."""
+    columns = []
+    for i in range(width):
+        kind = kinds[i % len(kinds)]
+        pg_type, expr = TYPE_KINDS[kind]
+        columns.append((f"{kind}_{i}", pg_type, expr))
+    return columns
+
+
+async def seed(table: str, schema: str, rows: int, width: int, kinds: list[str], null_fraction: float) -> int:
+    """Create and fill the source table; returns its on-disk size in bytes."""
+    columns = column_plan(width, kinds)
+    definitions = ", ".join(f'"{name}" {pg_type}' for name, pg_type, _ in columns)
+    expressions = ", ".join(
+        f"CASE WHEN random() < {null_fraction} THEN NULL ELSE {expr} END" if null_fraction > 0 else expr
+        for _, _, expr in columns
+    )
+
+    async with postgres_service.acquire() as conn:
+        await conn.execute(f'DROP TABLE IF EXISTS "{schema}"."{table}"')
+        await conn.execute(f'CREATE TABLE "{schema}"."{table}" (id bigint PRIMARY KEY, {definitions})')
+        await conn.execute("SELECT setseed(0.42)")
+        await conn.execute(
+            f'INSERT INTO "{schema}"."{table}" SELECT g, {expressions} FROM generate_series(1, $1) AS g',
+            rows
+        )
+        await conn.execute(f'ANALYZE "{schema}"."{table}"')
+        return await conn.fetchval(f"SELECT pg_total_relation_size('\"{schema}\".\"{table}\"'::regclass)")
+
+
+def cases(extraction: list[str], insert_modes: list[str]) -> list[tuple[ExtractionMethod, InsertMode]]:
+    """Insert modes only shape fetched rows; COPY and Arrow run once each."""
+    result = []
+    for method in extraction:
+        if method == ExtractionMethod.FETCH:
+            result.extend((ExtractionMethod.FETCH, InsertMode(mode)) for mode in insert_modes)
+        else:
+            result.append((ExtractionMethod(method), InsertMode.ROW))
+    return result
+
+
+async def run_case(
+    args: argparse.Namespace,
+    method: ExtractionMethod,
+    insert_mode: InsertMode,
+    mappings: list[dict],
+    source_bytes: int
+) -> dict:
+    destination = f"{args.table}_dst"
+    clickhouse_service.execute_query(f"DROP TABLE IF EXISTS {destination}")
+
+    request = MigrationRequest(
+        source_schema=args.schema,
+        source_table=args.table,
+        destination_table=destination,
+        mappings=mappings,
+        batch_size=args.batch_size,
+        adaptive_batch_size=args.adaptive,
+        parallelism=args.parallelism,
+        transform_workers=args.transform_workers,
+        extraction_method=method,
+        insert_mode=insert_mode,
+        insert_compression=args.compression,
+        description="bench_migration"
+    )
+    result = {"extraction": method.value, "insert_mode": insert_mode.value}
+
+    stop = asyncio.Event()
+    peak = [current_rss_bytes()]
+    sampler = asyncio.create_task(sample_rss(stop, peak))
+    started = time.perf_counter()
+    try:
+        migration_id = await migration_service.execute_migration(request)
+        status = await migration_service.wait_for_migration(migration_id)
+    except ValueError as e:
+        # e.g. native mode without clickhouse-driver
+        return {**result, "skipped": str(e)}
+    finally:
+        seconds = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    progress = status.progress
+    rows = progress.processed_records
+    return {
+        **result,
+        "status": status.status.value,
+        "error": status.error_message,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+        "mb_per_second": round(source_bytes / 1024 / 1024 / seconds, 2) if seconds > 0 else None,
+        "peak_rss_mb": round(peak[0] / 1024 / 1024, 1),
+        "bottleneck": progress.bottleneck,
+        "stages": {name: stage.model_dump() for name, stage in (progress.stages or {}).items()},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--width", type=int, default=12, help="columns besides the id key")
+    parser.add_argument("--types", default=",".join(TYPE_KINDS), help=f"comma-separated mix of {', '.join(TYPE_KINDS)}")
+    parser.add_argument("--null-fraction", type=float, default=0.05)
+    parser.add_argument("--schema", default="public")
+    parser.add_argument("--table", default="bench_migration")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse an already seeded table")
+    parser.add_argument("--extraction", default="fetch,copy,arrow")
+    parser.add_argument("--insert-modes", default="row,columnar,native")
+    parser.add_argument("--compression", type=InsertCompression, help="none, lz4 or zstd (default: Settings)")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--parallelism", type=int, default=1)
+    parser.add_argument("--transform-workers", type=int, default=1)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    kinds = [k.strip() for k in args.types.split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in TYPE_KINDS]
+    if unknown:
+        parser.error(f"unknown types: {', '.join(unknown)}")
+
+    clickhouse_service.initialize_migration_history_table()
+    clickhouse_service.initialize_migration_checkpoints_table()
+
+    if args.skip_seed:
+        async with postgres_service.acquire() as conn:
+            source_bytes = await conn.fetchval(
+                f"SELECT pg_total_relation_size('\"{args.schema}\".\"{args.table}\"'::regclass)"
+            )
+    else:
+        started = time.perf_counter()
+        source_bytes = await seed(args.table, args.schema, args.rows, args.width, kinds, args.null_fraction)
+        print(f"Seeded {args.schema}.{args.table}: {args.rows:,} rows, "
+              f"{source_bytes / 1024 / 1024:.1f} MB in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    schema = await postgres_service.get_table_schema(args.table, args.schema)
+    mappings = mapping_service.generate_mappings(schema, f"{args.table}_dst")["mappings"]
+
+    results = []
+    for method, insert_mode in cases(args.extraction.split(","), args.insert_modes.split(",")):
+        result = await run_case(args, method, insert_mode, mappings, source_bytes)
+        print(f"{method.value}/{insert_mode.value}: "
+              f"{result.get('rows_per_second') or result.get('skipped')}", file=sys.stderr)
+        results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": {
+            "rows": schema.row_count,
+            "width": args.width,
+            "types": kinds,
+            "null_fraction": args.null_fraction,
+            "source_mb": round(source_bytes / 1024 / 1024, 2),
+            "batch_size": args.batch_size,
+            "adaptive": args.adaptive,
+            "parallelism": args.parallelism,
+            "transform_workers": args.transform_workers,
+            "compression": clickhouse_service.resolve_compression(args.compression).value,
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    clickhouse_service.execute_query(f"DROP TABLE IF EXISTS {args.table}_dst")
+    await postgres_service.close()
+    clickhouse_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -13,6 +13,22 @@ class Settings(BaseSettings):
     postgres_db: str = "postgres"
     postgres_user: str = "postgres"
     postgres_password: str = ""
+    postgres_pool_max_size: int = 10
+
+    # Migration
+    migration_max_parallelism: int = 8
+    # Scheduler caps: running migrations overall, per source database, per destination table
+    migration_max_concurrent: int = 4
+    migration_max_per_source: int = 2
+    migration_max_per_destination: int = 1
+    # Batch bytes all running migrations together may hold in memory
+    migration_memory_budget_mb: int = 2048
+    # Recent insert blocks ClickHouse remembers for deduplicating retried batches
+    migration_dedup_window: int = 1000
+    # Attempts per batch insert, with exponential backoff between them on transient errors
+    migration_insert_attempts: int = 5
+    migration_retry_base_seconds: float = 0.5
+    migration_retry_max_seconds: float = 30.0
 
     # ClickHouse
     clickhouse_host: str = "localhost"
@@ -20,6 +36,14 @@ class Settings(BaseSettings):
     clickhouse_user: str = "default"
     clickhouse_password: str = ""
     clickhouse_database: str = "default"
+    # Worker threads (each with its own client) for blocking ClickHouse calls
+    clickhouse_max_workers: int = 8
+    # Default insert path: row (HTTP, row tuples), columnar (HTTP, column lists)
+    # or native (TCP protocol via clickhouse-driver, see requirements-native.txt)
+    clickhouse_insert_mode: str = "row"
+    # Transport compression for inserts: none, lz4 or zstd
+    clickhouse_insert_compression: str = "lz4"
+    clickhouse_native_port: int = 9000
 
     # MinIO/S3
     minio_endpoint: str = "localhost:9000"
@@ -27,6 +51,9 @@ class Settings(BaseSettings):
     minio_secret_key: str = "minioadmin"
     minio_secure: bool = False
     minio_bucket: str = "default"
+    # MinIO URL as ClickHouse reaches it for s3() reads (e.g. http://minio:9000);
+    # empty derives it from minio_endpoint
+    minio_clickhouse_endpoint: str = ""
 
     class Config:
         env_file = ".env"
@@ -8,8 +8,11 @@ load_dotenv()
 # Add backend-python to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from contextlib import asynccontextmanager
 from datetime import datetime
 
@@ -21,6 +24,8 @@ from routes.auth_routes import router as auth_router
 from services.clickhouse_service import clickhouse_service
 from services.postgres_service import postgres_service
 from services.duckdb_service import duckdb_service
+from services.keycloak_service import keycloak_service
+from services.metrics_service import metrics_service
 load_dotenv(".env")
 
 @asynccontextmanager
@@ -38,6 +43,7 @@ async def lifespan(app: FastAPI):
     
     try:
         clickhouse_service.initialize_migration_history_table()
+        clickhouse_service.initialize_migration_checkpoints_table()
         print("Migration history table initialized")
     except Exception as e:
         print(f"Warning: Could not initialize migration history table: {e}")
@@ -47,6 +53,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     await postgres_service.close()
     clickhouse_service.close()
+    keycloak_service.close()
     duckdb_service.close()
 
 
@@ -66,6 +73,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Observe request latency per route template (not raw path, which would explode labels)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics_service.http_request_seconds.labels(
+            request.method,
+            route.path if route else "unmatched",
+            status
+        ).observe(time.perf_counter() - started)
+
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(query_router)
@@ -82,6 +107,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(metrics_service.registry), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -6,10 +6,23 @@ from .schema import (
 )
 from .migration import (
     MigrationStatus,
+    MigrationPriority,
+    ExtractionMethod,
+    InsertMode,
+    InsertCompression,
     MigrationRequest,
+    CdcRequest,
+    SchemaMigrationRequest,
+    VerificationRequest,
+    ChunkMismatch,
+    VerificationResult,
+    TableMigrationState,
     MigrationHistory,
     MigrationProgress,
     MigrationStatusResponse,
+    StageStats,
+    BatchTiming,
+    MigrationCheckpoint,
 )
 
 __all__ = [
@@ -18,8 +31,21 @@ __all__ = [
     "FieldMapping",
     "DatabaseConnection",
     "MigrationStatus",
+    "MigrationPriority",
+    "ExtractionMethod",
+    "InsertMode",
+    "InsertCompression",
     "MigrationRequest",
+    "CdcRequest",
+    "SchemaMigrationRequest",
+    "VerificationRequest",
+    "ChunkMismatch",
+    "VerificationResult",
+    "TableMigrationState",
     "MigrationHistory",
     "MigrationProgress",
     "MigrationStatusResponse",
+    "StageStats",
+    "BatchTiming",
+    "MigrationCheckpoint",
 ]
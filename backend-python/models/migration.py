@@ -11,6 +11,31 @@ class MigrationStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    QUEUED = "queued"
+
+
+class MigrationPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+class ExtractionMethod(str, Enum):
+    FETCH = "fetch"
+    COPY = "copy"
+    ARROW = "arrow"
+
+
+class InsertMode(str, Enum):
+    ROW = "row"
+    COLUMNAR = "columnar"
+    NATIVE = "native"
+
+
+class InsertCompression(str, Enum):
+    NONE = "none"
+    LZ4 = "lz4"
+    ZSTD = "zstd"
 
 
 class MigrationRequest(BaseModel):
@@ -21,10 +46,116 @@ class MigrationRequest(BaseModel):
     mappings: list[FieldMapping]
     create_table: bool = True
     batch_size: int = 10000
+    adaptive_batch_size: bool = False
+    target_batch_mb: float = Field(default=16.0, gt=0)
+    target_batch_seconds: float = Field(default=2.0, gt=0)
+    memory_budget_mb: float = Field(default=512.0, gt=0)
+    key_column: Optional[str] = None
+    queue_depth: int = Field(default=4, ge=1)
+    transform_workers: int = Field(default=1, ge=1)
+    parallelism: int = Field(default=1, ge=1)
+    extraction_method: ExtractionMethod = ExtractionMethod.FETCH
+    # None uses the clickhouse_insert_* defaults from Settings
+    insert_mode: Optional[InsertMode] = None
+    insert_compression: Optional[InsertCompression] = None
+    # Lay out a created table from source statistics (MappingService.design_table)
+    optimize_table: bool = False
+    # Load into a staging table swapped in with EXCHANGE TABLES once complete
+    shadow_load: bool = False
+    # Stop merges on the staging table during the load and merge once before the swap
+    defer_merges: bool = False
+    # Write batches as Parquet to MinIO and let ClickHouse ingest them with s3()
+    offload: bool = False
+    # None uses settings.minio_bucket
+    offload_bucket: Optional[str] = None
+    # Keep the Parquet files afterwards as a data-lake snapshot of the source
+    keep_offload_files: bool = True
+    incremental: bool = False
+    watermark_column: Optional[str] = None
+    priority: MigrationPriority = MigrationPriority.NORMAL
+    description: str = ""
+    created_by: str = "system"
+
+
+class CdcRequest(BaseModel):
+    source_connection: Optional[DatabaseConnection] = None
+    source_schema: str = "public"
+    source_table: str
+    destination_table: str
+    mappings: list[FieldMapping]
+    create_table: bool = True
+    slot_name: Optional[str] = None
+    max_batch_changes: int = Field(default=10000, ge=1)
+    poll_interval_seconds: float = Field(default=1.0, gt=0)
+    description: str = ""
+    created_by: str = "system"
+
+
+class SchemaMigrationRequest(BaseModel):
+    source_connection: Optional[DatabaseConnection] = None
+    source_schema: str = "public"
+    include: list[str] = ["*"]
+    exclude: list[str] = []
+    destination_prefix: str = ""
+    # Capped at MIGRATION_MAX_PER_SOURCE, since every table reads the same source;
+    # the effective count is reported as progress.parallelism
+    table_workers: int = Field(default=4, ge=1)
+    create_table: bool = True
+    batch_size: int = 10000
+    adaptive_batch_size: bool = False
+    parallelism: int = Field(default=1, ge=1)
+    extraction_method: ExtractionMethod = ExtractionMethod.FETCH
+    insert_mode: Optional[InsertMode] = None
+    insert_compression: Optional[InsertCompression] = None
+    optimize_table: bool = False
+    shadow_load: bool = False
+    defer_merges: bool = False
+    priority: MigrationPriority = MigrationPriority.LOW
     description: str = ""
     created_by: str = "system"
 
 
+class VerificationRequest(BaseModel):
+    # Needed again for custom sources, since passwords are never stored
+    source_connection: Optional[DatabaseConnection] = None
+    chunks: int = Field(default=1024, ge=1)
+    parallelism: int = Field(default=4, ge=1)
+    fanout: int = Field(default=16, ge=2)
+    leaf_rows: int = Field(default=1000, ge=1)
+    max_drill_chunks: int = Field(default=32, ge=1)
+    sample_keys: int = Field(default=20, ge=0)
+
+
+class ChunkMismatch(BaseModel):
+    level: int
+    chunk: str
+    source_rows: int
+    destination_rows: int
+
+
+class VerificationResult(BaseModel):
+    migration_id: str
+    status: MigrationStatus
+    matched: Optional[bool] = None
+    chunking: Optional[str] = None
+    chunks: int = 0
+    levels: int = 0
+    source_rows: int = 0
+    destination_rows: int = 0
+    verified_columns: list[str] = []
+    unverified_columns: list[str] = []
+    mismatched_chunks: int = 0
+    chunk_mismatches: list[ChunkMismatch] = []
+    missing_keys: list[str] = []
+    extra_keys: list[str] = []
+    changed_keys: list[str] = []
+    truncated: bool = False
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    error_message: Optional[str] = None
+
+
 class MigrationHistory(BaseModel):
     id: str
     source: str
@@ -42,12 +173,76 @@ class MigrationHistory(BaseModel):
     metadata: str = "{}"
 
 
+class StageStats(BaseModel):
+    batches: int = 0
+    rows: int = 0
+    busy_ms: float = 0.0
+    wait_input_ms: float = 0.0
+    wait_output_ms: float = 0.0
+    retries: int = 0
+    bytes: int = 0
+    rows_per_second: float = 0.0
+
+
+class BatchTiming(BaseModel):
+    range_id: int
+    seq: int
+    rows: int
+    bytes_read: int
+    bytes_written: int
+    extract_ms: float
+    transform_ms: float
+    load_ms: float
+
+
+class MigrationCheckpoint(BaseModel):
+    migration_id: str
+    range_id: int
+    range_predicate: str = ""
+    range_args: str = "[]"
+    next_seq: int = 0
+    last_key: Optional[str] = None
+    rows_written: int = 0
+    dedup_token: str = ""
+    completed: bool = False
+    # Row counts of the batches cut from plan_start_seq on (JSON list), replayed on resume
+    plan_start_seq: int = 0
+    planned_rows: str = "[]"
+
+
 class MigrationProgress(BaseModel):
     total_records: int
     processed_records: int
     percentage: float
     current_batch: Optional[int] = None
     total_batches: Optional[int] = None
+    pagination: Optional[str] = None
+    parallelism: Optional[int] = None
+    stages: Optional[dict[str, StageStats]] = None
+    bottleneck: Optional[str] = None
+    replication_lag_bytes: Optional[int] = None
+    confirmed_lsn: Optional[str] = None
+    resumed_from_records: Optional[int] = None
+    batch_size: Optional[int] = None
+    batch_size_history: Optional[list[int]] = None
+    avg_row_bytes: Optional[float] = None
+    memory_bytes: Optional[int] = None
+    peak_memory_bytes: Optional[int] = None
+    elapsed_seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    recent_batches: Optional[list[BatchTiming]] = None
+
+
+class TableMigrationState(BaseModel):
+    source_table: str
+    destination_table: str
+    size_bytes: int = 0
+    migration_id: Optional[str] = None
+    status: MigrationStatus = MigrationStatus.PENDING
+    total_records: int = 0
+    processed_records: int = 0
+    error_message: Optional[str] = None
 
 
 class MigrationStatusResponse(BaseModel):
@@ -57,3 +252,5 @@ class MigrationStatusResponse(BaseModel):
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    queue_position: Optional[int] = None
+    tables: Optional[list[TableMigrationState]] = None
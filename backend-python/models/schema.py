@@ -16,7 +16,11 @@ class TableSchema(BaseModel):
     schema_name: Optional[str] = Field(default="public", alias="schema")
     columns: list[ColumnDefinition]
     row_count: Optional[int] = None
+    # Planner estimate (pg_class.reltuples), available even when the exact count is skipped
+    estimated_rows: Optional[int] = None
     estimated_size_mb: Optional[float] = None
+    # Unique indexes over NOT NULL columns other than the primary key, narrowest first
+    unique_keys: list[list[str]] = []
 
     class Config:
         populate_by_name = True
@@ -29,6 +33,8 @@ class FieldMapping(BaseModel):
     destination_type: str
     transformation: Optional[str] = None
     skip: bool = False
+    # Column compression codec for the DDL, e.g. "Delta, ZSTD(1)"; None keeps the server default
+    codec: Optional[str] = None
 
 
 class DatabaseConnection(BaseModel):
@@ -25,7 +25,7 @@ async def login(request: LoginRequest):
             detail="Username and password are required"
         )
     
-    result = keycloak_service.authenticate(request.username, request.password)
+    result = await keycloak_service.run(keycloak_service.authenticate, request.username, request.password)
     
     if result.get('success'):
         return {
@@ -55,7 +55,7 @@ async def refresh_token(request: RefreshTokenRequest):
             detail="Refresh token is required"
         )
     
-    result = keycloak_service.refresh_token(request.refresh_token)
+    result = await keycloak_service.run(keycloak_service.refresh_token, request.refresh_token)
     
     if result.get('success'):
         return {
@@ -84,7 +84,7 @@ async def logout(request: LogoutRequest):
             detail="Refresh token is required"
         )
     
-    success = keycloak_service.logout(request.refresh_token)
+    success = await keycloak_service.run(keycloak_service.logout, request.refresh_token)
     
     if success:
         return {
@@ -109,7 +109,7 @@ async def get_current_user(authorization: str = None):
         )
     
     access_token = authorization.replace('Bearer ', '')
-    user_info = keycloak_service.get_user_info(access_token)
+    user_info = await keycloak_service.run(keycloak_service.get_user_info, access_token)
     
     if user_info:
         return {
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from models.schema import DatabaseConnection, TableSchema, ColumnDefinition, FieldMapping
-from models.migration import MigrationRequest
+from models.migration import MigrationRequest, CdcRequest, SchemaMigrationRequest, VerificationRequest
 from services.postgres_service import postgres_service
 from services.clickhouse_service import clickhouse_service
 from services.migration_service import migration_service
+from services.cdc_service import cdc_service
+from services.schema_migration_service import schema_migration_service
+from services.verification_service import verification_service
 from services.history_service import history_service
 from services.mapping_service import mapping_service
+from services.codec_service import codec_service
 
 router = APIRouter(prefix="/api/migration", tags=["migration"])
 
@@ -24,6 +28,19 @@ class AnalyzeSourceRequest(BaseModel):
 class SuggestMappingRequest(BaseModel):
     source_schema: TableSchema
     destination_table: str
+    # Design ORDER BY / PARTITION BY from the source table's pg_stats
+    use_statistics: bool = True
+    # Narrow types to values sampled from the source (100 reads the whole table)
+    profile_types: bool = False
+    sample_percent: float = Field(default=1.0, gt=0, le=100)
+    # Measure candidate compression codecs on a scratch ClickHouse table
+    advise_codecs: bool = False
+    codec_sample_rows: int = Field(default=100_000, ge=1000)
+    connection: Optional[DatabaseConnection] = None
+
+
+class ResumeMigrationRequest(BaseModel):
+    source_connection: Optional[DatabaseConnection] = None
 
 
 @router.post("/analyze-source")
@@ -54,10 +71,53 @@ async def analyze_source(request: AnalyzeSourceRequest):
 async def suggest_mapping(request: SuggestMappingRequest):
     """Generate field mappings and DDL suggestion."""
     try:
+        column_stats = None
+        stats_warning = None
+        if request.use_statistics:
+            try:
+                column_stats = await postgres_service.get_column_stats(
+                    request.source_schema.table,
+                    request.source_schema.schema_name,
+                    request.connection
+                )
+            except Exception as e:
+                stats_warning = f"Table statistics unavailable, using the default layout: {e}"
+
+        column_profile = None
+        if request.profile_types:
+            column_profile = await postgres_service.profile_columns(
+                request.source_schema.table,
+                request.source_schema.schema_name,
+                request.source_schema.columns,
+                request.sample_percent,
+                request.connection
+            )
+
         result = mapping_service.generate_mappings(
             request.source_schema,
-            request.destination_table
+            request.destination_table,
+            column_stats,
+            column_profile
         )
+        if request.advise_codecs:
+            # Codecs are measured on the suggested types, sorted like the suggested table
+            design = result.get("table_design")
+            codec_advice = await codec_service.advise(
+                request.source_schema,
+                [FieldMapping(**m) for m in result["mappings"]],
+                design["order_by"] if design else None,
+                request.codec_sample_rows,
+                request.connection
+            )
+            result = mapping_service.generate_mappings(
+                request.source_schema,
+                request.destination_table,
+                column_stats,
+                column_profile,
+                codec_advice
+            )
+        if stats_warning:
+            result["warnings"].append(stats_warning)
 
         return {
             "success": True,
@@ -72,22 +132,128 @@ async def execute_migration(request: MigrationRequest):
     """Start migration from PostgreSQL to ClickHouse."""
     try:
         migration_id = await migration_service.execute_migration(request)
+        status = migration_service.get_migration_status(migration_id)
+
+        return {
+            "success": True,
+            "migration_id": migration_id,
+            "status": status.status.value,
+            "queue_position": status.queue_position
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/resume/{migration_id}")
+async def resume_migration(migration_id: str, request: Optional[ResumeMigrationRequest] = None):
+    """Continue a failed or interrupted migration from its last checkpoint."""
+    try:
+        await migration_service.resume_migration(
+            migration_id,
+            request.source_connection if request else None
+        )
+        status = migration_service.get_migration_status(migration_id)
+
+        return {
+            "success": True,
+            "migration_id": migration_id,
+            "status": status.status.value,
+            "queue_position": status.queue_position
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/verify/{migration_id}")
+async def verify_migration(migration_id: str, request: Optional[VerificationRequest] = None):
+    """Start comparing a finished migration's destination with its source, chunk by chunk."""
+    try:
+        result = await verification_service.start(migration_id, request or VerificationRequest())
 
         return {
             "success": True,
             "migration_id": migration_id,
+            "status": result.status.value
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/verify/{migration_id}")
+async def get_verification(migration_id: str):
+    """Get the running or latest verification of a migration."""
+    try:
+        result = await verification_service.get_result(migration_id)
+
+        if result is None:
+            raise HTTPException(status_code=404, detail="No verification found for this migration")
+
+        return {
+            "success": True,
+            "data": result.model_dump(mode="json")
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/schema/execute")
+async def execute_schema_migration(request: SchemaMigrationRequest):
+    """Start migrating every matching table of a PostgreSQL schema."""
+    try:
+        job_id = await schema_migration_service.start_job(request)
+        status = schema_migration_service.get_status(job_id)
+
+        return {
+            "success": True,
+            "migration_id": job_id,
+            "status": status.status.value,
+            "tables": [t.source_table for t in status.tables],
+            "table_workers": status.progress.parallelism
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/cdc/start")
+async def start_cdc(request: CdcRequest):
+    """Start streaming changes from a Postgres logical replication slot."""
+    try:
+        job_id = await cdc_service.start_job(request)
+
+        return {
+            "success": True,
+            "migration_id": job_id,
             "status": "running"
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/cdc/stop/{job_id}")
+async def stop_cdc(job_id: str, drop_slot: bool = Query(default=False)):
+    """Stop a CDC job after its current micro-batch, optionally dropping the slot."""
+    if not cdc_service.stop_job(job_id, drop_slot):
+        raise HTTPException(status_code=404, detail="CDC job not found or not running")
+
+    return {
+        "success": True,
+        "migration_id": job_id,
+        "status": "stopping"
+    }
+
+
 @router.get("/status/{migration_id}")
 async def get_migration_status(migration_id: str):
     """Get status of a migration."""
     try:
-        # Check active migrations first
-        status = migration_service.get_migration_status(migration_id)
+        # Check active migrations, CDC and schema jobs first
+        status = (
+            migration_service.get_migration_status(migration_id)
+            or cdc_service.get_status(migration_id)
+            or schema_migration_service.get_status(migration_id)
+        )
 
         if status:
             return {
@@ -98,12 +264,14 @@ async def get_migration_status(migration_id: str):
                     "progress": status.progress.model_dump() if status.progress else None,
                     "started_at": status.started_at.isoformat() if status.started_at else None,
                     "completed_at": status.completed_at.isoformat() if status.completed_at else None,
-                    "error_message": status.error_message
+                    "error_message": status.error_message,
+                    "queue_position": status.queue_position,
+                    "tables": [t.model_dump() for t in status.tables] if status.tables else None
                 }
             }
 
         # Check history
-        history = history_service.get_migration_by_id(migration_id)
+        history = await clickhouse_service.run(history_service.get_migration_by_id, migration_id)
 
         if history:
             return {
@@ -137,7 +305,7 @@ async def get_migration_history(
 ):
     """Get migration history with pagination."""
     try:
-        result = history_service.get_migration_history(limit, offset, status)
+        result = await clickhouse_service.run(history_service.get_migration_history, limit, offset, status)
 
         return {
             "success": True,
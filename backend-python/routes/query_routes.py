@@ -15,7 +15,7 @@ class QueryRequest(BaseModel):
 async def execute_query(request: QueryRequest):
     """Execute ClickHouse query."""
     try:
-        result = clickhouse_service.execute_query(request.query, request.format)
+        result = await clickhouse_service.run(clickhouse_service.execute_query, request.query, request.format)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -25,7 +25,7 @@ async def execute_query(request: QueryRequest):
 async def health_check():
     """Check ClickHouse connection health."""
     try:
-        is_connected = clickhouse_service.ping()
+        is_connected = await clickhouse_service.run(clickhouse_service.ping)
         return {
             "success": True,
             "clickhouse": "connected" if is_connected else "disconnected"
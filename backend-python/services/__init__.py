@@ -3,6 +3,9 @@ from .clickhouse_service import ClickHouseService
 from .migration_service import MigrationService
 from .history_service import HistoryService
 from .mapping_service import MappingService
+from .cdc_service import CdcService
+from .checkpoint_service import CheckpointService
+from .schema_migration_service import SchemaMigrationService
 
 __all__ = [
     "PostgresService",
@@ -10,4 +13,7 @@ __all__ = [
     "MigrationService",
     "HistoryService",
     "MappingService",
+    "CdcService",
+    "CheckpointService",
+    "SchemaMigrationService",
 ]
@@ -0,0 +1,374 @@
+import asyncio
+import json
+import re
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Optional
+from models.schema import FieldMapping
+from models.migration import (
+    CdcRequest,
+    MigrationStatus,
+    MigrationProgress,
+    MigrationStatusResponse
+)
+from services.postgres_service import postgres_service
+from services.clickhouse_service import clickhouse_service
+from services.history_service import history_service
+from services.mapping_service import mapping_service
+from services.migration_service import migration_service
+from utils.transform_plan import compile_row_converter, is_array_source
+
+# System columns added to CDC destination tables
+VERSION_COLUMN = "_version"
+DELETED_COLUMN = "_is_deleted"
+# Array element types wal2json renders as text that are decoded back to numbers or booleans
+INTEGER_ELEMENT_TYPES = {"smallint", "int2", "integer", "int", "int4", "bigint", "int8"}
+FLOAT_ELEMENT_TYPES = {"real", "float4", "double precision", "float8"}
+DECIMAL_ELEMENT_TYPES = {"numeric", "decimal"}
+BOOLEAN_ELEMENT_TYPES = {"boolean", "bool"}
+
+
+def lsn_to_int(lsn: str) -> int:
+    """Convert a pg_lsn ('16/B374D848') into a monotonically increasing integer."""
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def parse_pg_array(text: str, element_type: str = "text") -> list:
+    """Parse a one-dimensional Postgres array literal ('{1,"a b",NULL}') as wal2json renders it."""
+    inner = text.strip()
+    if inner.startswith("[") and "=" in inner:
+        # Arrays with explicit bounds ('[0:1]={1,2}') carry a dimension prefix
+        inner = inner.split("=", 1)[1]
+    if not (inner.startswith("{") and inner.endswith("}")):
+        raise ValueError(f"Not an array literal: {text!r}")
+    inner = inner[1:-1]
+
+    elements, i = [], 0
+    while i < len(inner):
+        if inner[i] == '"':
+            i += 1
+            chars = []
+            while inner[i] != '"':
+                if inner[i] == "\\":
+                    i += 1
+                chars.append(inner[i])
+                i += 1
+            elements.append("".join(chars))
+            i += 2  # closing quote and separator
+        else:
+            end = inner.find(",", i)
+            end = len(inner) if end < 0 else end
+            token = inner[i:end]
+            elements.append(None if token == "NULL" else token)
+            i = end + 1
+
+    element_type = element_type.lower().strip()
+    if element_type in INTEGER_ELEMENT_TYPES:
+        return [None if e is None else int(e) for e in elements]
+    if element_type in FLOAT_ELEMENT_TYPES:
+        return [None if e is None else float(e) for e in elements]
+    if element_type in DECIMAL_ELEMENT_TYPES:
+        return [None if e is None else Decimal(e) for e in elements]
+    if element_type in BOOLEAN_ELEMENT_TYPES:
+        return [None if e is None else e == "t" for e in elements]
+    return elements
+
+
+class CdcService:
+    """Continuous change-data-capture from a Postgres logical replication slot.
+
+    Changes are read with wal2json through the SQL slot interface, written to
+    a ReplacingMergeTree(_version, _is_deleted) table in micro-batches and only
+    then confirmed on the slot, so the slot position is the resume checkpoint.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, MigrationStatusResponse] = {}
+        self._stop_events: dict[str, asyncio.Event] = {}
+        self._drop_slot: dict[str, bool] = {}
+        # The event loop keeps only weak references to tasks; these keep running jobs alive
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start_job(self, request: CdcRequest) -> str:
+        """Start a CDC job and return its ID."""
+        mappings = [FieldMapping(**m) if isinstance(m, dict) else m for m in request.mappings]
+        validation = mapping_service.validate_mappings(mappings)
+
+        if not validation["valid"]:
+            raise ValueError(f"Invalid mappings: {', '.join(validation['errors'])}")
+
+        active_mappings = [m for m in mappings if not m.skip]
+        slot_name = request.slot_name or self._default_slot_name(request)
+
+        job_id = await clickhouse_service.run(
+            history_service.create_migration_record,
+            source=migration_service.source_label(request.source_connection),
+            destination=request.destination_table,
+            source_table=request.source_table,
+            description=request.description or f"CDC via slot {slot_name}",
+            fields=[m.source_field for m in active_mappings],
+            mappings=[m.model_dump() for m in active_mappings],
+            created_by=request.created_by
+        )
+
+        self._jobs[job_id] = MigrationStatusResponse(
+            id=job_id,
+            status=MigrationStatus.RUNNING,
+            progress=MigrationProgress(
+                total_records=0,
+                processed_records=0,
+                percentage=0.0,
+                pagination="cdc"
+            ),
+            started_at=datetime.utcnow()
+        )
+        self._stop_events[job_id] = asyncio.Event()
+
+        task = asyncio.create_task(self._run_job(job_id, request, active_mappings, slot_name))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return job_id
+
+    def stop_job(self, job_id: str, drop_slot: bool = False) -> bool:
+        """Ask a running job to finish its current micro-batch and stop."""
+        event = self._stop_events.get(job_id)
+        if event is None:
+            return False
+        self._drop_slot[job_id] = drop_slot
+        event.set()
+        return True
+
+    def get_status(self, job_id: str) -> Optional[MigrationStatusResponse]:
+        """Get status of a CDC job."""
+        return self._jobs.get(job_id)
+
+    async def _run_job(
+        self,
+        job_id: str,
+        request: CdcRequest,
+        mappings: list[FieldMapping],
+        slot_name: str
+    ) -> None:
+        start_time = time.time()
+        status = self._jobs[job_id]
+        stop = self._stop_events[job_id]
+        changes_applied = 0
+        confirmed_lsn = None
+
+        try:
+            schema = await postgres_service.get_table_schema(
+                request.source_table,
+                request.source_schema,
+                request.source_connection
+            )
+
+            # Versions of a row collapse on ORDER BY, so it must be the row's full unique key
+            by_source = {m.source_field: m.destination_field for m in mappings}
+            unique_key = postgres_service.unique_key(schema)
+            if not unique_key:
+                raise ValueError(
+                    f"CDC needs a primary key or NOT NULL unique index on "
+                    f"{request.source_schema}.{request.source_table}"
+                )
+            unmapped = [k for k in unique_key if k not in by_source]
+            if unmapped:
+                raise ValueError(f"CDC must map every key column; missing {', '.join(unmapped)}")
+
+            columns = [m.destination_field for m in mappings] + [VERSION_COLUMN, DELETED_COLUMN]
+            convert_rows = compile_row_converter(mappings)
+
+            async with postgres_service.acquire(request.source_connection) as conn:
+                # Only FULL logs every old value, including unchanged TOASTed columns that
+                # wal2json leaves out of an update's new tuple
+                identity = await postgres_service.get_replica_identity(
+                    conn, request.source_table, request.source_schema
+                )
+                if identity != "full":
+                    raise ValueError(
+                        f"CDC requires REPLICA IDENTITY FULL on {request.source_schema}.{request.source_table} "
+                        f"(currently {identity}); run ALTER TABLE ... REPLICA IDENTITY FULL"
+                    )
+
+                if request.create_table:
+                    ddl = mapping_service.generate_ddl_from_mappings(
+                        request.destination_table,
+                        mappings,
+                        order_by=", ".join(by_source[k] for k in unique_key),
+                        version_column=VERSION_COLUMN,
+                        is_deleted_column=DELETED_COLUMN
+                    )
+                    await clickhouse_service.run(clickhouse_service.create_table, ddl)
+
+                await postgres_service.ensure_replication_slot(conn, slot_name)
+
+                while not stop.is_set():
+                    changes = await postgres_service.peek_slot_changes(
+                        conn,
+                        slot_name,
+                        request.source_table,
+                        request.source_schema,
+                        request.max_batch_changes
+                    )
+
+                    rows = self._changes_to_rows(changes, mappings, convert_rows, unique_key)
+                    if rows:
+                        # Decimals go out as quoted strings, which ClickHouse reads into Decimal exactly
+                        payload = "\n".join(json.dumps(row, default=str) for row in rows).encode()
+                        await clickhouse_service.run(
+                            clickhouse_service.insert_raw,
+                            request.destination_table,
+                            payload,
+                            columns,
+                            "JSONEachRow"
+                        )
+                        changes_applied += len(rows)
+
+                    # Only confirm after ClickHouse has the batch; replays are collapsed by _version
+                    commits = [c["lsn"] for c in changes if c["change"].get("action") == "C"]
+                    if commits:
+                        await postgres_service.advance_slot(conn, slot_name, commits[-1])
+
+                    lag = await postgres_service.get_slot_lag(conn, slot_name)
+                    if lag:
+                        confirmed_lsn = lag["confirmed_lsn"]
+                        status.progress.confirmed_lsn = confirmed_lsn
+                        status.progress.replication_lag_bytes = lag["lag_bytes"]
+                    status.progress.processed_records = changes_applied
+                    status.progress.current_batch = (status.progress.current_batch or 0) + (1 if rows else 0)
+
+                    # A full batch means there is probably more waiting
+                    if len(changes) < request.max_batch_changes:
+                        try:
+                            await asyncio.wait_for(stop.wait(), timeout=request.poll_interval_seconds)
+                        except asyncio.TimeoutError:
+                            pass
+
+                if self._drop_slot.get(job_id):
+                    await postgres_service.drop_replication_slot(conn, slot_name)
+
+            await clickhouse_service.run(
+                history_service.update_migration_status,
+                job_id,
+                MigrationStatus.COMPLETED,
+                changes_applied,
+                int(time.time() - start_time),
+                metadata={"cdc": True, "slot_name": slot_name, "confirmed_lsn": confirmed_lsn}
+            )
+            status.status = MigrationStatus.COMPLETED
+            status.completed_at = datetime.utcnow()
+
+        except Exception as e:
+            error_message = str(e)
+
+            await clickhouse_service.run(
+                history_service.update_migration_status,
+                job_id,
+                MigrationStatus.FAILED,
+                changes_applied,
+                int(time.time() - start_time),
+                error_message,
+                metadata={"cdc": True, "slot_name": slot_name, "confirmed_lsn": confirmed_lsn}
+            )
+
+            status.status = MigrationStatus.FAILED
+            status.error_message = error_message
+            status.completed_at = datetime.utcnow()
+
+        finally:
+            self._stop_events.pop(job_id, None)
+            self._drop_slot.pop(job_id, None)
+
+    def _changes_to_rows(
+        self,
+        changes: list[dict],
+        mappings: list[FieldMapping],
+        convert_rows: Callable[[list], list[tuple]],
+        key_columns: list[str]
+    ) -> list[dict]:
+        """Turn wal2json changes into JSONEachRow rows for the destination table.
+
+        Values go through the same compiled converter as bulk loads, so
+        booleans, arrays and defaults reach ClickHouse in the same shape.
+        """
+        rows = []
+
+        for item in changes:
+            change = item["change"]
+            action = change.get("action")
+
+            if action not in ("I", "U", "D"):
+                # Begin/commit markers; truncates are not replicated
+                continue
+
+            version = lsn_to_int(item["lsn"])
+            # REPLICA IDENTITY FULL: deletes and updates carry the whole old row
+            identity = {c["name"]: c.get("value") for c in change.get("identity", [])}
+
+            if action == "D":
+                rows.append(self._to_row(identity, mappings, convert_rows, item["lsn"], version, deleted=1))
+                continue
+
+            values = {c["name"]: c.get("value") for c in change.get("columns", [])}
+            if identity and any(values.get(k) != identity.get(k) for k in key_columns):
+                # The key changed, so the row under the old key is gone
+                rows.append(self._to_row(identity, mappings, convert_rows, item["lsn"], version, deleted=1))
+            # Unchanged TOASTed columns are missing from the new tuple; the old one has them
+            rows.append(self._to_row({**identity, **values}, mappings, convert_rows, item["lsn"], version, deleted=0))
+
+        return rows
+
+    @staticmethod
+    def _to_row(
+        values: dict,
+        mappings: list[FieldMapping],
+        convert_rows: Callable[[list], list[tuple]],
+        lsn: str,
+        version: int,
+        deleted: int
+    ) -> dict:
+        missing = [m.source_field for m in mappings if m.source_field not in values]
+        if missing:
+            # Defaulting them would overwrite real data in the destination
+            raise ValueError(f"Change at {lsn} carries no value for {', '.join(missing)}")
+
+        source = []
+        for m in mappings:
+            value = values[m.source_field]
+            if isinstance(value, str) and is_array_source(m.source_type):
+                value = parse_pg_array(value, CdcService._array_element_type(m))
+            source.append(value)
+
+        row = dict(zip((m.destination_field for m in mappings), convert_rows([source])[0]))
+        row[VERSION_COLUMN] = version
+        row[DELETED_COLUMN] = deleted
+        return row
+
+    @staticmethod
+    def _array_element_type(mapping: FieldMapping) -> str:
+        """Postgres element type of an array column; information_schema only says ARRAY."""
+        source_type = mapping.source_type.lower().strip()
+        if source_type.endswith("[]"):
+            return source_type[:-2]
+        dest_type = mapping.destination_type.lower()
+        if "decimal" in dest_type:
+            return "numeric"
+        if "float" in dest_type:
+            return "double precision"
+        if "uint8" in dest_type:
+            return "boolean"
+        if "int" in dest_type:
+            return "bigint"
+        return "text"
+
+    @staticmethod
+    def _default_slot_name(request: CdcRequest) -> str:
+        """Slot names allow only lower-case letters, digits and underscores (max 63)."""
+        raw = f"ch_cdc_{request.source_schema}_{request.source_table}".lower()
+        return re.sub(r"[^a-z0-9_]", "_", raw)[:63]
+
+
+# Singleton instance
+cdc_service = CdcService()
@@ -0,0 +1,157 @@
+import json
+from typing import Optional
+from models.migration import MigrationCheckpoint
+from services.clickhouse_service import clickhouse_service
+from services.migration_pipeline import Batch
+
+CHECKPOINT_TABLE = "migration_checkpoints"
+CHECKPOINT_COLUMNS = [
+    "migration_id",
+    "range_id",
+    "range_predicate",
+    "range_args",
+    "next_seq",
+    "last_key",
+    "rows_written",
+    "dedup_token",
+    "completed",
+    "plan_start_seq",
+    "planned_rows",
+]
+
+
+class CheckpointService:
+    """Per-range migration progress persisted in ClickHouse.
+
+    Every range (the whole table for sequential reads) has one row holding
+    its definition and how far it has been loaded; newer rows replace older
+    ones, so a checkpoint is a single small insert per batch.
+    """
+
+    def __init__(self):
+        self._clickhouse = clickhouse_service
+
+    def save(self, checkpoints: list[MigrationCheckpoint]) -> None:
+        """Persist the given range checkpoints."""
+        rows = [
+            (
+                c.migration_id,
+                c.range_id,
+                c.range_predicate,
+                c.range_args,
+                c.next_seq,
+                c.last_key,
+                c.rows_written,
+                c.dedup_token,
+                1 if c.completed else 0,
+                c.plan_start_seq,
+                c.planned_rows
+            )
+            for c in checkpoints
+        ]
+        self._clickhouse.insert_rows(CHECKPOINT_TABLE, rows, CHECKPOINT_COLUMNS)
+
+    def load(self, migration_id: str) -> dict[int, MigrationCheckpoint]:
+        """Get the latest checkpoint of every range of a migration."""
+        escaped = migration_id.replace("\\", "\\\\").replace("'", "\\'")
+        query = f"""
+        SELECT {", ".join(CHECKPOINT_COLUMNS)}
+        FROM {CHECKPOINT_TABLE} FINAL
+        WHERE migration_id = '{escaped}'
+        ORDER BY range_id
+        """
+        result = self._clickhouse.execute_query(query)
+
+        return {
+            row["range_id"]: MigrationCheckpoint(**{**row, "completed": bool(row["completed"])})
+            for row in result["data"]
+        }
+
+
+class CheckpointTracker:
+    """Advance each range's checkpoint only across batches loaded without gaps.
+
+    With several transform workers batches can finish out of order; a
+    checkpoint must never claim a batch whose predecessor is still in flight.
+
+    With record_plan, the size of every batch is also recorded before it can
+    be loaded, so a resumed run cuts the same batches (and dedup tokens) even
+    when the batch sizer has moved on. Ranges that continue from their last
+    key only keep sizes from next_seq on; ranges that restart from their
+    start (keep_plan_history) keep them all.
+    """
+
+    def __init__(
+        self,
+        checkpoints: dict[int, MigrationCheckpoint],
+        record_plan: bool = False,
+        keep_plan_history: bool = False
+    ):
+        self.checkpoints = checkpoints
+        self._record_plan = record_plan
+        self._keep_plan_history = keep_plan_history
+        self._pending: dict[int, dict[int, Batch]] = {}
+        self._plans: dict[int, list[int]] = {}
+
+    def _plan(self, range_id: int) -> list[int]:
+        if range_id not in self._plans:
+            self._plans[range_id] = json.loads(self.checkpoints[range_id].planned_rows)
+        return self._plans[range_id]
+
+    def planned_rows(self, range_id: int, seq: int) -> Optional[int]:
+        """Size a batch was cut to before a resume, if it was recorded."""
+        checkpoint = self.checkpoints[range_id]
+        plan = self._plan(range_id)
+        index = seq - checkpoint.plan_start_seq
+        return plan[index] if 0 <= index < len(plan) else None
+
+    def emitted(self, batch: Batch) -> Optional[MigrationCheckpoint]:
+        """Record an extracted batch's size; return the checkpoint if it must be saved before loading."""
+        if not self._record_plan or batch.end_of_range:
+            return None
+        checkpoint = self.checkpoints[batch.range_id]
+        plan = self._plan(batch.range_id)
+        index = batch.seq - checkpoint.plan_start_seq
+        if index < 0 or (index < len(plan) and plan[index] == batch.rows):
+            return None
+
+        # A range that ended early (or was cut anew) invalidates every later size
+        del plan[index:]
+        plan.append(batch.rows)
+        checkpoint.planned_rows = json.dumps(plan)
+        return checkpoint
+
+    def loaded(self, batch: Batch) -> Optional[MigrationCheckpoint]:
+        """Record a loaded batch; return the range checkpoint if it moved forward."""
+        checkpoint = self.checkpoints[batch.range_id]
+        pending = self._pending.setdefault(batch.range_id, {})
+        pending[batch.seq] = batch
+        advanced = False
+
+        while checkpoint.next_seq in pending:
+            done = pending.pop(checkpoint.next_seq)
+            checkpoint.next_seq += 1
+            checkpoint.rows_written += done.rows
+            if done.end_of_range:
+                checkpoint.completed = True
+            else:
+                checkpoint.last_key = done.last_key
+                checkpoint.dedup_token = done.token or ""
+            advanced = True
+
+        if advanced and self._record_plan and not self._keep_plan_history:
+            # Loaded batches are never read again; only in-flight sizes matter
+            plan = self._plan(batch.range_id)
+            del plan[:checkpoint.next_seq - checkpoint.plan_start_seq]
+            checkpoint.plan_start_seq = checkpoint.next_seq
+            checkpoint.planned_rows = json.dumps(plan)
+
+        return checkpoint if advanced else None
+
+    @property
+    def rows_written(self) -> int:
+        return sum(c.rows_written for c in self.checkpoints.values())
+
+
+# Singleton instance
+checkpoint_service = CheckpointService()
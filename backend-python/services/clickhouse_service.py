@@ -1,25 +1,107 @@
 import clickhouse_connect
-from typing import Optional, Any
+from clickhouse_connect.driver.compression import get_compressor
+from clickhouse_connect.driver.exceptions import OperationalError
+from typing import Optional, Any, Callable
+import re
 import time
 import json
 from config.database import settings
+from models.migration import InsertMode, InsertCompression
+from services.metrics_service import metrics_service
+from utils.client_pool import ClientThreadPool
+
+try:
+    from clickhouse_driver import Client as NativeClient
+except ImportError:
+    NativeClient = None
+
+# Server error codes for conditions that clear up on their own: timeouts, network
+# faults, overload (too many parts/queries, memory), read-only replicas, Keeper,
+# and an insert whose outcome is unknown
+TRANSIENT_ERROR_CODES = {159, 202, 209, 210, 241, 242, 252, 279, 319, 999}
 
 
 class ClickHouseService:
     def __init__(self):
-        self._client = None
+        # One client per worker thread; clickhouse-connect clients are not thread-safe
+        self._pool = ClientThreadPool(
+            "clickhouse",
+            settings.clickhouse_max_workers,
+            self._create_client
+        )
 
-    def _get_client(self):
-        """Get or create ClickHouse client."""
-        if self._client is None:
-            self._client = clickhouse_connect.get_client(
+    @staticmethod
+    def _create_client(key: Optional[tuple[bool, InsertCompression]] = None):
+        if key is None:
+            return clickhouse_connect.get_client(
                 host=settings.clickhouse_host,
                 port=settings.clickhouse_port,
                 username=settings.clickhouse_user,
                 password=settings.clickhouse_password,
                 database=settings.clickhouse_database
             )
-        return self._client
+
+        native, compression = key
+        codec = False if compression == InsertCompression.NONE else compression.value
+        if native:
+            return NativeClient(
+                host=settings.clickhouse_host,
+                port=settings.clickhouse_native_port,
+                user=settings.clickhouse_user,
+                password=settings.clickhouse_password,
+                database=settings.clickhouse_database,
+                compression=codec
+            )
+
+        return clickhouse_connect.get_client(
+            host=settings.clickhouse_host,
+            port=settings.clickhouse_port,
+            username=settings.clickhouse_user,
+            password=settings.clickhouse_password,
+            database=settings.clickhouse_database,
+            compress=codec
+        )
+
+    def _get_client(self):
+        """Get or create the calling thread's ClickHouse client."""
+        return self._pool.client()
+
+    def _get_insert_client(self, compression: Optional[InsertCompression] = None, native: bool = False):
+        """Get the calling thread's client for inserts with the given transport compression."""
+        return self._pool.client((native, self.resolve_compression(compression)))
+
+    @staticmethod
+    def resolve_insert_mode(mode: Optional[InsertMode] = None) -> InsertMode:
+        """A per-migration insert mode, or the configured default."""
+        mode = mode or InsertMode(settings.clickhouse_insert_mode)
+        if mode == InsertMode.NATIVE and NativeClient is None:
+            raise ValueError(
+                "insert_mode 'native' requires clickhouse-driver (pip install -r requirements-native.txt)"
+            )
+        return mode
+
+    @staticmethod
+    def resolve_compression(compression: Optional[InsertCompression] = None) -> InsertCompression:
+        """A per-migration insert compression, or the configured default."""
+        return compression or InsertCompression(settings.clickhouse_insert_compression)
+
+    @property
+    def executor(self):
+        """Worker threads that blocking ClickHouse calls should run on."""
+        return self._pool.executor
+
+    @staticmethod
+    def _track(operation: str):
+        """Time a ClickHouse call for /metrics, counting it as an error if it raises."""
+        return metrics_service.track(
+            metrics_service.clickhouse_seconds,
+            metrics_service.clickhouse_errors,
+            operation
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking ClickHouse call (this service's or one built on it) off the event loop."""
+        return await self._pool.run(func, *args, **kwargs)
 
     def execute_query(self, query: str, format: str = "JSON") -> dict:
         """Execute query and return results."""
@@ -29,7 +111,8 @@ class ClickHouseService:
         query_upper = query.strip().upper()
 
         if query_upper.startswith("SELECT") or query_upper.startswith("SHOW") or query_upper.startswith("DESCRIBE"):
-            result = client.query(query)
+            with self._track("query"):
+                result = client.query(query)
             execution_time = (time.time() - start_time) * 1000
 
             # Convert to list of dicts
@@ -44,7 +127,8 @@ class ClickHouseService:
                 "metadata": {"columns": columns}
             }
         else:
-            client.command(query)
+            with self._track("command"):
+                client.command(query)
             execution_time = (time.time() - start_time) * 1000
 
             return {
@@ -58,24 +142,228 @@ class ClickHouseService:
     def create_table(self, ddl: str) -> None:
         """Create table using DDL."""
         client = self._get_client()
-        client.command(ddl)
+        with self._track("command"):
+            client.command(ddl)
 
-    def insert_data(self, table_name: str, data: list[dict], columns: list[str]) -> int:
+    def insert_data(
+        self,
+        table_name: str,
+        data: list[dict],
+        columns: list[str],
+        mode: Optional[InsertMode] = None,
+        compression: Optional[InsertCompression] = None
+    ) -> int:
         """Insert data into table."""
         if not data:
             return 0
 
-        client = self._get_client()
+        if self.resolve_insert_mode(mode) == InsertMode.ROW:
+            # Convert list of dicts to list of tuples
+            rows = [tuple(record.get(col) for col in columns) for record in data]
+            return self.insert_rows(table_name, rows, columns, compression=compression)
+
+        column_data = [[record.get(col) for record in data] for col in columns]
+        return self.insert_columns(table_name, column_data, columns, mode=mode, compression=compression)
 
-        # Convert list of dicts to list of tuples
-        rows = []
-        for record in data:
-            row = tuple(record.get(col) for col in columns)
-            rows.append(row)
+    def insert_rows(
+        self,
+        table_name: str,
+        rows: list[tuple],
+        columns: list[str],
+        settings: Optional[dict] = None,
+        compression: Optional[InsertCompression] = None
+    ) -> int:
+        """Insert positional rows already ordered like columns."""
+        if not rows:
+            return 0
 
-        client.insert(table_name, rows, column_names=columns)
+        client = self._get_insert_client(compression)
+        with self._track("insert"):
+            client.insert(table_name, rows, column_names=columns, settings=settings)
+        metrics_service.clickhouse_inserted_rows.inc(len(rows))
         return len(rows)
 
+    def insert_columns(
+        self,
+        table_name: str,
+        data: list[list],
+        columns: list[str],
+        settings: Optional[dict] = None,
+        mode: Optional[InsertMode] = None,
+        compression: Optional[InsertCompression] = None
+    ) -> int:
+        """Insert one value list per column, over HTTP or the native protocol.
+
+        Both protocols send Native-format blocks column by column, so column
+        lists are handed over without the per-row transposition row tuples need.
+        """
+        if not data or not data[0]:
+            return 0
+
+        with self._track("insert"):
+            if self.resolve_insert_mode(mode) == InsertMode.NATIVE:
+                client = self._get_insert_client(compression, native=True)
+                client.execute(
+                    f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES",
+                    data,
+                    columnar=True,
+                    settings=settings
+                )
+            else:
+                client = self._get_insert_client(compression)
+                client.insert(table_name, data, column_names=columns, column_oriented=True, settings=settings)
+        metrics_service.clickhouse_inserted_rows.inc(len(data[0]))
+        return len(data[0])
+
+    def insert_arrow(
+        self,
+        table_name: str,
+        arrow_table,
+        settings: Optional[dict] = None,
+        compression: Optional[InsertCompression] = None
+    ) -> int:
+        """Insert a pyarrow Table whose column names match the destination."""
+        if arrow_table.num_rows == 0:
+            return 0
+
+        client = self._get_insert_client(compression)
+        with self._track("insert"):
+            client.insert_arrow(table_name, arrow_table, settings=settings)
+        metrics_service.clickhouse_inserted_rows.inc(arrow_table.num_rows)
+        return arrow_table.num_rows
+
+    def insert_raw(
+        self,
+        table_name: str,
+        data: bytes,
+        columns: list[str],
+        fmt: str = "TabSeparated",
+        settings: Optional[dict] = None,
+        compression: Optional[InsertCompression] = None
+    ) -> None:
+        """Insert a pre-encoded block (e.g. Postgres COPY text output), compressed for transport."""
+        if not data:
+            return
+
+        # raw_insert sends the body untouched, so it is compressed here and labelled
+        # with Content-Encoding for ClickHouse to decompress
+        codec = self.resolve_compression(compression)
+        if codec != InsertCompression.NONE:
+            data = get_compressor(codec.value).compress_block(data)
+
+        client = self._get_client()
+        with self._track("insert"):
+            client.raw_insert(
+                table_name,
+                column_names=columns,
+                insert_block=data,
+                fmt=fmt,
+                compression=None if codec == InsertCompression.NONE else codec.value,
+                # Postgres renders timestamptz with an offset, which needs best-effort parsing
+                settings={"date_time_input_format": "best_effort", **(settings or {})}
+            )
+
+    def insert_from_s3(
+        self,
+        table_name: str,
+        columns: list[str],
+        url: str,
+        access_key: str,
+        secret_key: str,
+        fmt: str = "Parquet",
+        settings: Optional[dict] = None
+    ) -> None:
+        """INSERT ... SELECT from the s3() table function; the server reads the objects itself."""
+        def quote(s: str) -> str:
+            return "'" + s.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+        column_list = ", ".join(columns)
+        client = self._get_client()
+        with self._track("insert"):
+            client.command(
+                f"INSERT INTO {table_name} ({column_list}) "
+                f"SELECT {column_list} FROM s3({quote(url)}, {quote(access_key)}, {quote(secret_key)}, {quote(fmt)})",
+                settings=settings
+            )
+
+    @staticmethod
+    def is_transient_error(error: BaseException) -> bool:
+        """Whether a failed call is worth retrying rather than a bad request."""
+        if isinstance(error, (OperationalError, ConnectionError, TimeoutError, EOFError)):
+            return True
+        code = getattr(error, "code", None)
+        if code is None:
+            # Older clickhouse-connect versions only carry the code in the message
+            match = re.search(r"\bCode:\s*(\d+)", str(error))
+            code = int(match.group(1)) if match else None
+        return code in TRANSIENT_ERROR_CODES
+
+    def get_table_engine(self, table_name: str) -> Optional[tuple[str, str]]:
+        """The table's engine name and CREATE statement, or None if it does not exist."""
+        client = self._get_client()
+        result = client.query(
+            "SELECT engine, create_table_query FROM system.tables "
+            "WHERE database = currentDatabase() AND name = {table:String}",
+            parameters={"table": table_name}
+        )
+        return tuple(result.result_rows[0]) if result.result_rows else None
+
+    def deduplicates_inserts(self, table_name: str) -> bool:
+        """Whether the table drops repeated insert blocks (replicated, or a non-replicated dedup window)."""
+        definition = self.get_table_engine(table_name)
+        if definition is None:
+            return False
+        engine, create_query = definition
+        if engine.startswith("Replicated"):
+            return True
+        return re.search(r"non_replicated_deduplication_window\s*=\s*[1-9]", create_query) is not None
+
+    def clone_table(self, source_table: str, table_name: str) -> None:
+        """Create an empty table with another table's columns, engine and settings."""
+        client = self._get_client()
+        with self._track("command"):
+            client.command(f"CREATE TABLE IF NOT EXISTS {table_name} AS {source_table}")
+
+    def set_merges(self, table_name: str, enabled: bool) -> None:
+        """Start or stop background merges of one table (until the server restarts)."""
+        client = self._get_client()
+        with self._track("command"):
+            client.command(f"SYSTEM {'START' if enabled else 'STOP'} MERGES {table_name}")
+
+    def modify_settings(self, table_name: str, table_settings: dict) -> None:
+        """Change MergeTree settings of an existing table."""
+        assignments = ", ".join(f"{k} = {v}" for k, v in table_settings.items())
+        client = self._get_client()
+        with self._track("command"):
+            client.command(f"ALTER TABLE {table_name} MODIFY SETTING {assignments}")
+
+    def reset_settings(self, table_name: str, names: list[str]) -> None:
+        """Return MergeTree settings of a table to their defaults."""
+        client = self._get_client()
+        with self._track("command"):
+            client.command(f"ALTER TABLE {table_name} RESET SETTING {', '.join(names)}")
+
+    def count_rows(self, table_name: str) -> int:
+        """Exact row count of a table."""
+        client = self._get_client()
+        with self._track("query"):
+            return int(client.command(f"SELECT count() FROM {table_name}"))
+
+    def swap_tables(self, staging_table: str, table_name: str) -> bool:
+        """Put a staging table in place of table_name atomically and drop what it replaced.
+
+        Returns whether an existing table was replaced; a missing target is
+        simply renamed into place. EXCHANGE needs an Atomic database.
+        """
+        client = self._get_client()
+        with self._track("command"):
+            if not self.table_exists(table_name):
+                client.command(f"RENAME TABLE {staging_table} TO {table_name}")
+                return False
+            client.command(f"EXCHANGE TABLES {staging_table} AND {table_name}")
+            client.command(f"DROP TABLE {staging_table}")
+        return True
+
     def table_exists(self, table_name: str) -> bool:
         """Check if table exists."""
         client = self._get_client()
@@ -101,7 +389,7 @@ class ClickHouseService:
             deskripsi String,
             tabel_fields Array(String),
             field_mappings String,
-            status Enum8('pending' = 1, 'running' = 2, 'completed' = 3, 'failed' = 4),
+            status Enum8('pending' = 1, 'running' = 2, 'completed' = 3, 'failed' = 4, 'queued' = 5),
             records_migrated UInt64,
             error_message Nullable(String),
             duration_seconds UInt32,
@@ -113,6 +401,41 @@ class ClickHouseService:
         """
         self.create_table(ddl)
 
+        # Tables created before the scheduler lack 'queued'; appending an Enum value is metadata-only
+        self.execute_query("""
+        ALTER TABLE migration_history MODIFY COLUMN status
+            Enum8('pending' = 1, 'running' = 2, 'completed' = 3, 'failed' = 4, 'queued' = 5)
+        """)
+
+    def initialize_migration_checkpoints_table(self) -> None:
+        """Create migration_checkpoints table if not exists."""
+        ddl = """
+        CREATE TABLE IF NOT EXISTS migration_checkpoints (
+            migration_id String,
+            range_id UInt32,
+            range_predicate String,
+            range_args String,
+            next_seq UInt64,
+            last_key Nullable(String),
+            rows_written UInt64,
+            dedup_token String,
+            completed UInt8,
+            plan_start_seq UInt64 DEFAULT 0,
+            planned_rows String DEFAULT '[]',
+            updated_at DateTime64(3) DEFAULT now64(3)
+        ) ENGINE = ReplacingMergeTree(updated_at)
+        ORDER BY (migration_id, range_id)
+        TTL toDateTime(updated_at) + INTERVAL 30 DAY
+        """
+        self.create_table(ddl)
+
+        # Tables created before batch plans were recorded lack the plan columns
+        self.execute_query("""
+        ALTER TABLE migration_checkpoints
+            ADD COLUMN IF NOT EXISTS plan_start_seq UInt64 DEFAULT 0 AFTER completed,
+            ADD COLUMN IF NOT EXISTS planned_rows String DEFAULT '[]' AFTER plan_start_seq
+        """)
+
     def ping(self) -> bool:
         """Test ClickHouse connection."""
         try:
@@ -123,10 +446,8 @@ class ClickHouseService:
             return False
 
     def close(self) -> None:
-        """Close client connection."""
-        if self._client:
-            self._client.close()
-            self._client = None
+        """Close client connections."""
+        self._pool.close()
 
 
 # Singleton instance
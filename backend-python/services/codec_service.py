@@ -0,0 +1,161 @@
+import re
+import uuid
+from typing import Optional
+from models.schema import FieldMapping, TableSchema, DatabaseConnection
+from services.postgres_service import postgres_service
+from services.clickhouse_service import clickhouse_service
+from utils.transform_plan import compile_column_converter
+
+# Baseline every candidate is measured against; it is also the server default
+BASELINE_CODEC = "LZ4"
+# Candidates tried for every column
+GENERAL_CODECS = ["ZSTD(1)", "ZSTD(3)", "ZSTD(9)"]
+# Extra candidates by the kind of values a column holds
+INTEGER_CODECS = ["Delta, ZSTD(1)", "DoubleDelta, ZSTD(1)", "T64, ZSTD(1)"]
+TIME_CODECS = ["Delta, ZSTD(1)", "DoubleDelta", "DoubleDelta, ZSTD(1)"]
+FLOAT_CODECS = ["Gorilla", "Gorilla, ZSTD(1)"]
+# A codec must save at least this share of the baseline's compressed size to be worth setting
+MIN_CODEC_GAIN = 0.1
+# ...and may read at most this many times slower than the baseline
+MAX_READ_SLOWDOWN = 2.0
+# Timed scans per candidate; the fastest counts, shaving off scheduling noise
+READ_REPEATS = 3
+
+
+class CodecService:
+    @staticmethod
+    def candidate_codecs(destination_type: str) -> list[str]:
+        """Codecs worth trying for a ClickHouse type, baseline first."""
+        base = destination_type.strip()
+        while True:
+            wrapper = re.fullmatch(r"(?:Nullable|LowCardinality)\((.*)\)", base)
+            if not wrapper:
+                break
+            base = wrapper.group(1).strip()
+
+        candidates = [BASELINE_CODEC, *GENERAL_CODECS]
+        if destination_type.startswith("LowCardinality"):
+            # Dictionary indexes are small already; delta codecs do not apply to them
+            return candidates
+        if re.fullmatch(r"U?Int(8|16|32|64)", base):
+            candidates += INTEGER_CODECS
+        elif re.match(r"Date(Time)?(32|64)?(\(|$)", base):
+            candidates += TIME_CODECS
+        elif base in ("Float32", "Float64"):
+            candidates += FLOAT_CODECS
+        return candidates
+
+    async def advise(
+        self,
+        source_schema: TableSchema,
+        mappings: list[FieldMapping],
+        order_by: Optional[str] = None,
+        sample_rows: int = 100_000,
+        connection: Optional[DatabaseConnection] = None
+    ) -> dict:
+        """Pick a compression codec per column by loading a source sample into a scratch table.
+
+        About sample_rows source rows, sampled by page across the whole
+        table, are converted like a migration batch and inserted once; every
+        candidate codec gets its own copy of the column (a DEFAULT of the
+        baseline column), sorted by order_by like the real table so
+        Delta-style codecs see realistic neighbours. After merging to a single part the compressed sizes come
+        from system.columns and each copy is scanned to time decompression.
+        A codec wins when it beats the baseline by MIN_CODEC_GAIN without
+        reading more than MAX_READ_SLOWDOWN times slower; otherwise the
+        column keeps the default (codec None).
+        """
+        active = [m for m in mappings if not m.skip]
+        if not active:
+            raise ValueError("No active mappings to advise codecs for")
+
+        rows = await postgres_service.sample_rows(
+            source_schema.table,
+            source_schema.schema_name,
+            columns=[m.source_field for m in active],
+            rows=sample_rows,
+            connection=connection,
+            as_dicts=False
+        )
+        if not rows:
+            return {"sampled_rows": 0, "columns": {}}
+
+        scratch = f"_codec_probe_{uuid.uuid4().hex[:12]}"
+        columns, probes = [], {}
+        for mapping in active:
+            field = mapping.destination_field
+            probes[field] = []
+            for i, codec in enumerate(self.candidate_codecs(mapping.destination_type)):
+                name = field if i == 0 else f"{field}__codec{i}"
+                default = "" if i == 0 else f" DEFAULT {field}"
+                columns.append(f"    {name} {mapping.destination_type}{default} CODEC({codec})")
+                probes[field].append((codec, name))
+
+        columns_str = ",\n".join(columns)
+        ddl = f"""CREATE TABLE {scratch} (
+{columns_str}
+) ENGINE = MergeTree()
+ORDER BY ({order_by or active[0].destination_field})
+SETTINGS allow_nullable_key = 1"""
+
+        try:
+            await clickhouse_service.run(clickhouse_service.create_table, ddl)
+            await clickhouse_service.run(
+                clickhouse_service.insert_columns,
+                scratch,
+                compile_column_converter(active)(rows),
+                [m.destination_field for m in active]
+            )
+            # Sizes are per part; one merged part compresses like a settled table
+            await clickhouse_service.run(clickhouse_service.execute_query, f"OPTIMIZE TABLE {scratch} FINAL")
+            sizes = await clickhouse_service.run(
+                clickhouse_service.execute_query,
+                "SELECT name, data_compressed_bytes AS compressed, data_uncompressed_bytes AS uncompressed "
+                f"FROM system.columns WHERE database = currentDatabase() AND table = '{scratch}'"
+            )
+            by_name = {row["name"]: row for row in sizes["data"]}
+
+            advice = {}
+            for field, candidates in probes.items():
+                measured = []
+                for codec, name in candidates:
+                    read_ms = None
+                    for _ in range(READ_REPEATS):
+                        result = await clickhouse_service.run(
+                            clickhouse_service.execute_query,
+                            f"SELECT count() FROM {scratch} WHERE NOT ignore({name}) "
+                            "SETTINGS use_uncompressed_cache = 0"
+                        )
+                        elapsed = result["execution_time_ms"]
+                        read_ms = elapsed if read_ms is None else min(read_ms, elapsed)
+                    size = by_name[name]
+                    measured.append({
+                        "codec": codec,
+                        "compressed_bytes": size["compressed"],
+                        "uncompressed_bytes": size["uncompressed"],
+                        "ratio": round(size["uncompressed"] / size["compressed"], 2) if size["compressed"] else None,
+                        "read_ms": read_ms
+                    })
+                advice[field] = self._choose(measured)
+        finally:
+            await clickhouse_service.run(clickhouse_service.execute_query, f"DROP TABLE IF EXISTS {scratch}")
+
+        return {"sampled_rows": len(rows), "columns": advice}
+
+    @staticmethod
+    def _choose(measured: list[dict]) -> dict:
+        """The smallest candidate within the read budget, if it beats the baseline by enough."""
+        baseline = measured[0]
+        # Sub-millisecond scans are all noise; never hold a codec to less than 1ms
+        read_budget = max(baseline["read_ms"], 1.0) * MAX_READ_SLOWDOWN
+        eligible = [m for m in measured[1:] if m["read_ms"] <= read_budget]
+        best = min(eligible, key=lambda m: m["compressed_bytes"], default=None)
+
+        chosen = None
+        if best and best["compressed_bytes"] <= baseline["compressed_bytes"] * (1 - MIN_CODEC_GAIN):
+            chosen = best["codec"]
+        return {"codec": chosen, "candidates": measured}
+
+
+# Singleton instance
+codec_service = CodecService()
@@ -3,6 +3,7 @@ import pandas as pd
 import time
 import tempfile
 import os
+from services.metrics_service import metrics_service
 
 
 class DaskService:
@@ -57,6 +58,7 @@ class DaskService:
                 "error": str(e)
             }
 
+    @metrics_service.s3_query("dask")
     def query_s3_file(
         self,
         bucket: str,
@@ -141,6 +143,7 @@ class DaskService:
                 except Exception as e:
                     print(f"[Dask] Failed to cleanup: {e}")
 
+    @metrics_service.s3_query("dask")
     def get_schema(self, bucket: str, path: str) -> dict:
         """Get schema of S3 file using Dask."""
         from services.minio_service import minio_service
@@ -1,6 +1,7 @@
 import duckdb
 import time
 from config.database import settings
+from services.metrics_service import metrics_service
 
 
 class DuckDBService:
@@ -57,6 +58,7 @@ class DuckDBService:
                 "error": str(e)
             }
 
+    @metrics_service.s3_query("duckdb")
     def query_s3_file(
         self,
         bucket: str,
@@ -115,6 +117,7 @@ class DuckDBService:
                 except:
                     pass
 
+    @metrics_service.s3_query("duckdb")
     def get_schema(self, bucket: str, path: str) -> dict:
         """Get schema of S3 file."""
         s3_path = f"s3://{bucket}/{path}"
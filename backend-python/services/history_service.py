@@ -18,7 +18,9 @@ class HistoryService:
         description: str,
         fields: list[str],
         mappings: list[dict],
-        created_by: str
+        created_by: str,
+        metadata: Optional[dict] = None,
+        status: MigrationStatus = MigrationStatus.RUNNING
     ) -> str:
         """Create a new migration history record."""
         migration_id = str(uuid.uuid4())
@@ -29,6 +31,7 @@ class HistoryService:
 
         fields_str = ", ".join([f"'{escape(f)}'" for f in fields])
         mappings_json = json.dumps(mappings).replace("\\", "\\\\").replace("'", "\\'")
+        metadata_json = json.dumps(metadata or {}, default=str).replace("\\", "\\\\").replace("'", "\\'")
 
         query = f"""
         INSERT INTO migration_history (
@@ -43,11 +46,11 @@ class HistoryService:
             '{escape(description)}',
             [{fields_str}],
             '{mappings_json}',
-            'running',
+            '{status.value}',
             0,
             0,
             '{escape(created_by)}',
-            '{{}}'
+            '{metadata_json}'
         )
         """
 
@@ -60,10 +63,15 @@ class HistoryService:
         status: MigrationStatus,
         records_migrated: int,
         duration_seconds: int,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        metadata: Optional[dict] = None
     ) -> None:
         """Update migration record status."""
         error_part = f", error_message = '{error_message}'" if error_message else ""
+        metadata_part = ""
+        if metadata is not None:
+            metadata_json = json.dumps(metadata, default=str).replace("\\", "\\\\").replace("'", "\\'")
+            metadata_part = f", metadata = '{metadata_json}'"
 
         query = f"""
         ALTER TABLE migration_history
@@ -72,6 +80,19 @@ class HistoryService:
             records_migrated = {records_migrated},
             duration_seconds = {duration_seconds}
             {error_part}
+            {metadata_part}
+        WHERE id = '{migration_id}'
+        """
+
+        self._clickhouse.execute_query(query)
+
+    def update_metadata(self, migration_id: str, metadata: dict) -> None:
+        """Replace a migration record's metadata without touching its status."""
+        metadata_json = json.dumps(metadata, default=str).replace("\\", "\\\\").replace("'", "\\'")
+
+        query = f"""
+        ALTER TABLE migration_history
+        UPDATE metadata = '{metadata_json}'
         WHERE id = '{migration_id}'
         """
 
@@ -106,6 +127,34 @@ class HistoryService:
             "migrations": result["data"]
         }
 
+    def get_last_watermark(
+        self,
+        source: str,
+        source_table: str,
+        destination: str,
+        watermark_column: str
+    ) -> Optional[dict]:
+        """Get the metadata of the latest completed incremental run for a table pair."""
+        def escape(s: str) -> str:
+            return s.replace("\\", "\\\\").replace("'", "\\'")
+
+        query = f"""
+        SELECT metadata FROM migration_history
+        WHERE status = 'completed'
+            AND source = '{escape(source)}'
+            AND source_table = '{escape(source_table)}'
+            AND destination = '{escape(destination)}'
+            AND JSONExtractString(metadata, 'watermark_column') = '{escape(watermark_column)}'
+            AND JSONHas(metadata, 'watermark')
+        ORDER BY migration_time DESC
+        LIMIT 1
+        """
+        result = self._clickhouse.execute_query(query)
+
+        if result["data"]:
+            return json.loads(result["data"][0]["metadata"])
+        return None
+
     def get_migration_by_id(self, migration_id: str) -> Optional[dict]:
         """Get specific migration by ID."""
         query = f"SELECT * FROM migration_history WHERE id = '{migration_id}'"
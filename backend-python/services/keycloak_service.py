@@ -1,7 +1,9 @@
 import os
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Callable
 from datetime import datetime, timedelta
+from services.metrics_service import metrics_service
+from utils.client_pool import ClientThreadPool
 
 class KeycloakService:
     def __init__(self):
@@ -13,6 +15,51 @@ class KeycloakService:
         self.userinfo_url = f"{self.keycloak_url}/realms/{self.realm}/protocol/openid-connect/userinfo"
         self.logout_url = f"{self.keycloak_url}/realms/{self.realm}/protocol/openid-connect/logout"
         print("Keycloak config:", self.keycloak_url, self.realm, self.client_id, self.client_secret)
+        # Blocking HTTP calls run here, each worker reusing its own keep-alive session
+        self._pool = ClientThreadPool(
+            "keycloak",
+            int(os.getenv("KEYCLOAK_MAX_WORKERS", "4")),
+            requests.Session
+        )
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a blocking Keycloak call on the worker pool
+        
+        Args:
+            func: One of this service's methods
+            *args: Arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        return await self._pool.run(func, *args)
+
+    def close(self) -> None:
+        """Close worker threads and their HTTP sessions"""
+        self._pool.close()
+
+    def _request(self, operation: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send one HTTP request on this thread's session, recording it for /metrics
+        
+        Args:
+            operation: Name the call is reported under
+            method: HTTP method
+            url: Keycloak endpoint
+            **kwargs: Passed to requests
+            
+        Returns:
+            The response
+        """
+        status = "error"
+        try:
+            with metrics_service.keycloak_seconds.labels(operation).time():
+                response = self._pool.client().request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            metrics_service.keycloak_requests.labels(operation, status).inc()
 
     def authenticate(self, username: str, password: str) -> Dict[str, Any]:
         """
@@ -41,7 +88,9 @@ class KeycloakService:
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
             
-            response = requests.post(
+            response = self._request(
+                "authenticate",
+                "POST",
                 self.token_url,
                 data=data,
                 headers=headers,
@@ -106,7 +155,9 @@ class KeycloakService:
                 'Authorization': f'Bearer {access_token}'
             }
             
-            response = requests.get(
+            response = self._request(
+                "userinfo",
+                "GET",
                 self.userinfo_url,
                 headers=headers,
                 timeout=10
@@ -143,7 +194,9 @@ class KeycloakService:
                 'Content-Type': 'application/x-www-form-urlencoded'
             }
             
-            response = requests.post(
+            response = self._request(
+                "refresh_token",
+                "POST",
                 self.token_url,
                 data=data,
                 headers=headers,
@@ -184,7 +237,9 @@ class KeycloakService:
                 'refresh_token': refresh_token,
             }
             
-            response = requests.post(
+            response = self._request(
+                "logout",
+                "POST",
                 self.logout_url,
                 data=data,
                 timeout=10
@@ -1,15 +1,46 @@
 import re
+from datetime import datetime
+from typing import Optional
 from models.schema import TableSchema, FieldMapping
-from utils.type_mapper import map_postgres_to_clickhouse, validate_type_mapping
+from utils.type_mapper import map_postgres_to_clickhouse, narrow_type, validate_type_mapping
+
+# Columns with at most this many distinct values may lead the sorting key
+LOW_CARDINALITY_MAX = 10_000
+# Low-cardinality columns placed ahead of the key in ORDER BY
+MAX_SORT_PREFIX = 3
+# Partitions should stay few and large: at most this many, each with at least this many rows
+MAX_PARTITIONS = 1000
+MIN_PARTITION_ROWS = 1_000_000
+# (function, days per partition, name), finest first
+PARTITION_GRANULARITIES = [("toYYYYMMDD", 1, "day"), ("toYYYYMM", 30, "month"), ("toYear", 365, "year")]
+# Uncompressed bytes a granule should stay under, bounding what a key lookup reads
+TARGET_GRANULE_BYTES = 4 * 1024 * 1024
+DEFAULT_INDEX_GRANULARITY = 8192
+MIN_INDEX_GRANULARITY = 2048
+# Source types that make poor sorting-key prefixes whatever their cardinality
+UNSORTABLE_SOURCE_TYPES = ("json", "jsonb", "bytea", "real", "double precision", "float4", "float8")
 
 
 class MappingService:
     def generate_mappings(
         self,
         source_schema: TableSchema,
-        destination_table: str
+        destination_table: str,
+        column_stats: Optional[dict] = None,
+        column_profile: Optional[dict] = None,
+        codec_advice: Optional[dict] = None
     ) -> dict:
-        """Generate field mappings from source schema."""
+        """Generate field mappings from source schema.
+
+        With column_profile (from PostgresService.profile_columns) mapped
+        types are narrowed to the observed values, each change listed in
+        type_suggestions. With column_stats (from get_column_stats) the
+        suggested DDL uses design_table's ORDER BY, PARTITION BY and index
+        granularity, returned with their rationale as table_design. With
+        codec_advice (from CodecService.advise) each mapping takes its
+        measured winning codec, and the measurements are returned as
+        codec_advice.
+        """
         mappings = []
         warnings = []
 
@@ -37,14 +68,217 @@ class MappingService:
 
             mappings.append(mapping)
 
+        type_suggestions = []
+        if column_profile is not None:
+            for mapping in mappings:
+                profile = column_profile["columns"].get(mapping.source_field)
+                if profile is None:
+                    continue
+                narrowed, reasons = narrow_type(
+                    mapping.source_type,
+                    mapping.destination_type,
+                    profile,
+                    column_profile["exact"]
+                )
+                if reasons:
+                    type_suggestions.append({
+                        "field": mapping.source_field,
+                        "declared_type": mapping.destination_type,
+                        "suggested_type": narrowed,
+                        "reasons": reasons
+                    })
+                    mapping.destination_type = narrowed
+            if any(s["declared_type"] != s["suggested_type"] for s in type_suggestions):
+                warnings.append(
+                    "Narrowed types fit the profiled rows; rows added later (incremental or CDC runs) may not"
+                )
+
+        if codec_advice is not None:
+            for mapping in mappings:
+                advice = codec_advice["columns"].get(mapping.destination_field)
+                if advice is not None:
+                    mapping.codec = advice["codec"]
+
         # Generate DDL
-        suggested_ddl = self.generate_ddl_from_mappings(destination_table, mappings)
+        design = None
+        if column_stats is not None:
+            design = self.design_table(source_schema, mappings, column_stats)
+            suggested_ddl = self.generate_ddl_from_mappings(
+                destination_table,
+                mappings,
+                order_by=design["order_by"],
+                partition_by=design["partition_by"],
+                table_settings=design["settings"] or None
+            )
+        else:
+            suggested_ddl = self.generate_ddl_from_mappings(destination_table, mappings)
 
-        return {
+        result = {
             "mappings": [m.model_dump() for m in mappings],
             "suggested_ddl": suggested_ddl,
             "warnings": warnings
         }
+        if design is not None:
+            result["table_design"] = design
+        if codec_advice is not None:
+            result["codec_advice"] = codec_advice
+        if column_profile is not None:
+            result["type_suggestions"] = type_suggestions
+            result["profile"] = {
+                "sampled_rows": column_profile["sampled_rows"],
+                "sample_percent": column_profile["sample_percent"],
+                "exact": column_profile["exact"]
+            }
+        return result
+
+    def design_table(
+        self,
+        source_schema: TableSchema,
+        mappings: list[FieldMapping],
+        column_stats: dict
+    ) -> dict:
+        """Propose ORDER BY, PARTITION BY and index granularity from Postgres statistics.
+
+        ORDER BY puts low-cardinality columns first, fewest distinct values
+        first, so their long runs compress well and filters on them skip
+        granules, then the primary key (or, without one, a time column).
+        PARTITION BY picks the time column best correlated with
+        physical order at the finest granularity that still gives few,
+        large partitions. Each choice comes with its reasoning.
+        """
+        stats = column_stats.get("columns", {})
+        rows = source_schema.row_count or column_stats.get("row_estimate") or 0
+        by_source = {m.source_field: m for m in mappings if not m.skip}
+        rationale = []
+
+        if not stats:
+            rationale.append(
+                "No pg_stats for this table (run ANALYZE on it); falling back to the default layout"
+            )
+
+        def distinct(name: str) -> Optional[float]:
+            n_distinct = stats.get(name, {}).get("n_distinct")
+            if n_distinct is None:
+                return None
+            # Negative values are a fraction of the row count
+            return n_distinct if n_distinct >= 0 else -n_distinct * rows
+
+        def sortable(mapping: FieldMapping) -> bool:
+            # Nullable columns cannot be in a sorting key without allow_nullable_key
+            return "Nullable(" not in mapping.destination_type and not mapping.destination_type.startswith("Array")
+
+        # Time columns: partitioning and a fallback key
+        time_columns = [
+            m for m in by_source.values()
+            if sortable(m) and re.match(r"(Date|DateTime)", m.destination_type)
+        ]
+        time_columns.sort(key=lambda m: -abs(stats.get(m.source_field, {}).get("correlation") or 0))
+        time_column = time_columns[0] if time_columns else None
+
+        # ORDER BY: low-cardinality prefix, then the key
+        key_fields = [
+            by_source[c.name].destination_field
+            for c in source_schema.columns
+            if c.primary_key and c.name in by_source
+        ]
+        candidates = []
+        for mapping in by_source.values():
+            count = distinct(mapping.source_field)
+            if (
+                count is not None
+                and 2 <= count <= LOW_CARDINALITY_MAX
+                and sortable(mapping)
+                and mapping.destination_field not in key_fields
+                and mapping.source_type.lower() not in UNSORTABLE_SOURCE_TYPES
+            ):
+                candidates.append((count, mapping.destination_field))
+        candidates.sort()
+        prefix = [field for _, field in candidates[:MAX_SORT_PREFIX]]
+        for count, field in candidates[:MAX_SORT_PREFIX]:
+            rationale.append(
+                f"ORDER BY leads with {field} (~{int(count):,} distinct values): long runs of equal "
+                f"values compress well and filters on it skip whole granules"
+            )
+
+        if key_fields:
+            suffix = key_fields
+            rationale.append(f"ORDER BY ends with the primary key ({', '.join(key_fields)}) for point lookups")
+        elif time_column is not None:
+            suffix = [time_column.destination_field]
+            rationale.append(
+                f"No primary key; ORDER BY ends with {time_column.destination_field} so time-range scans are contiguous"
+            )
+        else:
+            suffix = []
+        order_columns = prefix + [f for f in suffix if f not in prefix]
+        if not order_columns:
+            order_columns = [next(iter(by_source.values())).destination_field] if by_source else []
+            rationale.append("No statistics-backed sort columns; ORDER BY uses the first mapped column")
+
+        # PARTITION BY: coarse enough for large partitions, fine enough to prune
+        partition_by = None
+        if time_column is None:
+            rationale.append("No non-Nullable date/time column, so no PARTITION BY")
+        else:
+            column = stats.get(time_column.source_field, {})
+            span_days = self._span_days(column.get("lower_bound"), column.get("upper_bound"))
+            field = time_column.destination_field
+            if span_days is None:
+                rationale.append(f"No value range known for {field}, so no PARTITION BY")
+            elif rows < MIN_PARTITION_ROWS * 2:
+                rationale.append(
+                    f"{rows:,} rows is too few to partition; more parts would only slow merges and queries"
+                )
+            else:
+                for function, days, name in PARTITION_GRANULARITIES:
+                    partitions = max(1, -(-span_days // days))
+                    if partitions <= MAX_PARTITIONS and rows / partitions >= MIN_PARTITION_ROWS:
+                        partition_by = f"{function}({field})"
+                        rationale.append(
+                            f"PARTITION BY {name} of {field}: ~{span_days:,} days gives ~{partitions:,} partitions "
+                            f"of ~{int(rows / partitions):,} rows, so old data can be dropped or pruned per partition"
+                        )
+                        break
+                else:
+                    rationale.append(
+                        f"Even yearly partitions of {field} would hold under {MIN_PARTITION_ROWS:,} rows, "
+                        f"so no PARTITION BY"
+                    )
+
+        # Index granularity: smaller granules only pay off for key lookups on wide rows
+        row_bytes = sum(
+            stats.get(m.source_field, {}).get("avg_width") or 0
+            for m in by_source.values()
+        )
+        granularity = DEFAULT_INDEX_GRANULARITY
+        if row_bytes and key_fields:
+            while granularity > MIN_INDEX_GRANULARITY and granularity * row_bytes > TARGET_GRANULE_BYTES:
+                granularity //= 2
+        if granularity != DEFAULT_INDEX_GRANULARITY:
+            rationale.append(
+                f"Rows average ~{row_bytes:,} bytes, so index_granularity {granularity} keeps a granule under "
+                f"{TARGET_GRANULE_BYTES // 1024 // 1024} MiB and primary-key lookups read less"
+            )
+        else:
+            rationale.append(f"index_granularity stays at the default {DEFAULT_INDEX_GRANULARITY}")
+
+        return {
+            "order_by": ", ".join(order_columns),
+            "partition_by": partition_by,
+            "index_granularity": granularity,
+            "settings": {"index_granularity": granularity} if granularity != DEFAULT_INDEX_GRANULARITY else {},
+            "rationale": rationale
+        }
+
+    @staticmethod
+    def _span_days(lower: Optional[str], upper: Optional[str]) -> Optional[int]:
+        """Days between two histogram bounds, or None if they are not dates."""
+        try:
+            low = datetime.fromisoformat(lower)
+            high = datetime.fromisoformat(upper)
+        except (TypeError, ValueError):
+            return None
+        return max(1, (high - low).days)
 
     def validate_mappings(self, mappings: list[FieldMapping]) -> dict:
         """Validate field mappings."""
@@ -80,9 +314,22 @@ class MappingService:
         table_name: str,
         mappings: list[FieldMapping],
         engine: str = "MergeTree()",
-        order_by: str = None
+        order_by: str = None,
+        partition_by: str = None,
+        version_column: str = None,
+        is_deleted_column: str = None,
+        table_settings: Optional[dict] = None
     ) -> str:
-        """Generate CREATE TABLE DDL from field mappings."""
+        """Generate CREATE TABLE DDL from field mappings.
+
+        With version_column the table becomes a ReplacingMergeTree keyed on
+        order_by, which is then required and must be a unique row key, so
+        re-delivered rows replace older versions on merge. A version column
+        that is not mapped is added as UInt64, and is_deleted_column adds a
+        UInt8 delete marker (CDC tables). partition_by becomes the PARTITION
+        BY expression, table_settings the table's SETTINGS clause, and a
+        mapping's codec its column's CODEC clause.
+        """
         active_mappings = [m for m in mappings if not m.skip]
 
         if not active_mappings:
@@ -91,12 +338,40 @@ class MappingService:
         # Build column definitions
         columns = []
         for mapping in active_mappings:
-            columns.append(f"    {mapping.destination_field} {mapping.destination_type}")
+            dest_type = mapping.destination_type
+            if mapping.destination_field == version_column:
+                # ReplacingMergeTree rejects a Nullable version column
+                nullable_match = re.fullmatch(r"Nullable\((.*)\)", dest_type.strip())
+                if nullable_match:
+                    dest_type = nullable_match.group(1)
+            codec = f" CODEC({mapping.codec})" if mapping.codec else ""
+            columns.append(f"    {mapping.destination_field} {dest_type}{codec}")
+
+        if version_column:
+            version_mapping = next(
+                (m for m in active_mappings if m.destination_field == version_column),
+                None
+            )
+            if version_mapping is None:
+                columns.append(f"    {version_column} UInt64")
+            elif version_mapping.destination_type.replace("Nullable(", "").startswith("Int"):
+                # Versions must be UInt*, Date or DateTime; derive one from signed ids
+                columns.append(f"    _version UInt64 MATERIALIZED toUInt64({version_column})")
+                version_column = "_version"
+
+            if is_deleted_column:
+                columns.append(f"    {is_deleted_column} UInt8")
+                engine = f"ReplacingMergeTree({version_column}, {is_deleted_column})"
+            else:
+                engine = f"ReplacingMergeTree({version_column})"
 
         columns_str = ",\n".join(columns)
 
         # Determine ORDER BY
         if not order_by:
+            if version_column:
+                # Falling back to the first column would collapse distinct rows on merge
+                raise ValueError("A ReplacingMergeTree table needs an ORDER BY on a unique row key")
             order_by = active_mappings[0].destination_field
 
         ddl = f"""CREATE TABLE IF NOT EXISTS {table_name} (
@@ -104,6 +379,12 @@ class MappingService:
 ) ENGINE = {engine}
 ORDER BY ({order_by})"""
 
+        if partition_by:
+            ddl += f"\nPARTITION BY {partition_by}"
+
+        if table_settings:
+            ddl += "\nSETTINGS " + ", ".join(f"{k} = {v}" for k, v in table_settings.items())
+
         return ddl
 
 
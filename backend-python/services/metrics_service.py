@@ -0,0 +1,141 @@
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+# Latency buckets in seconds, from a fast query to a slow batch insert
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class MetricsService:
+    """Process-wide metrics, served in Prometheus text format at /metrics."""
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        register = self._register
+
+        self.http_request_seconds = register(
+            Histogram,
+            "http_request_duration_seconds",
+            "HTTP request latency by route template",
+            ("method", "route", "status")
+        )
+
+        self.clickhouse_seconds = register(
+            Histogram,
+            "clickhouse_call_duration_seconds",
+            "ClickHouse call latency by operation",
+            ("operation",)
+        )
+        self.clickhouse_errors = register(
+            Counter,
+            "clickhouse_call_errors",
+            "ClickHouse calls that raised, by operation",
+            ("operation",)
+        )
+        self.clickhouse_inserted_rows = register(
+            Counter,
+            "clickhouse_inserted_rows",
+            "Rows sent to ClickHouse inserts"
+        )
+
+        self.s3_query_seconds = register(
+            Histogram,
+            "s3_query_duration_seconds",
+            "Queries over MinIO files by engine, including the download",
+            ("engine",)
+        )
+        self.s3_query_errors = register(
+            Counter,
+            "s3_query_errors",
+            "Failed queries over MinIO files by engine",
+            ("engine",)
+        )
+
+        self.minio_seconds = register(
+            Histogram,
+            "minio_request_duration_seconds",
+            "MinIO transfer latency by operation",
+            ("operation",)
+        )
+        self.minio_bytes = register(
+            Counter,
+            "minio_transferred_bytes",
+            "Bytes uploaded to or downloaded from MinIO",
+            ("direction",)
+        )
+
+        self.keycloak_seconds = register(
+            Histogram,
+            "keycloak_request_duration_seconds",
+            "Keycloak HTTP call latency by operation",
+            ("operation",)
+        )
+        self.keycloak_requests = register(
+            Counter,
+            "keycloak_requests",
+            "Keycloak HTTP calls by operation and response status ('error' when no response)",
+            ("operation", "status")
+        )
+
+        self.migrations_running = register(
+            Gauge,
+            "migrations_running",
+            "Migrations currently running"
+        )
+        self.migrations_queued = register(
+            Gauge,
+            "migrations_queued",
+            "Migrations waiting for a scheduler slot"
+        )
+        self.migrations_finished = register(
+            Counter,
+            "migrations_finished",
+            "Finished migration runs by final status",
+            ("status",)
+        )
+        self.migration_rows = register(
+            Counter,
+            "migration_rows",
+            "Rows loaded into ClickHouse by migrations"
+        )
+        self.migration_insert_retries = register(
+            Counter,
+            "migration_insert_retries",
+            "Batch inserts retried after a transient error"
+        )
+
+    def _register(self, metric_class: type, name: str, documentation: str, labelnames: tuple = ()):
+        options = {"buckets": LATENCY_BUCKETS} if metric_class is Histogram else {}
+        return metric_class(name, documentation, labelnames, registry=self.registry, **options)
+
+    @contextmanager
+    def track(self, histogram: Histogram, errors: Optional[Counter], *labels):
+        """Time the block into histogram and count it in errors if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if errors is not None:
+                (errors.labels(*labels) if labels else errors).inc()
+            raise
+        finally:
+            (histogram.labels(*labels) if labels else histogram).observe(time.perf_counter() - started)
+
+    def s3_query(self, engine: str) -> Callable:
+        """Decorator timing a query over MinIO files; a result with success False counts as an error."""
+        def decorate(func: Callable[..., dict]) -> Callable[..., dict]:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> dict:
+                with self.track(self.s3_query_seconds, self.s3_query_errors, engine):
+                    result = func(*args, **kwargs)
+                if not result.get("success", True):
+                    self.s3_query_errors.labels(engine).inc()
+                return result
+            return wrapper
+        return decorate
+
+
+# Singleton instance
+metrics_service = MetricsService()
@@ -0,0 +1,224 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from models.migration import StageStats
+from services.metrics_service import metrics_service
+from utils.memory_budget import MemoryBudget
+from utils.retry import RetryPolicy
+
+
+@dataclass
+class Batch:
+    """A unit of work flowing through the pipeline.
+
+    seq numbers batches within range_id. An end_of_range batch carries no
+    data; it only tells the loader that every batch of the range was emitted.
+    nbytes is the approximate size of data as currently held. The pipeline
+    stamps the stage timings, the size as read and the bytes reserved for the batch.
+    """
+    seq: int
+    data: Any
+    rows: int
+    range_id: int = 0
+    last_key: Optional[str] = None
+    token: Optional[str] = None
+    end_of_range: bool = False
+    nbytes: int = 0
+    reserved_bytes: int = 0
+    read_bytes: int = 0
+    extract_seconds: float = 0.0
+    transform_seconds: float = 0.0
+    load_seconds: float = 0.0
+
+
+async def drain_queue(queue: asyncio.Queue, producer: asyncio.Task) -> AsyncIterator[Any]:
+    """Yield items from queue until the producer task finishes, then re-raise its error.
+
+    The producer is cancelled if the consumer stops early, so a bounded queue
+    never leaves it blocked on put().
+    """
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+
+            if getter not in done:
+                # Producer finished (or failed); hand over what it left behind
+                getter.cancel()
+                while not queue.empty():
+                    yield queue.get_nowait()
+                producer.result()
+                return
+
+            yield getter.result()
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+def _record(stats: StageStats, rows: int, nbytes: int, seconds: float) -> None:
+    """Count one processed batch; rows_per_second is per busy second of the stage."""
+    stats.batches += 1
+    stats.rows += rows
+    stats.bytes += nbytes
+    stats.busy_ms += seconds * 1000
+    if stats.busy_ms > 0:
+        stats.rows_per_second = round(stats.rows / stats.busy_ms * 1000, 1)
+
+
+class MigrationPipeline:
+    """Bounded extract -> transform -> load pipeline.
+
+    A producer reads batches into a bounded queue, transform workers convert them
+    and an inserter drains the result, so the source and the destination work
+    concurrently. Every stage records how long it was busy and how long it sat
+    waiting on its input (starved) or its output (back-pressured).
+
+    With a memory budget, each batch reserves its extracted size before it
+    is queued and releases it once loaded, so reading pauses while too many
+    bytes are in flight; that wait counts as the extract stage's output wait.
+
+    Failed loads are retried under load_retry; a batch keeps its data (and
+    its dedup token) until it has loaded, so a retry sends exactly the same block.
+    """
+
+    STAGES = ("extract", "transform", "load")
+
+    def __init__(
+        self,
+        extract: Callable[[], AsyncIterator[Batch]],
+        transform: Callable[[Batch], Batch],
+        load: Callable[[Batch], int],
+        on_loaded: Optional[Callable[[Batch, int], Awaitable[None]]] = None,
+        queue_depth: int = 4,
+        transform_workers: int = 1,
+        load_executor: Optional[Executor] = None,
+        memory: Optional[MemoryBudget] = None,
+        load_retry: Optional[RetryPolicy] = None
+    ):
+        self._extract = extract
+        self._transform = transform
+        self._load = load
+        self._on_loaded = on_loaded
+        self._queue_depth = max(1, queue_depth)
+        self._transform_workers = max(1, transform_workers)
+        # Loads run on the destination client's own threads when one is given
+        self._load_executor = load_executor
+        self._memory = memory
+        self._load_retry = load_retry or RetryPolicy()
+        self.stats: dict[str, StageStats] = {name: StageStats() for name in self.STAGES}
+
+    async def run(self) -> int:
+        """Run all stages to completion and return the number of rows loaded."""
+        extracted: asyncio.Queue = asyncio.Queue(maxsize=self._queue_depth)
+        transformed: asyncio.Queue = asyncio.Queue(maxsize=self._queue_depth)
+        loaded = 0
+        loop = asyncio.get_running_loop()
+
+        async def produce():
+            stats = self.stats["extract"]
+            batches = self._extract()
+            while True:
+                started = time.perf_counter()
+                try:
+                    batch = await anext(batches)
+                except StopAsyncIteration:
+                    break
+                batch.extract_seconds = time.perf_counter() - started
+                if not batch.end_of_range:
+                    batch.read_bytes = batch.nbytes
+                    _record(stats, batch.rows, batch.nbytes, batch.extract_seconds)
+
+                started = time.perf_counter()
+                if self._memory and batch.nbytes:
+                    batch.reserved_bytes = batch.nbytes
+                    await self._memory.acquire(batch.reserved_bytes)
+                await extracted.put(batch)
+                stats.wait_output_ms += (time.perf_counter() - started) * 1000
+
+            for _ in range(self._transform_workers):
+                await extracted.put(None)
+
+        async def transform():
+            stats = self.stats["transform"]
+            while True:
+                started = time.perf_counter()
+                batch = await extracted.get()
+                stats.wait_input_ms += (time.perf_counter() - started) * 1000
+                if batch is None:
+                    await transformed.put(None)
+                    return
+                if batch.end_of_range:
+                    await transformed.put(batch)
+                    continue
+
+                started = time.perf_counter()
+                result = await asyncio.to_thread(self._transform, batch)
+                result.transform_seconds = time.perf_counter() - started
+                _record(stats, result.rows, result.nbytes, result.transform_seconds)
+
+                started = time.perf_counter()
+                await transformed.put(result)
+                stats.wait_output_ms += (time.perf_counter() - started) * 1000
+
+        async def load():
+            nonlocal loaded
+            stats = self.stats["load"]
+            finished_workers = 0
+            while finished_workers < self._transform_workers:
+                started = time.perf_counter()
+                batch = await transformed.get()
+                stats.wait_input_ms += (time.perf_counter() - started) * 1000
+                if batch is None:
+                    finished_workers += 1
+                    continue
+                if batch.end_of_range:
+                    if self._on_loaded:
+                        await self._on_loaded(batch, 0)
+                    continue
+
+                def count_retry(error: BaseException) -> None:
+                    stats.retries += 1
+                    metrics_service.migration_insert_retries.inc()
+
+                started = time.perf_counter()
+                inserted = await self._load_retry.run(
+                    lambda: loop.run_in_executor(self._load_executor, self._load, batch),
+                    f"Load of batch {batch.range_id}:{batch.seq}",
+                    count_retry
+                )
+                batch.load_seconds = time.perf_counter() - started
+                _record(stats, inserted, batch.nbytes, batch.load_seconds)
+                loaded += inserted
+
+                # The batch's data is dropped after this, so its reservation ends
+                batch.data = None
+                if self._memory and batch.reserved_bytes:
+                    self._memory.release(batch.reserved_bytes)
+
+                if self._on_loaded:
+                    await self._on_loaded(batch, inserted)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                for _ in range(self._transform_workers):
+                    group.create_task(transform())
+                group.create_task(load())
+        except ExceptionGroup as eg:
+            # Surface the stage's own error rather than the group wrapper
+            raise eg.exceptions[0]
+
+        return loaded
+
+    def bottleneck(self) -> Optional[str]:
+        """Return the stage that spent the most time busy (per worker)."""
+        if not any(s.batches for s in self.stats.values()):
+            return None
+        workers = {"transform": self._transform_workers}
+        return max(
+            self.STAGES,
+            key=lambda name: self.stats[name].busy_ms / workers.get(name, 1)
+        )
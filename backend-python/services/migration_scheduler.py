@@ -0,0 +1,143 @@
+import asyncio
+import itertools
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+from config.database import settings
+from models.migration import MigrationPriority
+from services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+# Dispatch order of the priority classes
+PRIORITY_RANK = {
+    MigrationPriority.HIGH: 0,
+    MigrationPriority.NORMAL: 1,
+    MigrationPriority.LOW: 2,
+}
+
+
+@dataclass(order=True)
+class QueuedJob:
+    """A submitted job waiting for capacity; sorts in dispatch order."""
+    rank: int
+    seq: int
+    job_id: str = field(compare=False)
+    source: str = field(compare=False)
+    destination: str = field(compare=False)
+    run: Callable[[], Awaitable[None]] = field(compare=False)
+    on_start: Optional[Callable[[], None]] = field(compare=False, default=None)
+
+
+class MigrationScheduler:
+    """Admit migrations under a global cap and per-source / per-destination caps.
+
+    Jobs wait in priority order (then submission order). A job whose source
+    or destination is saturated does not block jobs behind it that touch
+    other systems.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_source: int,
+        max_per_destination: int
+    ):
+        self._max_concurrent = max(1, max_concurrent)
+        self._max_per_source = max(1, max_per_source)
+        self._max_per_destination = max(1, max_per_destination)
+        self._queue: list[QueuedJob] = []
+        self._running: dict[str, QueuedJob] = {}
+        self._per_source: Counter = Counter()
+        self._per_destination: Counter = Counter()
+        self._seq = itertools.count()
+        # The event loop keeps only weak references to tasks; these keep running jobs alive
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(
+        self,
+        job_id: str,
+        source: str,
+        destination: str,
+        priority: MigrationPriority,
+        run: Callable[[], Awaitable[None]],
+        on_start: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Queue a job; it starts as soon as every cap it is subject to has room."""
+        self._queue.append(QueuedJob(
+            rank=PRIORITY_RANK[priority],
+            seq=next(self._seq),
+            job_id=job_id,
+            source=source,
+            destination=destination,
+            run=run,
+            on_start=on_start
+        ))
+        self._queue.sort()
+        self._dispatch()
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place of a queued job in dispatch order, or None if not queued."""
+        for index, job in enumerate(self._queue):
+            if job.job_id == job_id:
+                return index + 1
+        return None
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._queue)
+
+    def is_pending(self, job_id: str) -> bool:
+        """Whether the job is still queued or running."""
+        return job_id in self._running or self.position(job_id) is not None
+
+    def _has_capacity(self, job: QueuedJob) -> bool:
+        return (
+            len(self._running) < self._max_concurrent
+            and self._per_source[job.source] < self._max_per_source
+            and self._per_destination[job.destination] < self._max_per_destination
+        )
+
+    def _dispatch(self) -> None:
+        for job in list(self._queue):
+            if len(self._running) >= self._max_concurrent:
+                return
+            if not self._has_capacity(job):
+                continue
+
+            self._queue.remove(job)
+            self._running[job.job_id] = job
+            self._per_source[job.source] += 1
+            self._per_destination[job.destination] += 1
+            if job.on_start:
+                job.on_start()
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: QueuedJob) -> None:
+        try:
+            await job.run()
+        except Exception:
+            # Jobs record their own failures; never let one stall the queue
+            logger.exception("Scheduled job %s raised", job.job_id)
+        finally:
+            del self._running[job.job_id]
+            self._per_source[job.source] -= 1
+            self._per_destination[job.destination] -= 1
+            self._dispatch()
+
+
+# Singleton instance
+migration_scheduler = MigrationScheduler(
+    settings.migration_max_concurrent,
+    settings.migration_max_per_source,
+    settings.migration_max_per_destination
+)
+metrics_service.migrations_running.set_function(lambda: migration_scheduler.running_count)
+metrics_service.migrations_queued.set_function(lambda: migration_scheduler.queued_count)
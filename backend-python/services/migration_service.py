@@ -1,11 +1,21 @@
 import asyncio
 import json
+import logging
+import re
 import time
-from datetime import datetime
-from typing import Optional
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Optional, Union
+import pyarrow as pa
+import pyarrow.parquet as pq
 from config.database import settings
-from models.schema import FieldMapping, DatabaseConnection
+from models.schema import FieldMapping, DatabaseConnection, TableSchema
 from models.migration import (
+    BatchTiming,
+    ExtractionMethod,
+    InsertMode,
+    MigrationCheckpoint,
     MigrationRequest,
     MigrationStatus,
     MigrationProgress,
@@ -15,72 +25,200 @@ from services.postgres_service import postgres_service
 from services.clickhouse_service import clickhouse_service
 from services.history_service import history_service
 from services.mapping_service import mapping_service
+from services.checkpoint_service import checkpoint_service, CheckpointTracker
+from services.migration_pipeline import Batch, MigrationPipeline, drain_queue
+from services.migration_scheduler import migration_scheduler
+from services.metrics_service import metrics_service
+from services.minio_service import minio_service
+from utils.transform_plan import build_copy_expressions, compile_column_converter, compile_row_converter
+from utils.arrow_converter import build_arrow_table
+from utils.batch_sizer import BatchSizer, estimate_columns_bytes, estimate_rows_bytes
+from utils.memory_budget import MemoryBudget
+from utils.retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Key/ctid ranges created per parallel reader
+RANGES_PER_READER = 4
+# Per-batch timings kept in the live progress
+RECENT_BATCHES = 20
+# Part limits on a staging table while its merges are stopped, since every batch adds a part
+SHADOW_PART_LIMITS = {"parts_to_delay_insert": 100_000, "parts_to_throw_insert": 100_000}
+# Offloaded Parquet files go under <prefix>/<schema>.<table>/<migration id>/range=<id>/part-<seq>.parquet
+OFFLOAD_PREFIX = "offload"
+OFFLOAD_PARQUET_COMPRESSION = "zstd"
+# Each offloaded batch becomes one file and one ingested part, so batches are at least this big
+OFFLOAD_MIN_BATCH_ROWS = 100_000
 
 
 class MigrationService:
     def __init__(self):
         self._active_migrations: dict[str, MigrationStatusResponse] = {}
+        self._finished: dict[str, asyncio.Event] = {}
+        # Caps parallel source readers across all running migrations
+        self._reader_slots = asyncio.Semaphore(settings.migration_max_parallelism)
+        # Bytes of batches held in memory across all running migrations
+        self.memory = MemoryBudget(settings.migration_memory_budget_mb * 1024 * 1024)
 
     async def execute_migration(self, request: MigrationRequest) -> str:
         """Start migration process and return migration ID."""
-        # Validate mappings
-        mappings = [FieldMapping(**m) if isinstance(m, dict) else m for m in request.mappings]
-        validation = mapping_service.validate_mappings(mappings)
+        active_mappings = self._active_mappings(request)
+        source_columns = [m.source_field for m in active_mappings]
 
-        if not validation["valid"]:
-            raise ValueError(f"Invalid mappings: {', '.join(validation['errors'])}")
+        if request.incremental and not request.watermark_column:
+            raise ValueError("Incremental migrations require a watermark_column")
+        if request.shadow_load and request.incremental:
+            raise ValueError("shadow_load replaces the whole table and cannot be incremental")
+        if request.defer_merges and not request.shadow_load:
+            raise ValueError("defer_merges requires shadow_load")
+        if request.offload and request.extraction_method == ExtractionMethod.COPY:
+            raise ValueError("offload writes Parquet from fetched rows and cannot use COPY extraction")
 
-        # Get active mappings
-        active_mappings = [m for m in mappings if not m.skip]
-        source_columns = [m.source_field for m in active_mappings]
-        destination_fields = [m.destination_field for m in active_mappings]
+        # Reject a native insert mode without its driver now rather than on the first batch
+        clickhouse_service.resolve_insert_mode(request.insert_mode)
 
-        # Build source connection string
-        conn = request.source_connection
-        if conn:
-            source_str = f"postgres://{conn.host}:{conn.port}/{conn.database}"
-        else:
-            source_str = f"postgres://{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
+        source_str = self.source_label(request.source_connection)
 
         # Create migration history record
-        migration_id = history_service.create_migration_record(
+        migration_id = await clickhouse_service.run(
+            history_service.create_migration_record,
             source=source_str,
             destination=request.destination_table,
             source_table=request.source_table,
             description=request.description,
             fields=source_columns,
             mappings=[m.model_dump() for m in active_mappings],
-            created_by=request.created_by
+            created_by=request.created_by,
+            metadata={"request": self._stored_request(request)},
+            status=MigrationStatus.QUEUED
         )
 
-        # Initialize status tracking
-        self._active_migrations[migration_id] = MigrationStatusResponse(
+        self._launch(migration_id, request, active_mappings)
+        return migration_id
+
+    async def resume_migration(
+        self,
+        migration_id: str,
+        source_connection: Optional[DatabaseConnection] = None
+    ) -> str:
+        """Restart a failed or interrupted migration from its last checkpoint."""
+        record, request = await self.load_request(migration_id, source_connection)
+        if record["status"] == MigrationStatus.COMPLETED.value:
+            raise ValueError(f"Migration {migration_id} already completed")
+
+        active_mappings = self._active_mappings(request)
+        checkpoints = await clickhouse_service.run(checkpoint_service.load, migration_id)
+        if request.extraction_method == ExtractionMethod.COPY and any(
+            not c.completed for c in checkpoints.values()
+        ):
+            # COPY tokens are scoped to one run, so batches re-read after a restart would not dedupe
+            raise ValueError(
+                f"Migration {migration_id} used COPY extraction and stopped mid-range; a resume would "
+                f"insert its loaded batches again. Start a new migration, or use fetch or arrow extraction"
+            )
+
+        await clickhouse_service.run(
+            history_service.update_migration_status,
+            migration_id,
+            MigrationStatus.QUEUED,
+            sum(c.rows_written for c in checkpoints.values()),
+            int(record.get("duration_seconds") or 0)
+        )
+
+        self._launch(migration_id, request, active_mappings, checkpoints)
+        return migration_id
+
+    async def load_request(
+        self,
+        migration_id: str,
+        source_connection: Optional[DatabaseConnection] = None
+    ) -> tuple[dict, MigrationRequest]:
+        """A finished migration's history record and the request it was started with."""
+        if migration_scheduler.is_pending(migration_id):
+            raise ValueError(f"Migration {migration_id} is still queued or running")
+
+        record = await clickhouse_service.run(history_service.get_migration_by_id, migration_id)
+        if record is None:
+            raise ValueError(f"Migration {migration_id} not found")
+
+        stored = json.loads(record.get("metadata") or "{}").get("request")
+        if stored is None:
+            raise ValueError(f"Migration {migration_id} has no stored request")
+
+        # Passwords are never stored, so custom sources must be supplied again
+        if source_connection is not None:
+            stored["source_connection"] = source_connection.model_dump()
+        elif stored.get("source_connection") is not None:
+            raise ValueError("source_connection (including password) is required for this migration")
+
+        return record, MigrationRequest(**stored)
+
+    def _active_mappings(self, request: MigrationRequest) -> list[FieldMapping]:
+        """Validate the request's mappings and return the ones not skipped."""
+        mappings = [FieldMapping(**m) if isinstance(m, dict) else m for m in request.mappings]
+        validation = mapping_service.validate_mappings(mappings)
+
+        if not validation["valid"]:
+            raise ValueError(f"Invalid mappings: {', '.join(validation['errors'])}")
+
+        return [m for m in mappings if not m.skip]
+
+    @staticmethod
+    def _stored_request(request: MigrationRequest) -> dict:
+        """The request as recorded in history metadata, minus the source password."""
+        return request.model_dump(mode="json", exclude={"source_connection": {"password"}})
+
+    def _launch(
+        self,
+        migration_id: str,
+        request: MigrationRequest,
+        active_mappings: list[FieldMapping],
+        checkpoints: Optional[dict[int, MigrationCheckpoint]] = None
+    ) -> None:
+        """Register status tracking and queue the migration with the scheduler."""
+        status = MigrationStatusResponse(
             id=migration_id,
-            status=MigrationStatus.RUNNING,
+            status=MigrationStatus.QUEUED,
             progress=MigrationProgress(
                 total_records=0,
                 processed_records=0,
                 percentage=0.0
-            ),
-            started_at=datetime.utcnow()
+            )
         )
+        self._active_migrations[migration_id] = status
+        self._finished[migration_id] = asyncio.Event()
+
+        def on_start() -> None:
+            status.status = MigrationStatus.RUNNING
+            status.started_at = datetime.utcnow()
 
-        # Start async migration
-        asyncio.create_task(
-            self._perform_migration(
+        migration_scheduler.submit(
+            migration_id,
+            source=self.source_label(request.source_connection),
+            destination=request.destination_table,
+            priority=request.priority,
+            run=lambda: self._perform_migration(
                 migration_id,
                 request,
                 active_mappings,
-                source_columns,
-                destination_fields
-            )
+                [m.source_field for m in active_mappings],
+                [m.destination_field for m in active_mappings],
+                checkpoints
+            ),
+            on_start=on_start
         )
 
-        return migration_id
+    async def wait_for_migration(self, migration_id: str) -> MigrationStatusResponse:
+        """Wait until a queued or running migration completes or fails."""
+        await self._finished[migration_id].wait()
+        return self._active_migrations[migration_id]
 
     def get_migration_status(self, migration_id: str) -> Optional[MigrationStatusResponse]:
         """Get status of active migration."""
-        return self._active_migrations.get(migration_id)
+        status = self._active_migrations.get(migration_id)
+        if status:
+            status.queue_position = migration_scheduler.position(migration_id)
+        return status
 
     async def _perform_migration(
         self,
@@ -88,97 +226,291 @@ class MigrationService:
         request: MigrationRequest,
         mappings: list[FieldMapping],
         source_columns: list[str],
-        destination_fields: list[str]
+        destination_fields: list[str],
+        checkpoints: Optional[dict[int, MigrationCheckpoint]] = None
     ) -> None:
-        """Perform the actual migration."""
+        """Perform the actual migration, continuing from checkpoints when resuming."""
         start_time = time.time()
         records_migrated = 0
+        resuming = bool(checkpoints)
+        checkpoints = checkpoints or {}
+        memory = MemoryBudget(int(request.memory_budget_mb * 1024 * 1024), parent=self.memory)
+
+        metadata = {"request": self._stored_request(request)}
 
         try:
-            # Create table if requested
-            if request.create_table:
-                ddl = mapping_service.generate_ddl_from_mappings(
-                    request.destination_table,
-                    mappings
-                )
-                clickhouse_service.create_table(ddl)
+            await clickhouse_service.run(
+                history_service.update_migration_status,
+                migration_id,
+                MigrationStatus.RUNNING,
+                sum(c.rows_written for c in checkpoints.values()),
+                0
+            )
 
-            # Get total row count
+            # Get total row count; incremental runs count only their window below
             schema = await postgres_service.get_table_schema(
                 request.source_table,
                 request.source_schema,
-                request.source_connection
+                request.source_connection,
+                count_rows=not request.incremental
             )
             total_records = schema.row_count or 0
 
+            # Incremental runs only read rows above the previous high-water mark
+            source_filter: tuple[Optional[str], list] = (None, [])
+            if request.incremental:
+                source_filter, window = await self._incremental_window(request, schema)
+                metadata.update(window)
+                total_records = await postgres_service.count_rows(
+                    request.source_table,
+                    request.source_schema,
+                    *source_filter,
+                    connection=request.source_connection
+                )
+
+            metadata["insert"] = {
+                "mode": clickhouse_service.resolve_insert_mode(request.insert_mode).value,
+                "compression": clickhouse_service.resolve_compression(request.insert_compression).value
+            }
+
+            # A shadow load writes everything to a staging table that replaces the destination at the end
+            target = request
+            if request.shadow_load:
+                target = request.model_copy(
+                    update={"destination_table": self._shadow_table(migration_id, request)}
+                )
+                metadata["shadow"] = {"staging_table": target.destination_table}
+
+            # Create table if requested
+            if request.create_table:
+                column_stats = None
+                if request.optimize_table and not request.incremental:
+                    column_stats = await postgres_service.get_column_stats(
+                        request.source_table,
+                        request.source_schema,
+                        request.source_connection
+                    )
+                ddl = self._destination_ddl(target, schema, mappings, column_stats, metadata)
+                await clickhouse_service.run(clickhouse_service.create_table, ddl)
+            else:
+                if request.shadow_load:
+                    await clickhouse_service.run(
+                        clickhouse_service.clone_table, request.destination_table, target.destination_table
+                    )
+                if not await clickhouse_service.run(clickhouse_service.deduplicates_inserts, target.destination_table):
+                    logger.warning(
+                        "Migration %s: %s does not deduplicate inserts; "
+                        "a retried batch that had already landed will be duplicated",
+                        migration_id,
+                        target.destination_table
+                    )
+
+            if request.defer_merges:
+                # Nobody reads the staging table yet, so parts may pile up until one merge at the end
+                await clickhouse_service.run(clickhouse_service.set_merges, target.destination_table, False)
+                await clickhouse_service.run(
+                    clickhouse_service.modify_settings, target.destination_table, SHADOW_PART_LIMITS
+                )
+
             # Update progress
             status = self._active_migrations[migration_id]
             status.progress.total_records = total_records
 
-            # Migrate in batches
-            offset = 0
-            batch_num = 0
-            total_batches = (total_records + request.batch_size - 1) // request.batch_size if total_records > 0 else 1
+            # Fixed batches, or sized from the byte budget and observed latency
+            sizer = BatchSizer(
+                max(request.batch_size, OFFLOAD_MIN_BATCH_ROWS) if request.offload else request.batch_size,
+                adaptive=request.adaptive_batch_size,
+                target_bytes=int(request.target_batch_mb * 1024 * 1024),
+                target_seconds=request.target_batch_seconds,
+                row_bytes_hint=self._estimate_row_bytes(schema)
+            )
+            status.progress.batch_size = sizer.rows
+            status.progress.batch_size_history = sizer.history
 
-            while True:
-                # Extract batch
-                data = await postgres_service.extract_data(
-                    request.source_table,
-                    request.source_schema,
-                    source_columns,
-                    offset,
-                    request.batch_size,
-                    request.source_connection
+            # Page on a unique key when one is available, OFFSET otherwise
+            key_columns = self._resolve_key_columns(request, schema)
+            key_types = [next(c.type for c in schema.columns if c.name == k) for k in key_columns]
+            parallelism = min(request.parallelism, settings.migration_max_parallelism)
+            if len(checkpoints) > 1:
+                # Checkpointed ranges can only be continued by the parallel reader
+                parallelism = max(parallelism, 2)
+            status.progress.parallelism = parallelism
+
+            if parallelism > 1:
+                status.progress.pagination = "key-range" if key_columns else "ctid-range"
+                extract = lambda: self._extract_batches_parallel(
+                    migration_id, request, schema, mappings, source_columns,
+                    key_columns, parallelism, source_filter, checkpoints, batch_rows
                 )
+            else:
+                if not checkpoints:
+                    checkpoints[0] = MigrationCheckpoint(migration_id=migration_id, range_id=0)
+                    await clickhouse_service.run(checkpoint_service.save, [checkpoints[0]])
 
-                if not data:
-                    break
+                if request.extraction_method == ExtractionMethod.COPY:
+                    # A single COPY streams the whole table, so no pagination is needed
+                    status.progress.pagination = "copy"
+                    extract = lambda: self._extract_batches_copy(
+                        request, mappings, source_filter, checkpoints[0], batch_rows
+                    )
+                else:
+                    status.progress.pagination = "keyset" if key_columns else "offset"
+                    extract = lambda: self._extract_batches(
+                        request, source_columns, key_columns, key_types, source_filter, checkpoints[0], batch_rows
+                    )
 
-                # Transform data
-                transformed = self._transform_data(data, mappings)
+            # Ranges only continue mid-way when reads are ordered; others restart and
+            # rely on insert deduplication for batches loaded before the failure. That
+            # holds for fetched batches only: resume_migration refuses unfinished COPY ranges.
+            continues_in_range = request.extraction_method != ExtractionMethod.COPY and (
+                bool(key_columns) or parallelism == 1
+            )
+            for checkpoint in checkpoints.values():
+                if not checkpoint.completed and not (continues_in_range and checkpoint.last_key):
+                    self._restart_range(checkpoint)
 
-                # Insert into ClickHouse
-                inserted = clickhouse_service.insert_data(
-                    request.destination_table,
-                    transformed,
-                    destination_fields
-                )
+            if request.offload:
+                await self._prepare_offload(migration_id, request, checkpoints)
 
-                records_migrated += inserted
-                batch_num += 1
-                offset += request.batch_size
+            # Adaptive sizes are recorded so a resumed range is cut into the same batches and tokens
+            tracker = CheckpointTracker(
+                checkpoints,
+                record_plan=sizer.adaptive and request.extraction_method != ExtractionMethod.COPY,
+                keep_plan_history=not continues_in_range
+            )
+            records_migrated = tracker.rows_written
+            if resuming:
+                status.progress.resumed_from_records = records_migrated
+
+            total_batches = (total_records + sizer.rows - 1) // sizer.rows if total_records > 0 else 1
+            status.progress.total_batches = total_batches
+
+            transform, load = self._build_stages(migration_id, target, mappings, destination_fields)
+
+            def batch_rows(range_id: int, seq: int) -> int:
+                planned = tracker.planned_rows(range_id, seq)
+                return sizer.rows if planned is None else planned
+
+            async def extract_planned() -> AsyncIterator[Batch]:
+                async for batch in extract():
+                    # The size must be durable before the batch can land under its token
+                    checkpoint = tracker.emitted(batch)
+                    if checkpoint:
+                        await clickhouse_service.run(checkpoint_service.save, [checkpoint])
+                    yield batch
+
+            async def on_loaded(batch: Batch, inserted: int) -> None:
+                nonlocal records_migrated
+                metrics_service.migration_rows.inc(inserted)
+                checkpoint = tracker.loaded(batch)
+                if checkpoint:
+                    await clickhouse_service.run(checkpoint_service.save, [checkpoint])
+                records_migrated = tracker.rows_written
+
+                if sizer.adaptive and not batch.end_of_range:
+                    sizer.observe(batch.rows, batch.nbytes, batch.extract_seconds, batch.load_seconds)
+                    status.progress.batch_size = sizer.rows
+                    status.progress.batch_size_history = list(sizer.history)
+                    status.progress.avg_row_bytes = round(sizer.row_bytes, 1) if sizer.row_bytes else None
+                    remaining = max(0, total_records - records_migrated)
+                    status.progress.total_batches = pipeline.stats["load"].batches + -(-remaining // sizer.rows)
 
                 # Update progress
                 percentage = (records_migrated / total_records * 100) if total_records > 0 else 100
                 status.progress.processed_records = records_migrated
                 status.progress.percentage = round(percentage, 2)
-                status.progress.current_batch = batch_num
-                status.progress.total_batches = total_batches
+                status.progress.current_batch = pipeline.stats["load"].batches
+                status.progress.bottleneck = pipeline.bottleneck()
+                status.progress.memory_bytes = memory.used_bytes
+                status.progress.peak_memory_bytes = memory.peak_bytes
+                self._update_throughput(status.progress, start_time, records_migrated, total_records)
+
+                if not batch.end_of_range:
+                    status.progress.recent_batches.append(BatchTiming(
+                        range_id=batch.range_id,
+                        seq=batch.seq,
+                        rows=batch.rows,
+                        bytes_read=batch.read_bytes,
+                        bytes_written=batch.nbytes,
+                        extract_ms=round(batch.extract_seconds * 1000, 1),
+                        transform_ms=round(batch.transform_seconds * 1000, 1),
+                        load_ms=round(batch.load_seconds * 1000, 1)
+                    ))
+                    del status.progress.recent_batches[:-RECENT_BATCHES]
+
+            insert_retry = RetryPolicy(
+                settings.migration_insert_attempts,
+                settings.migration_retry_base_seconds,
+                settings.migration_retry_max_seconds,
+                retryable=clickhouse_service.is_transient_error
+            )
+            pipeline = MigrationPipeline(
+                extract=extract_planned,
+                transform=transform,
+                load=load,
+                on_loaded=on_loaded,
+                queue_depth=request.queue_depth,
+                transform_workers=request.transform_workers,
+                load_executor=clickhouse_service.executor,
+                memory=memory,
+                load_retry=insert_retry
+            )
+            status.progress.stages = pipeline.stats
+            status.progress.recent_batches = []
+
+            await pipeline.run()
+            status.progress.bottleneck = pipeline.bottleneck()
+            status.progress.peak_memory_bytes = memory.peak_bytes
+            self._update_throughput(status.progress, start_time, records_migrated, total_records)
+            metadata["stats"] = self._stats_summary(status.progress)
+
+            if request.offload:
+                metadata["offload"] = await self._ingest_offload(
+                    migration_id, request, target.destination_table, destination_fields,
+                    parallelism, insert_retry
+                )
+
+            if request.shadow_load:
+                metadata["shadow"].update(
+                    await self._swap_in_shadow(request, target.destination_table, records_migrated)
+                )
 
             # Complete migration
             duration = int(time.time() - start_time)
-            history_service.update_migration_status(
+            await clickhouse_service.run(
+                history_service.update_migration_status,
                 migration_id,
                 MigrationStatus.COMPLETED,
                 records_migrated,
-                duration
+                duration,
+                metadata=metadata
             )
 
             status.status = MigrationStatus.COMPLETED
             status.completed_at = datetime.utcnow()
             status.progress.percentage = 100.0
+            metrics_service.migrations_finished.labels(MigrationStatus.COMPLETED.value).inc()
 
         except Exception as e:
             duration = int(time.time() - start_time)
             error_message = str(e)
 
-            history_service.update_migration_status(
+            # Throughput up to the failure helps tell a slow stage from a broken one
+            if migration_id in self._active_migrations:
+                progress = self._active_migrations[migration_id].progress
+                self._update_throughput(progress, start_time, records_migrated, progress.total_records)
+                metadata["stats"] = self._stats_summary(progress)
+
+            await clickhouse_service.run(
+                history_service.update_migration_status,
                 migration_id,
                 MigrationStatus.FAILED,
                 records_migrated,
                 duration,
-                error_message
+                error_message,
+                metadata=metadata
             )
+            metrics_service.migrations_finished.labels(MigrationStatus.FAILED.value).inc()
 
             if migration_id in self._active_migrations:
                 status = self._active_migrations[migration_id]
@@ -186,48 +518,730 @@ class MigrationService:
                 status.error_message = error_message
                 status.completed_at = datetime.utcnow()
 
-    def _transform_data(
+        finally:
+            # Batches abandoned by a failure must not keep holding the global budget
+            memory.close()
+            self._finished[migration_id].set()
+
+    @staticmethod
+    def _update_throughput(
+        progress: MigrationProgress,
+        start_time: float,
+        records_migrated: int,
+        total_records: int
+    ) -> None:
+        """Refresh elapsed time, rows/sec for this run and the ETA at that rate."""
+        elapsed = time.time() - start_time
+        # Rows a resumed run skipped were not loaded in this run's time
+        loaded = records_migrated - (progress.resumed_from_records or 0)
+        rate = loaded / elapsed if elapsed > 0 else 0.0
+
+        progress.elapsed_seconds = round(elapsed, 1)
+        progress.rows_per_second = round(rate, 1)
+        remaining = max(0, total_records - records_migrated)
+        progress.eta_seconds = round(remaining / rate, 1) if rate > 0 else None
+
+    @staticmethod
+    def _stats_summary(progress: MigrationProgress) -> dict:
+        """Throughput figures kept in history metadata once a run ends."""
+        stages = progress.stages or {}
+        return {
+            "elapsed_seconds": progress.elapsed_seconds,
+            "rows_per_second": progress.rows_per_second,
+            "bytes_read": stages["extract"].bytes if "extract" in stages else 0,
+            "bytes_written": stages["load"].bytes if "load" in stages else 0,
+            "bottleneck": progress.bottleneck,
+            "batch_size": progress.batch_size,
+            "peak_memory_bytes": progress.peak_memory_bytes,
+            "stages": {name: stage.model_dump() for name, stage in stages.items()}
+        }
+
+    def _build_stages(
+        self,
+        migration_id: str,
+        request: MigrationRequest,
+        mappings: list[FieldMapping],
+        destination_fields: list[str]
+    ) -> tuple[Callable[[Batch], Batch], Callable[[Batch], int]]:
+        """Pick the transform and load functions for the request's extraction method.
+
+        The insert mode only shapes fetched rows; COPY text and Arrow tables
+        keep their own formats and just use the chosen compression.
+        """
+        compression = clickhouse_service.resolve_compression(request.insert_compression)
+
+        if request.offload:
+            # Batches go to MinIO as Parquet; ClickHouse ingests the files afterwards.
+            # Object names follow range and seq, so a replayed batch overwrites its file.
+            bucket, prefix = self._offload_location(migration_id, request)
+
+            def to_arrow(batch: Batch) -> Batch:
+                batch.data = build_arrow_table(batch.data, mappings)
+                batch.nbytes = batch.data.nbytes
+                return batch
+
+            def upload_parquet(batch: Batch) -> int:
+                buffer = pa.BufferOutputStream()
+                pq.write_table(batch.data, buffer, compression=OFFLOAD_PARQUET_COMPRESSION)
+                minio_service.put_bytes(
+                    bucket,
+                    f"{prefix}/range={batch.range_id:05d}/part-{batch.seq:06d}.parquet",
+                    buffer.getvalue().to_pybytes()
+                )
+                return batch.rows
+
+            return to_arrow, upload_parquet
+
+        def insert_settings(batch: Batch) -> dict:
+            # A replayed batch starts at the same checkpoint, so matching seq, size and
+            # end key mean the same rows and ClickHouse drops it instead of duplicating.
+            # Adaptive sizes of in-flight batches are replayed from the checkpoint, so a
+            # resumed run cuts them the same even after the sizer has moved on.
+            batch.token = f"{migration_id}:{batch.range_id}:{batch.seq}:{batch.rows}:{batch.last_key or ''}"
+            return {"insert_deduplication_token": batch.token}
+
+        if request.extraction_method == ExtractionMethod.COPY:
+            # COPY batches were already converted by the SELECT list. Chunk
+            # boundaries follow the network stream and can differ on a re-read,
+            # so the token is scoped to this run: it dedupes retries of the
+            # same chunk but can never match a chunk from another run.
+            run_id = uuid.uuid4().hex[:12]
+
+            def load_raw(batch: Batch) -> int:
+                batch.token = f"{migration_id}:{batch.range_id}:{batch.seq}:{batch.rows}:run-{run_id}"
+                clickhouse_service.insert_raw(
+                    request.destination_table,
+                    batch.data,
+                    destination_fields,
+                    settings={"insert_deduplication_token": batch.token},
+                    compression=compression
+                )
+                return batch.rows
+
+            return (lambda batch: batch), load_raw
+
+        if request.extraction_method == ExtractionMethod.ARROW:
+            def to_arrow(batch: Batch) -> Batch:
+                batch.data = build_arrow_table(batch.data, mappings)
+                batch.nbytes = batch.data.nbytes
+                return batch
+
+            def load_arrow(batch: Batch) -> int:
+                return clickhouse_service.insert_arrow(
+                    request.destination_table,
+                    batch.data,
+                    insert_settings(batch),
+                    compression=compression
+                )
+
+            return to_arrow, load_arrow
+
+        mode = clickhouse_service.resolve_insert_mode(request.insert_mode)
+        if mode != InsertMode.ROW:
+            # Converting straight into column lists skips building row tuples
+            convert_columns = compile_column_converter(mappings)
+
+            def to_columns(batch: Batch) -> Batch:
+                batch.data = convert_columns(batch.data)
+                batch.nbytes = estimate_columns_bytes(batch.data)
+                return batch
+
+            def load_columns(batch: Batch) -> int:
+                return clickhouse_service.insert_columns(
+                    request.destination_table,
+                    batch.data,
+                    destination_fields,
+                    insert_settings(batch),
+                    mode=mode,
+                    compression=compression
+                )
+
+            return to_columns, load_columns
+
+        convert_rows = compile_row_converter(mappings)
+
+        def transform(batch: Batch) -> Batch:
+            batch.data = convert_rows(batch.data)
+            batch.nbytes = estimate_rows_bytes(batch.data)
+            return batch
+
+        def load(batch: Batch) -> int:
+            return clickhouse_service.insert_rows(
+                request.destination_table,
+                batch.data,
+                destination_fields,
+                insert_settings(batch),
+                compression=compression
+            )
+
+        return transform, load
+
+    async def _extract_batches(
+        self,
+        request: MigrationRequest,
+        source_columns: list[str],
+        key_columns: list[str],
+        key_types: list[str],
+        source_filter: tuple[Optional[str], list],
+        checkpoint: MigrationCheckpoint,
+        batch_rows: Callable[[int, int], int]
+    ) -> AsyncIterator[Batch]:
+        """Yield source batches using keyset pagination, or OFFSET as a fallback."""
+        if checkpoint.completed:
+            return
+
+        offset = 0
+        last_key = None
+        seq = checkpoint.next_seq
+
+        # The checkpoint holds the last loaded key, or without a key the next offset in ctid order
+        if checkpoint.last_key:
+            if key_columns:
+                last_key = tuple(self._decode_values(checkpoint.last_key, key_types))
+            else:
+                offset = json.loads(checkpoint.last_key)[0]
+
+        while True:
+            if key_columns:
+                data = await postgres_service.extract_data_keyset(
+                    request.source_table,
+                    request.source_schema,
+                    source_columns,
+                    key_columns,
+                    last_key,
+                    batch_rows(checkpoint.range_id, seq),
+                    request.source_connection,
+                    as_dicts=False,
+                    predicate=source_filter[0],
+                    predicate_args=source_filter[1]
+                )
+            else:
+                data = await postgres_service.extract_data(
+                    request.source_table,
+                    request.source_schema,
+                    source_columns,
+                    offset,
+                    batch_rows(checkpoint.range_id, seq),
+                    request.source_connection,
+                    as_dicts=False,
+                    order_by_ctid=True
+                )
+
+            if not data:
+                yield Batch(seq=seq, data=None, rows=0, end_of_range=True)
+                return
+
+            if key_columns:
+                last_key = tuple(data[-1][k] for k in key_columns)
+            offset += len(data)
+
+            yield Batch(
+                seq=seq,
+                data=data,
+                rows=len(data),
+                last_key=self._encode_values(last_key if key_columns else [offset]),
+                nbytes=estimate_rows_bytes(data)
+            )
+            seq += 1
+
+    async def _extract_batches_copy(
+        self,
+        request: MigrationRequest,
+        mappings: list[FieldMapping],
+        source_filter: tuple[Optional[str], list],
+        checkpoint: MigrationCheckpoint,
+        batch_rows: Callable[[int, int], int]
+    ) -> AsyncIterator[Batch]:
+        """Yield raw TabSeparated chunks streamed from a single COPY."""
+        if checkpoint.completed:
+            return
+
+        seq = 0
+        async for chunk, rows in postgres_service.stream_copy(
+            request.source_table,
+            request.source_schema,
+            build_copy_expressions(mappings),
+            *source_filter,
+            batch_rows=lambda: batch_rows(checkpoint.range_id, seq),
+            connection=request.source_connection
+        ):
+            yield Batch(seq=seq, data=chunk, rows=rows, nbytes=len(chunk))
+            seq += 1
+
+        yield Batch(seq=seq, data=None, rows=0, end_of_range=True)
+
+    async def _extract_batches_parallel(
         self,
-        data: list[dict],
-        mappings: list[FieldMapping]
-    ) -> list[dict]:
-        """Transform data according to field mappings."""
-        transformed = []
-
-        for record in data:
-            new_record = {}
-
-            for mapping in mappings:
-                value = record.get(mapping.source_field)
-
-                # Handle null values
-                if value is None:
-                    # Set defaults for non-nullable types
-                    dest_type = mapping.destination_type.lower()
-                    if "nullable" not in dest_type:
-                        if "int" in dest_type or "uint" in dest_type:
-                            value = 0
-                        elif "float" in dest_type or "decimal" in dest_type:
-                            value = 0.0
-                        elif "string" in dest_type:
-                            value = ""
-                        elif "array" in dest_type:
-                            value = []
-
-                # Handle boolean to UInt8
-                if isinstance(value, bool):
-                    value = 1 if value else 0
-
-                # Handle arrays (convert to JSON string if needed)
-                if isinstance(value, (list, dict)):
-                    if "array" not in mapping.destination_type.lower():
-                        value = json.dumps(value)
-
-                new_record[mapping.destination_field] = value
-
-            transformed.append(new_record)
-
-        return transformed
+        migration_id: str,
+        request: MigrationRequest,
+        schema: TableSchema,
+        mappings: list[FieldMapping],
+        source_columns: list[str],
+        key_columns: list[str],
+        parallelism: int,
+        source_filter: tuple[Optional[str], list],
+        checkpoints: dict[int, MigrationCheckpoint],
+        batch_rows: Callable[[int, int], int]
+    ) -> AsyncIterator[Batch]:
+        """Yield batches read concurrently from key or ctid ranges of one snapshot.
+
+        Ranges are computed once and stored with the checkpoints, so a resumed
+        run reads exactly the same ranges and skips the completed ones.
+        """
+        select_columns = source_columns + [k for k in key_columns if k not in source_columns]
+        copy_expressions = build_copy_expressions(mappings)
+
+        async with postgres_service.exported_snapshot(
+            request.source_connection,
+            readers=parallelism
+        ) as (pool, conn, snapshot_id):
+            key_types = [next(c.type for c in schema.columns if c.name == k) for k in key_columns]
+
+            if not checkpoints:
+                # More ranges than readers so a skewed range doesn't leave readers idle
+                partitions = parallelism * RANGES_PER_READER
+                if key_columns:
+                    ranges = await postgres_service.compute_key_ranges(
+                        conn,
+                        request.source_table,
+                        request.source_schema,
+                        key_columns[0],
+                        key_types[0],
+                        partitions,
+                        schema.row_count or schema.estimated_rows or 0
+                    )
+                else:
+                    ranges = await postgres_service.compute_ctid_ranges(
+                        conn,
+                        request.source_table,
+                        request.source_schema,
+                        partitions
+                    )
+
+                for range_id, (predicate, args) in enumerate(ranges):
+                    checkpoints[range_id] = MigrationCheckpoint(
+                        migration_id=migration_id,
+                        range_id=range_id,
+                        range_predicate=predicate or "",
+                        range_args=self._encode_values(args)
+                    )
+                await clickhouse_service.run(checkpoint_service.save, list(checkpoints.values()))
+
+            pending: asyncio.Queue = asyncio.Queue()
+            for checkpoint in checkpoints.values():
+                if not checkpoint.completed:
+                    pending.put_nowait(checkpoint)
+            extracted: asyncio.Queue = asyncio.Queue(maxsize=request.queue_depth)
+
+            async def read_ranges():
+                while not pending.empty():
+                    checkpoint = pending.get_nowait()
+                    range_args = json.loads(checkpoint.range_args)
+                    seek = (None, [])
+                    if checkpoint.last_key:
+                        seek = postgres_service.seek_predicate(
+                            key_columns,
+                            self._decode_values(checkpoint.last_key, key_types)
+                        )
+                    predicate, args = postgres_service.combine_predicates(
+                        source_filter,
+                        (
+                            checkpoint.range_predicate or None,
+                            self._decode_values(checkpoint.range_args, key_types[:1] * len(range_args))
+                        ),
+                        seek
+                    )
+                    seq = checkpoint.next_seq
+                    async with self._reader_slots:
+                        if request.extraction_method == ExtractionMethod.COPY:
+                            async for chunk, rows in postgres_service.stream_copy(
+                                request.source_table,
+                                request.source_schema,
+                                copy_expressions,
+                                predicate,
+                                args,
+                                batch_rows=lambda: batch_rows(checkpoint.range_id, seq),
+                                pool=pool,
+                                snapshot_id=snapshot_id
+                            ):
+                                await extracted.put(Batch(
+                                    seq,
+                                    chunk,
+                                    rows,
+                                    range_id=checkpoint.range_id,
+                                    nbytes=len(chunk)
+                                ))
+                                seq += 1
+                        else:
+                            async for data in postgres_service.stream_range(
+                                pool,
+                                snapshot_id,
+                                request.source_table,
+                                request.source_schema,
+                                select_columns,
+                                predicate,
+                                args,
+                                order_by=key_columns,
+                                batch_size=lambda: batch_rows(checkpoint.range_id, seq),
+                                as_dicts=False
+                            ):
+                                last_key = tuple(data[-1][k] for k in key_columns) if key_columns else None
+                                await extracted.put(Batch(
+                                    seq,
+                                    data,
+                                    len(data),
+                                    range_id=checkpoint.range_id,
+                                    last_key=self._encode_values(last_key) if last_key else None,
+                                    nbytes=estimate_rows_bytes(data)
+                                ))
+                                seq += 1
+
+                    await extracted.put(Batch(seq, None, 0, range_id=checkpoint.range_id, end_of_range=True))
+
+            async def run_readers():
+                try:
+                    async with asyncio.TaskGroup() as group:
+                        for _ in range(min(parallelism, pending.qsize())):
+                            group.create_task(read_ranges())
+                except ExceptionGroup as eg:
+                    raise eg.exceptions[0]
+
+            readers = asyncio.create_task(run_readers())
+
+            async for batch in drain_queue(extracted, readers):
+                yield batch
+
+    def source_label(self, conn: Optional[DatabaseConnection] = None) -> str:
+        """Connection string recorded as the migration source in history."""
+        if conn:
+            return f"postgres://{conn.host}:{conn.port}/{conn.database}"
+        return f"postgres://{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
+
+    async def _incremental_window(
+        self,
+        request: MigrationRequest,
+        schema: TableSchema
+    ) -> tuple[tuple[Optional[str], list], dict]:
+        """Build the watermark predicate for this run and the metadata to record."""
+        column = next((c for c in schema.columns if c.name == request.watermark_column), None)
+        if column is None:
+            raise ValueError(
+                f"Watermark column '{request.watermark_column}' not found in "
+                f"{request.source_schema}.{request.source_table}"
+            )
+
+        previous = await clickhouse_service.run(
+            history_service.get_last_watermark,
+            self.source_label(request.source_connection),
+            request.source_table,
+            request.destination_table,
+            request.watermark_column
+        )
+        low = self._decode_value(previous["watermark"], column.type) if previous else None
+
+        # Freeze the upper bound so rows written during the run wait for the next one
+        high = await postgres_service.get_max_value(
+            request.source_table,
+            request.source_schema,
+            request.watermark_column,
+            request.source_connection
+        )
+
+        wm = f'"{request.watermark_column}"'
+        if high is None:
+            source_filter = ("FALSE", [])
+        elif low is None:
+            source_filter = (f"{wm} <= $1", [high])
+        else:
+            source_filter = (f"{wm} > $1 AND {wm} <= $2", [low, high])
+
+        metadata = {
+            "incremental": True,
+            "watermark_column": request.watermark_column,
+            "previous_watermark": previous["watermark"] if previous else None,
+            "watermark": self._encode_value(high) if high is not None else (
+                previous["watermark"] if previous else None
+            )
+        }
+        if metadata["watermark"] is None:
+            del metadata["watermark"]
+
+        return source_filter, metadata
+
+    @staticmethod
+    def _encode_value(value) -> Union[int, str]:
+        """Serialize a key or watermark value for JSON metadata and checkpoints."""
+        if isinstance(value, int):
+            return value
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _decode_value(value, column_type: str):
+        """Restore a stored value to the Python type asyncpg expects for column_type."""
+        column_type = column_type.lower()
+        if column_type.startswith("timestamp"):
+            return datetime.fromisoformat(value)
+        if column_type == "date":
+            return date.fromisoformat(value)
+        if column_type in ("smallint", "integer", "bigint"):
+            return int(value)
+        if column_type in ("numeric", "decimal"):
+            return Decimal(value)
+        return value
+
+    def _encode_values(self, values) -> str:
+        """Serialize a key tuple or range bounds as a JSON list."""
+        return json.dumps([self._encode_value(v) for v in values])
+
+    def _decode_values(self, encoded: str, column_types: list[str]) -> list:
+        """Inverse of _encode_values, given the type of each position."""
+        return [self._decode_value(v, t) for v, t in zip(json.loads(encoded), column_types)]
+
+    @staticmethod
+    def _restart_range(checkpoint: MigrationCheckpoint) -> None:
+        """Read a range again from its start.
+
+        Fetched batches repeat their seq, size and end key, so their tokens
+        dedupe replays. COPY tokens are per run and would not, which is why
+        COPY migrations are never resumed with an unfinished range.
+        """
+        checkpoint.next_seq = 0
+        checkpoint.last_key = None
+        checkpoint.rows_written = 0
+        checkpoint.dedup_token = ""
+        if checkpoint.plan_start_seq:
+            # Sizes before plan_start_seq were dropped; the range is cut afresh
+            checkpoint.plan_start_seq = 0
+            checkpoint.planned_rows = "[]"
+
+    @staticmethod
+    def _offload_location(migration_id: str, request: MigrationRequest) -> tuple[str, str]:
+        """Bucket and object prefix of a migration's offloaded Parquet files."""
+        bucket = request.offload_bucket or settings.minio_bucket
+        return bucket, f"{OFFLOAD_PREFIX}/{request.source_schema}.{request.source_table}/{migration_id}"
+
+    async def _prepare_offload(
+        self,
+        migration_id: str,
+        request: MigrationRequest,
+        checkpoints: dict[int, MigrationCheckpoint]
+    ) -> None:
+        """Create the offload bucket, or on a resume clear files never recorded as loaded.
+
+        Files of unfinished ranges at or past their checkpointed seq were
+        uploaded without a checkpoint. The resumed range rewrites those seqs,
+        possibly with other batch boundaries, so stale files would otherwise
+        be ingested as well.
+        """
+        bucket, prefix = self._offload_location(migration_id, request)
+        if not await asyncio.to_thread(minio_service.bucket_exists, bucket):
+            await asyncio.to_thread(minio_service.create_bucket, bucket)
+            return
+
+        stale = []
+        for checkpoint in checkpoints.values():
+            if checkpoint.completed:
+                continue
+            range_prefix = f"{prefix}/range={checkpoint.range_id:05d}/"
+            for obj in await asyncio.to_thread(minio_service.list_objects, bucket, range_prefix, True):
+                match = re.search(r"part-(\d+)\.parquet$", obj["name"])
+                if match and int(match.group(1)) >= checkpoint.next_seq:
+                    stale.append(obj["name"])
+        await asyncio.to_thread(minio_service.delete_objects, bucket, stale)
+
+    async def _ingest_offload(
+        self,
+        migration_id: str,
+        request: MigrationRequest,
+        table_name: str,
+        destination_fields: list[str],
+        parallelism: int,
+        retry: RetryPolicy
+    ) -> dict:
+        """Have ClickHouse insert every offloaded file itself, several files at a time.
+
+        One INSERT ... SELECT FROM s3() per file, deduplicated by a token
+        naming the file, so re-running the ingestion after a failure skips
+        files that already landed (input order is preserved for that, since
+        a multi-block insert's token is suffixed per block).
+        """
+        bucket, prefix = self._offload_location(migration_id, request)
+        objects = [
+            obj for obj in await asyncio.to_thread(minio_service.list_objects, bucket, f"{prefix}/", True)
+            if obj["name"].endswith(".parquet")
+        ]
+        slots = asyncio.Semaphore(parallelism)
+        started = time.time()
+
+        async def ingest(object_name: str) -> None:
+            async with slots:
+                await retry.run(
+                    lambda: clickhouse_service.run(
+                        clickhouse_service.insert_from_s3,
+                        table_name,
+                        destination_fields,
+                        minio_service.server_url(bucket, object_name),
+                        settings.minio_access_key,
+                        settings.minio_secret_key,
+                        settings={
+                            "insert_deduplication_token": f"{migration_id}:{object_name}",
+                            "input_format_parquet_preserve_order": 1
+                        }
+                    ),
+                    f"Ingestion of {object_name}"
+                )
+
+        await asyncio.gather(*(ingest(obj["name"]) for obj in objects))
+
+        if not request.keep_offload_files:
+            await asyncio.to_thread(minio_service.delete_objects, bucket, [obj["name"] for obj in objects])
+
+        return {
+            "bucket": bucket,
+            "prefix": prefix,
+            "files": len(objects),
+            "bytes": sum(obj["size"] or 0 for obj in objects),
+            "ingest_seconds": round(time.time() - started, 2),
+            "kept": request.keep_offload_files
+        }
+
+    @staticmethod
+    def _shadow_table(migration_id: str, request: MigrationRequest) -> str:
+        """Staging table of a shadow load; derived from the id so a resume finds it again."""
+        return f"{request.destination_table}_shadow_{migration_id.replace('-', '')[:12]}"
+
+    async def _swap_in_shadow(self, request: MigrationRequest, staging_table: str, rows_loaded: int) -> dict:
+        """Check a loaded staging table and swap it in for the destination.
+
+        The staging table must hold exactly the rows the pipeline loaded;
+        otherwise the destination is left untouched and the staging table
+        kept for a resume. Deferred merges are restarted and run to
+        completion first, so readers never see the unmerged parts.
+        """
+        rows = await clickhouse_service.run(clickhouse_service.count_rows, staging_table)
+        if rows != rows_loaded:
+            raise ValueError(
+                f"Staging table {staging_table} holds {rows} rows but {rows_loaded} were loaded; "
+                f"{request.destination_table} was left untouched"
+            )
+
+        if request.defer_merges:
+            await clickhouse_service.run(clickhouse_service.reset_settings, staging_table, list(SHADOW_PART_LIMITS))
+            await clickhouse_service.run(clickhouse_service.set_merges, staging_table, True)
+            await clickhouse_service.run(clickhouse_service.execute_query, f"OPTIMIZE TABLE {staging_table} FINAL")
+
+        replaced = await clickhouse_service.run(
+            clickhouse_service.swap_tables, staging_table, request.destination_table
+        )
+        return {"rows": rows, "replaced_existing": replaced, "swapped_at": datetime.utcnow().isoformat()}
+
+    @staticmethod
+    def _estimate_row_bytes(schema: TableSchema) -> Optional[float]:
+        """Average on-disk row width, the starting point for adaptive batch sizes."""
+        rows = schema.row_count or schema.estimated_rows
+        if not rows or not schema.estimated_size_mb:
+            return None
+        return schema.estimated_size_mb * 1024 * 1024 / rows
+
+    def _destination_ddl(
+        self,
+        request: MigrationRequest,
+        schema: TableSchema,
+        mappings: list[FieldMapping],
+        column_stats: Optional[dict] = None,
+        metadata: Optional[dict] = None
+    ) -> str:
+        """CREATE TABLE for the destination; incremental targets dedupe on the source key.
+
+        With column_stats the layout comes from MappingService.design_table
+        and the design is recorded in metadata.
+        """
+        # Lets plain MergeTree drop batches replayed with a known dedup token
+        table_settings = {"non_replicated_deduplication_window": settings.migration_dedup_window}
+
+        if not request.incremental:
+            if column_stats is None:
+                return mapping_service.generate_ddl_from_mappings(
+                    request.destination_table,
+                    mappings,
+                    table_settings=table_settings
+                )
+
+            design = mapping_service.design_table(schema, mappings, column_stats)
+            if metadata is not None:
+                metadata["table_design"] = design
+            return mapping_service.generate_ddl_from_mappings(
+                request.destination_table,
+                mappings,
+                order_by=design["order_by"],
+                partition_by=design["partition_by"],
+                table_settings={**table_settings, **design["settings"]}
+            )
+
+        # ReplacingMergeTree collapses rows sharing ORDER BY, which must therefore be the full row key
+        by_source = {m.source_field: m.destination_field for m in mappings if not m.skip}
+        unique_key = postgres_service.unique_key(schema)
+        if not unique_key:
+            raise ValueError(
+                f"Incremental migrations need a primary key or NOT NULL unique index on "
+                f"{request.source_schema}.{request.source_table}"
+            )
+        unmapped = [k for k in unique_key if k not in by_source]
+        if unmapped:
+            raise ValueError(f"Incremental migrations must map every key column; missing {', '.join(unmapped)}")
+
+        return mapping_service.generate_ddl_from_mappings(
+            request.destination_table,
+            mappings,
+            order_by=", ".join(by_source[k] for k in unique_key),
+            version_column=by_source.get(request.watermark_column),
+            table_settings=table_settings
+        )
+
+    def _resolve_key_columns(
+        self,
+        request: MigrationRequest,
+        schema: TableSchema
+    ) -> list[str]:
+        """Pick the ordered, unique column(s) used for keyset pagination."""
+        column_names = {col.name for col in schema.columns}
+
+        if request.incremental:
+            # Seek on (watermark, unique key) so equal watermarks page deterministically
+            unique_key = postgres_service.unique_key(schema)
+            if not unique_key:
+                raise ValueError(
+                    f"Incremental migrations need a primary key or NOT NULL unique index on "
+                    f"{request.source_schema}.{request.source_table}"
+                )
+            return [request.watermark_column] + [k for k in unique_key if k != request.watermark_column]
+
+        if request.key_column:
+            if request.key_column not in column_names:
+                raise ValueError(
+                    f"Key column '{request.key_column}' not found in "
+                    f"{request.source_schema}.{request.source_table}"
+                )
+            column = next(c for c in schema.columns if c.name == request.key_column)
+            if column.nullable:
+                raise ValueError(f"Key column '{request.key_column}' must be NOT NULL")
+            # A non-unique key column pages by (key_column, unique key) so ties never straddle a page
+            primary_key = [col.name for col in schema.columns if col.primary_key]
+            if [request.key_column] == primary_key or [request.key_column] in schema.unique_keys:
+                return [request.key_column]
+            unique_key = postgres_service.unique_key(schema)
+            if not unique_key:
+                raise ValueError(
+                    f"Key column '{request.key_column}' is not unique and "
+                    f"{request.source_schema}.{request.source_table} has no primary key or "
+                    f"NOT NULL unique index to break ties"
+                )
+            return [request.key_column] + [k for k in unique_key if k != request.key_column]
+
+        # Primary key columns come back in ordinal order; composite keys use row comparison
+        return [col.name for col in schema.columns if col.primary_key]
 
 
 # Singleton instance
@@ -1,8 +1,12 @@
+import io
+import os
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 from typing import Optional
 from datetime import timedelta
 from config.database import settings
+from services.metrics_service import metrics_service
 
 
 class MinioService:
@@ -93,23 +97,66 @@ class MinioService:
     ):
         """Upload file to bucket."""
         client = self._get_client()
-        client.fput_object(
-            bucket_name=bucket,
-            object_name=object_name,
-            file_path=file_path,
-            content_type=content_type
-        )
+        with metrics_service.minio_seconds.labels("upload").time():
+            client.fput_object(
+                bucket_name=bucket,
+                object_name=object_name,
+                file_path=file_path,
+                content_type=content_type
+            )
+        metrics_service.minio_bytes.labels("upload").inc(os.path.getsize(file_path))
+
+    def put_bytes(
+        self,
+        bucket: str,
+        object_name: str,
+        data: bytes,
+        content_type: str = "application/octet-stream"
+    ):
+        """Upload an in-memory object to bucket."""
+        client = self._get_client()
+        with metrics_service.minio_seconds.labels("upload").time():
+            client.put_object(
+                bucket_name=bucket,
+                object_name=object_name,
+                data=io.BytesIO(data),
+                length=len(data),
+                content_type=content_type
+            )
+        metrics_service.minio_bytes.labels("upload").inc(len(data))
 
     def download_file(self, bucket: str, object_name: str, file_path: str):
         """Download object to local file."""
         client = self._get_client()
-        client.fget_object(bucket_name=bucket, object_name=object_name, file_path=file_path)
+        with metrics_service.minio_seconds.labels("download").time():
+            client.fget_object(bucket_name=bucket, object_name=object_name, file_path=file_path)
+        metrics_service.minio_bytes.labels("download").inc(os.path.getsize(file_path))
 
     def delete_object(self, bucket: str, object_name: str):
         """Delete object from bucket."""
         client = self._get_client()
         client.remove_object(bucket_name=bucket, object_name=object_name)
 
+    def delete_objects(self, bucket: str, object_names: list[str]):
+        """Delete many objects from bucket in bulk requests."""
+        if not object_names:
+            return
+        client = self._get_client()
+        errors = list(client.remove_objects(
+            bucket_name=bucket,
+            delete_object_list=[DeleteObject(name) for name in object_names]
+        ))
+        if errors:
+            raise RuntimeError(f"Failed to delete {len(errors)} objects from {bucket}: {errors[0]}")
+
+    @staticmethod
+    def server_url(bucket: str, object_name: str) -> str:
+        """URL of an object as ClickHouse reaches it, for the s3() table function."""
+        endpoint = settings.minio_clickhouse_endpoint or (
+            f"{'https' if settings.minio_secure else 'http'}://{settings.minio_endpoint}"
+        )
+        return f"{endpoint.rstrip('/')}/{bucket}/{object_name}"
+
     def get_presigned_url(
         self,
         bucket: str,
@@ -1,14 +1,35 @@
+import asyncio
+import json
+import re
 import asyncpg
-from typing import Optional
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Optional, Union
 from config.database import settings
 from models.schema import TableSchema, ColumnDefinition, DatabaseConnection
+from services.migration_pipeline import drain_queue
+
+# information_schema data types that can be split arithmetically into ranges
+INTEGER_KEY_TYPES = {"smallint", "integer", "bigint"}
+
+# COPY chunks buffered between the socket reader and the consumer
+COPY_QUEUE_CHUNKS = 64
+
+# Smallest sample a value profile aims for before trusting its ranges and counts
+PROFILE_MIN_SAMPLE_ROWS = 100_000
+# Extra sample fraction taken so a TABLESAMPLE still yields the requested rows when pages are sparse
+SAMPLE_OVERSHOOT = 1.5
 
 
 class PostgresService:
     def __init__(self):
         self._pool: Optional[asyncpg.Pool] = None
 
-    async def _get_pool(self, connection: Optional[DatabaseConnection] = None) -> asyncpg.Pool:
+    async def _get_pool(
+        self,
+        connection: Optional[DatabaseConnection] = None,
+        max_size: int = 10
+    ) -> asyncpg.Pool:
         """Get or create connection pool."""
         if connection:
             return await asyncpg.create_pool(
@@ -18,7 +39,7 @@ class PostgresService:
                 user=connection.user,
                 password=connection.password,
                 min_size=1,
-                max_size=10
+                max_size=max_size
             )
 
         if self._pool is None:
@@ -29,7 +50,7 @@ class PostgresService:
                 user=settings.postgres_user,
                 password=settings.postgres_password,
                 min_size=1,
-                max_size=10
+                max_size=settings.postgres_pool_max_size
             )
         return self._pool
 
@@ -49,9 +70,10 @@ class PostgresService:
         self,
         table_name: str,
         schema: str = "public",
-        connection: Optional[DatabaseConnection] = None
+        connection: Optional[DatabaseConnection] = None,
+        count_rows: bool = True
     ) -> TableSchema:
-        """Get table schema from PostgreSQL."""
+        """Get table schema from PostgreSQL; count_rows=False skips the exact COUNT(*)."""
         pool = await self._get_pool(connection)
 
         try:
@@ -96,9 +118,33 @@ class PostgresService:
                     for row in rows
                 ]
 
+                # Unique indexes usable as a row key: no predicate, no expressions, no NULLs
+                unique_keys_query = """
+                    SELECT array_agg(a.attname ORDER BY k.ord) AS columns
+                    FROM pg_index i
+                    CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                    WHERE i.indrelid = $1::regclass
+                        AND i.indisunique AND NOT i.indisprimary
+                        AND i.indpred IS NULL AND i.indexprs IS NULL
+                    GROUP BY i.indexrelid
+                    HAVING bool_and(a.attnotnull)
+                    ORDER BY count(*), i.indexrelid
+                """
+                unique_keys = [
+                    list(row["columns"])
+                    for row in await conn.fetch(unique_keys_query, f'"{schema}"."{table_name}"')
+                ]
+
                 # Get row count
-                count_query = f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
-                row_count = await conn.fetchval(count_query)
+                row_count = None
+                if count_rows:
+                    count_query = f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
+                    row_count = await conn.fetchval(count_query)
+                estimated_rows = await conn.fetchval(
+                    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = $1::regclass",
+                    f'"{schema}"."{table_name}"'
+                )
 
                 # Get estimated size
                 size_query = """
@@ -111,7 +157,9 @@ class PostgresService:
                     schema=schema,
                     columns=columns,
                     row_count=row_count,
-                    estimated_size_mb=float(size_mb) if size_mb else 0.0
+                    estimated_rows=estimated_rows,
+                    estimated_size_mb=float(size_mb) if size_mb else 0.0,
+                    unique_keys=unique_keys
                 )
         finally:
             if connection:
@@ -124,22 +172,522 @@ class PostgresService:
         columns: Optional[list[str]] = None,
         offset: int = 0,
         limit: int = 10000,
-        connection: Optional[DatabaseConnection] = None
-    ) -> list[dict]:
-        """Extract data from PostgreSQL table."""
+        connection: Optional[DatabaseConnection] = None,
+        as_dicts: bool = True,
+        order_by_ctid: bool = False
+    ) -> list:
+        """Extract data from PostgreSQL table.
+
+        With as_dicts=False the asyncpg Records are returned untouched for
+        callers that read values positionally. Without an ORDER BY the rows
+        behind an OFFSET may differ between queries; order_by_ctid pins them
+        to physical order so consecutive pages neither skip nor repeat rows.
+        """
         pool = await self._get_pool(connection)
 
         try:
             async with pool.acquire() as conn:
                 cols = ", ".join([f'"{c}"' for c in columns]) if columns else "*"
-                query = f'SELECT {cols} FROM "{schema}"."{table_name}" OFFSET {offset} LIMIT {limit}'
+                order = " ORDER BY ctid" if order_by_ctid else ""
+                query = f'SELECT {cols} FROM "{schema}"."{table_name}"{order} OFFSET {offset} LIMIT {limit}'
 
                 rows = await conn.fetch(query)
-                return [dict(row) for row in rows]
+                return [dict(row) for row in rows] if as_dicts else rows
+        finally:
+            if connection:
+                await pool.close()
+
+    async def sample_rows(
+        self,
+        table_name: str,
+        schema: str = "public",
+        columns: Optional[list[str]] = None,
+        rows: int = 10000,
+        connection: Optional[DatabaseConnection] = None,
+        as_dicts: bool = True
+    ) -> list:
+        """Up to rows rows drawn from pages across the whole table with TABLESAMPLE SYSTEM.
+
+        The sampling rate comes from the planner's row estimate, with some
+        overshoot; the surplus is dropped at random rather than from the end
+        of the table. Tables with no estimate or fewer rows than requested
+        are read in full.
+        """
+        pool = await self._get_pool(connection)
+        table = f'"{schema}"."{table_name}"'
+
+        try:
+            async with pool.acquire() as conn:
+                row_estimate = await conn.fetchval(
+                    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = $1::regclass",
+                    table
+                )
+                cols = ", ".join([f'"{c}"' for c in columns]) if columns else "*"
+                query = f"SELECT {cols} FROM {table}"
+                if row_estimate:
+                    sample_percent = rows / row_estimate * 100 * SAMPLE_OVERSHOOT
+                    if sample_percent < 100:
+                        query += f" TABLESAMPLE SYSTEM ({sample_percent}) ORDER BY random()"
+                query += f" LIMIT {rows}"
+
+                records = await conn.fetch(query)
+                return [dict(row) for row in records] if as_dicts else records
+        finally:
+            if connection:
+                await pool.close()
+
+    async def extract_data_keyset(
+        self,
+        table_name: str,
+        schema: str = "public",
+        columns: Optional[list[str]] = None,
+        key_columns: Optional[list[str]] = None,
+        last_key: Optional[tuple] = None,
+        limit: int = 10000,
+        connection: Optional[DatabaseConnection] = None,
+        as_dicts: bool = True,
+        predicate: Optional[str] = None,
+        predicate_args: Optional[list] = None
+    ) -> list:
+        """Extract the next page of rows after last_key, ordered by key_columns.
+
+        An optional predicate (with its own $1..$n placeholders) further
+        restricts the rows, e.g. to an incremental watermark window.
+        """
+        if not key_columns:
+            raise ValueError("Keyset extraction requires at least one key column")
+
+        pool = await self._get_pool(connection)
+
+        try:
+            async with pool.acquire() as conn:
+                query, args = self.build_keyset_query(
+                    table_name, schema, columns, key_columns, last_key, limit,
+                    predicate, predicate_args
+                )
+                rows = await conn.fetch(query, *args)
+                return [dict(row) for row in rows] if as_dicts else rows
+        finally:
+            if connection:
+                await pool.close()
+
+    @staticmethod
+    def build_keyset_query(
+        table_name: str,
+        schema: str,
+        columns: Optional[list[str]],
+        key_columns: list[str],
+        last_key: Optional[tuple],
+        limit: int,
+        predicate: Optional[str] = None,
+        predicate_args: Optional[list] = None
+    ) -> tuple[str, list]:
+        """Build a seek query: WHERE (k1, k2) > ($1, $2) ORDER BY k1, k2 LIMIT n."""
+        # Key columns are always selected so the caller can read the next seek position
+        select_columns = list(columns) if columns else []
+        if select_columns:
+            select_columns += [k for k in key_columns if k not in select_columns]
+        cols = ", ".join([f'"{c}"' for c in select_columns]) if select_columns else "*"
+
+        keys = ", ".join([f'"{k}"' for k in key_columns])
+        query = f'SELECT {cols} FROM "{schema}"."{table_name}"'
+
+        where, args = PostgresService.combine_predicates(
+            (predicate, predicate_args or []),
+            PostgresService.seek_predicate(key_columns, last_key)
+        )
+        if where:
+            query += f" WHERE {where}"
+
+        query += f" ORDER BY {keys} LIMIT {limit}"
+        return query, args
+
+    @staticmethod
+    def unique_key(schema: TableSchema) -> list[str]:
+        """Columns identifying a row: the primary key, else the narrowest NOT NULL unique index."""
+        primary_key = [col.name for col in schema.columns if col.primary_key]
+        if primary_key:
+            return primary_key
+        return schema.unique_keys[0] if schema.unique_keys else []
+
+    @staticmethod
+    def seek_predicate(key_columns: list[str], last_key: Optional[tuple]) -> tuple[Optional[str], list]:
+        """Predicate selecting rows after last_key: (k1, k2) > ($1, $2)."""
+        if last_key is None:
+            return None, []
+        keys = ", ".join([f'"{k}"' for k in key_columns])
+        placeholders = ", ".join([f"${i + 1}" for i in range(len(key_columns))])
+        return f"({keys}) > ({placeholders})", list(last_key)
+
+    @staticmethod
+    def combine_predicates(*parts: tuple[Optional[str], list]) -> tuple[Optional[str], list]:
+        """AND together predicates that each number their placeholders from $1."""
+        clauses = []
+        args: list = []
+
+        for predicate, predicate_args in parts:
+            if not predicate:
+                continue
+            shift = len(args)
+            renumbered = re.sub(
+                r"\$(\d+)",
+                lambda m: f"${int(m.group(1)) + shift}",
+                predicate
+            )
+            clauses.append(f"({renumbered})")
+            args.extend(predicate_args)
+
+        if not clauses:
+            return None, []
+        return " AND ".join(clauses), args
+
+    async def get_max_value(
+        self,
+        table_name: str,
+        schema: str,
+        column: str,
+        connection: Optional[DatabaseConnection] = None
+    ):
+        """Return MAX(column), e.g. the upper bound of an incremental window."""
+        pool = await self._get_pool(connection)
+
+        try:
+            async with pool.acquire() as conn:
+                return await conn.fetchval(f'SELECT MAX("{column}") FROM "{schema}"."{table_name}"')
+        finally:
+            if connection:
+                await pool.close()
+
+    async def count_rows(
+        self,
+        table_name: str,
+        schema: str,
+        predicate: Optional[str] = None,
+        args: Optional[list] = None,
+        connection: Optional[DatabaseConnection] = None
+    ) -> int:
+        """Count the rows matching predicate."""
+        pool = await self._get_pool(connection)
+
+        try:
+            async with pool.acquire() as conn:
+                query = f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
+                if predicate:
+                    query += f" WHERE {predicate}"
+                return await conn.fetchval(query, *(args or []))
         finally:
             if connection:
                 await pool.close()
 
+    @asynccontextmanager
+    async def exported_snapshot(
+        self,
+        connection: Optional[DatabaseConnection] = None,
+        readers: int = 1
+    ) -> AsyncIterator[tuple[asyncpg.Pool, asyncpg.Connection, str]]:
+        """Hold a REPEATABLE READ transaction open and export its snapshot.
+
+        Yields the pool, the exporting connection and the snapshot id. Readers
+        that import the snapshot see exactly the same data as the exporter, so
+        the transaction must stay open until every reader has started.
+        """
+        pool = await self._get_pool(connection, max_size=readers + 1)
+
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction(isolation="repeatable_read", readonly=True):
+                    snapshot_id = await conn.fetchval("SELECT pg_export_snapshot()")
+                    yield pool, conn, snapshot_id
+        finally:
+            if connection:
+                await pool.close()
+
+    async def compute_key_ranges(
+        self,
+        conn: asyncpg.Connection,
+        table_name: str,
+        schema: str,
+        key_column: str,
+        key_type: str,
+        partitions: int,
+        row_count: int = 0
+    ) -> list[tuple[Optional[str], list]]:
+        """Split a table into key ranges, returned as (predicate, args) pairs.
+
+        Integer keys are split evenly between min and max; other keys use
+        quantiles taken from a TABLESAMPLE of the table.
+        """
+        table = f'"{schema}"."{table_name}"'
+        key = f'"{key_column}"'
+
+        if key_type.lower() in INTEGER_KEY_TYPES:
+            bounds = await conn.fetchrow(f"SELECT MIN({key}) AS lo, MAX({key}) AS hi FROM {table}")
+            lo, hi = bounds["lo"], bounds["hi"]
+            if lo is None:
+                return [(None, [])]
+            step = max(1, (hi - lo + 1) // partitions)
+            boundaries = list(range(lo + step, hi + 1, step))[:partitions - 1]
+        else:
+            # Sample roughly 100k rows to place the quantile boundaries
+            sample_pct = 100.0 if row_count <= 100_000 else max(0.01, 100_000 / row_count * 100)
+            fractions = [i / partitions for i in range(1, partitions)]
+            boundaries = await conn.fetchval(
+                f"SELECT percentile_disc($1::float8[]) WITHIN GROUP (ORDER BY {key}) "
+                f"FROM {table} TABLESAMPLE SYSTEM ($2)",
+                fractions,
+                sample_pct
+            ) or []
+            boundaries = sorted(set(b for b in boundaries if b is not None))
+
+        return self._ranges_from_boundaries(key, boundaries)
+
+    @staticmethod
+    def _ranges_from_boundaries(key: str, boundaries: list) -> list[tuple[Optional[str], list]]:
+        """Turn sorted boundaries into half-open ranges covering the whole key space."""
+        if not boundaries:
+            return [(None, [])]
+
+        ranges = [(f"{key} < $1", [boundaries[0]])]
+        for lower, upper in zip(boundaries, boundaries[1:]):
+            ranges.append((f"{key} >= $1 AND {key} < $2", [lower, upper]))
+        ranges.append((f"{key} >= $1", [boundaries[-1]]))
+        return ranges
+
+    async def compute_ctid_ranges(
+        self,
+        conn: asyncpg.Connection,
+        table_name: str,
+        schema: str,
+        partitions: int
+    ) -> list[tuple[Optional[str], list]]:
+        """Split a keyless table into physical page ranges using ctid."""
+        pages = await conn.fetchval(
+            "SELECT pg_relation_size($1::regclass) / current_setting('block_size')::int",
+            f'"{schema}"."{table_name}"'
+        )
+        if not pages:
+            return [(None, [])]
+
+        step = max(1, (pages + partitions - 1) // partitions)
+        boundaries = list(range(step, pages, step))
+
+        # Block numbers are integers we computed ourselves, so they are inlined as tid literals
+        ranges = []
+        lower = 0
+        for upper in boundaries:
+            ranges.append((f"ctid >= '({lower},0)'::tid AND ctid < '({upper},0)'::tid", []))
+            lower = upper
+        # Leave the last range open-ended in case the relation grew after sizing
+        ranges.append((f"ctid >= '({lower},0)'::tid", []))
+        return ranges
+
+    async def stream_range(
+        self,
+        pool: asyncpg.Pool,
+        snapshot_id: str,
+        table_name: str,
+        schema: str,
+        columns: Optional[list[str]],
+        predicate: Optional[str],
+        args: list,
+        order_by: Optional[list[str]] = None,
+        batch_size: Union[int, Callable[[], int]] = 10000,
+        as_dicts: bool = True
+    ) -> AsyncIterator[list]:
+        """Stream one range of a table inside an imported snapshot.
+
+        batch_size may be a callable, read before every fetch, so the caller
+        can resize batches while the range is being streamed.
+        """
+        cols = ", ".join([f'"{c}"' for c in columns]) if columns else "*"
+        query = f'SELECT {cols} FROM "{schema}"."{table_name}"'
+        if predicate:
+            query += f" WHERE {predicate}"
+        if order_by:
+            query += " ORDER BY " + ", ".join([f'"{k}"' for k in order_by])
+
+        async with pool.acquire() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+                cursor = await conn.cursor(query, *args)
+
+                while True:
+                    rows = await cursor.fetch(batch_size() if callable(batch_size) else batch_size)
+                    if not rows:
+                        return
+                    yield [dict(row) for row in rows] if as_dicts else rows
+
+    async def fetch_in_snapshot(
+        self,
+        pool: asyncpg.Pool,
+        snapshot_id: str,
+        query: str,
+        *args
+    ) -> list[asyncpg.Record]:
+        """Run one query inside an imported snapshot, e.g. an aggregate over a range."""
+        async with pool.acquire() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+                return await conn.fetch(query, *args)
+
+    async def stream_copy(
+        self,
+        table_name: str,
+        schema: str,
+        select_expressions: list[str],
+        predicate: Optional[str] = None,
+        args: Optional[list] = None,
+        batch_rows: Union[int, Callable[[], int]] = 10000,
+        connection: Optional[DatabaseConnection] = None,
+        pool: Optional[asyncpg.Pool] = None,
+        snapshot_id: Optional[str] = None
+    ) -> AsyncIterator[tuple[bytes, int]]:
+        """Stream COPY (SELECT ...) TO STDOUT text output as (chunk, row_count) pairs.
+
+        Chunks always end on a row boundary. Text format escapes embedded
+        newlines, so every newline in the stream terminates exactly one row.
+        Like stream_range's batch_size, batch_rows may be a callable.
+        """
+        query = f'SELECT {", ".join(select_expressions)} FROM "{schema}"."{table_name}"'
+        if predicate:
+            query += f" WHERE {predicate}"
+
+        owns_pool = pool is None
+        if owns_pool:
+            pool = await self._get_pool(connection)
+
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=COPY_QUEUE_CHUNKS)
+
+        async def copy_out():
+            async with pool.acquire() as conn:
+                if snapshot_id:
+                    async with conn.transaction(isolation="repeatable_read", readonly=True):
+                        await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+                        await conn.copy_from_query(query, *(args or []), output=chunks.put, format="text")
+                else:
+                    await conn.copy_from_query(query, *(args or []), output=chunks.put, format="text")
+
+        try:
+            buffer = bytearray()
+            rows = 0
+
+            async for chunk in drain_queue(chunks, asyncio.create_task(copy_out())):
+                buffer += chunk
+                rows += chunk.count(b"\n")
+
+                if rows >= (batch_rows() if callable(batch_rows) else batch_rows):
+                    cut = buffer.rfind(b"\n") + 1
+                    yield bytes(buffer[:cut]), rows
+                    del buffer[:cut]
+                    rows = 0
+
+            if buffer:
+                yield bytes(buffer), buffer.count(b"\n")
+        finally:
+            if owns_pool and connection:
+                await pool.close()
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        connection: Optional[DatabaseConnection] = None
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """Hold a single connection for the lifetime of a long-running job."""
+        pool = await self._get_pool(connection, max_size=1)
+
+        try:
+            async with pool.acquire() as conn:
+                yield conn
+        finally:
+            if connection:
+                await pool.close()
+
+    async def ensure_replication_slot(
+        self,
+        conn: asyncpg.Connection,
+        slot_name: str,
+        plugin: str = "wal2json"
+    ) -> bool:
+        """Create a logical replication slot unless it exists; True if it was created."""
+        exists = await conn.fetchval(
+            "SELECT 1 FROM pg_replication_slots WHERE slot_name = $1",
+            slot_name
+        )
+        if exists:
+            return False
+
+        await conn.execute(
+            "SELECT pg_create_logical_replication_slot($1, $2)",
+            slot_name,
+            plugin
+        )
+        return True
+
+    async def get_replica_identity(self, conn: asyncpg.Connection, table_name: str, schema: str) -> str:
+        """The table's REPLICA IDENTITY: default, nothing, full or index."""
+        code = await conn.fetchval(
+            "SELECT relreplident FROM pg_class WHERE oid = $1::regclass",
+            f'"{schema}"."{table_name}"'
+        )
+        return {"d": "default", "n": "nothing", "f": "full", "i": "index"}[code]
+
+    async def peek_slot_changes(
+        self,
+        conn: asyncpg.Connection,
+        slot_name: str,
+        table_name: str,
+        schema: str,
+        max_changes: int = 10000
+    ) -> list[dict]:
+        """Peek decoded wal2json (format 2) changes for one table without consuming them.
+
+        Changes stay in the slot until advance_slot confirms them, so a crash
+        between reading and writing replays them instead of losing them.
+        Begin/commit rows ("B"/"C") are kept: only a commit LSN is a safe
+        position to advance to. wal2json writes numeric values as bare JSON
+        numbers, so they are parsed as Decimal to keep every digit.
+        """
+        rows = await conn.fetch(
+            """
+            SELECT lsn::text AS lsn, data
+            FROM pg_logical_slot_peek_changes(
+                $1, NULL, $2,
+                'format-version', '2',
+                'add-tables', $3
+            )
+            """,
+            slot_name,
+            max_changes,
+            f"{schema}.{table_name}"
+        )
+        return [{"lsn": row["lsn"], "change": json.loads(row["data"], parse_float=Decimal)} for row in rows]
+
+    async def advance_slot(self, conn: asyncpg.Connection, slot_name: str, lsn: str) -> None:
+        """Confirm everything up to lsn so the slot can release WAL."""
+        await conn.execute(
+            "SELECT pg_replication_slot_advance($1, $2::pg_lsn)",
+            slot_name,
+            lsn
+        )
+
+    async def get_slot_lag(self, conn: asyncpg.Connection, slot_name: str) -> Optional[dict]:
+        """Return the slot's confirmed LSN and how many WAL bytes it trails the server."""
+        row = await conn.fetchrow(
+            """
+            SELECT
+                confirmed_flush_lsn::text AS confirmed_lsn,
+                pg_wal_lsn_diff(pg_current_wal_lsn(), confirmed_flush_lsn)::bigint AS lag_bytes
+            FROM pg_replication_slots
+            WHERE slot_name = $1
+            """,
+            slot_name
+        )
+        return dict(row) if row else None
+
+    async def drop_replication_slot(self, conn: asyncpg.Connection, slot_name: str) -> None:
+        """Drop a logical replication slot."""
+        await conn.execute("SELECT pg_drop_replication_slot($1)", slot_name)
+
     async def get_tables(
         self,
         schema: str = "public",
@@ -162,6 +710,152 @@ class PostgresService:
             if connection:
                 await pool.close()
 
+    async def get_table_sizes(
+        self,
+        schema: str = "public",
+        connection: Optional[DatabaseConnection] = None
+    ) -> list[dict]:
+        """List tables in schema with on-disk size and planner row estimate, largest first.
+
+        Uses catalog statistics only, so it stays fast on schemas with many
+        large tables. Partitions are folded into their partitioned parent.
+        """
+        pool = await self._get_pool(connection)
+
+        try:
+            async with pool.acquire() as conn:
+                query = """
+                    SELECT
+                        c.relname AS table_name,
+                        COALESCE((
+                            SELECT SUM(pg_total_relation_size(p.relid))
+                            FROM pg_partition_tree(c.oid) p
+                        ), 0)::bigint AS size_bytes,
+                        GREATEST(c.reltuples, 0)::bigint AS estimated_rows
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = $1
+                        AND c.relkind IN ('r', 'p')
+                        AND NOT c.relispartition
+                    ORDER BY size_bytes DESC, table_name
+                """
+                rows = await conn.fetch(query, schema)
+                return [dict(row) for row in rows]
+        finally:
+            if connection:
+                await pool.close()
+
+    async def get_column_stats(
+        self,
+        table_name: str,
+        schema: str = "public",
+        connection: Optional[DatabaseConnection] = None
+    ) -> dict:
+        """Planner statistics for a table: its row estimate and per-column pg_stats.
+
+        Columns are keyed by name; histogram_bounds only yields its first and
+        last values, an approximate min/max. Tables never ANALYZEd have no
+        column entries.
+        """
+        pool = await self._get_pool(connection)
+
+        try:
+            async with pool.acquire() as conn:
+                row_estimate = await conn.fetchval(
+                    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = $1::regclass",
+                    f'"{schema}"."{table_name}"'
+                )
+                query = """
+                    SELECT
+                        attname,
+                        null_frac,
+                        n_distinct,
+                        correlation,
+                        avg_width,
+                        (histogram_bounds::text::text[])[1] AS lower_bound,
+                        (histogram_bounds::text::text[])[array_length(histogram_bounds::text::text[], 1)] AS upper_bound
+                    FROM pg_stats
+                    WHERE schemaname = $1 AND tablename = $2
+                    -- Partitioned parents only have inherited stats; prefer the table's own
+                    ORDER BY inherited DESC
+                """
+                rows = await conn.fetch(query, schema, table_name)
+                return {
+                    "row_estimate": row_estimate or 0,
+                    "columns": {row["attname"]: dict(row) for row in rows}
+                }
+        finally:
+            if connection:
+                await pool.close()
+
+    async def profile_columns(
+        self,
+        table_name: str,
+        schema: str,
+        columns: list[ColumnDefinition],
+        sample_percent: float = 1.0,
+        connection: Optional[DatabaseConnection] = None
+    ) -> dict:
+        """Profile column values over a TABLESAMPLE SYSTEM sample in one aggregate query.
+
+        Every column gets its non-null count; integers their min/max, text
+        its distinct count, numerics their largest scale and integer digit
+        count. The sample is enlarged to at least PROFILE_MIN_SAMPLE_ROWS
+        rows where the planner's row estimate allows; at 100% the whole
+        table is read and the profile is exact.
+        """
+        pool = await self._get_pool(connection)
+        table = f'"{schema}"."{table_name}"'
+
+        try:
+            async with pool.acquire() as conn:
+                row_estimate = await conn.fetchval(
+                    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = $1::regclass",
+                    table
+                )
+                if row_estimate:
+                    sample_percent = max(sample_percent, PROFILE_MIN_SAMPLE_ROWS / row_estimate * 100)
+                exact = sample_percent >= 100
+
+                expressions = ["count(*) AS sampled_rows"]
+                for i, column in enumerate(columns):
+                    name = f'"{column.name}"'
+                    pg_type = column.type.lower()
+                    expressions.append(f"count({name}) AS c{i}_non_null")
+                    if pg_type in INTEGER_KEY_TYPES:
+                        expressions.append(f"min({name}) AS c{i}_min")
+                        expressions.append(f"max({name}) AS c{i}_max")
+                    elif pg_type in ("text", "character varying", "character"):
+                        expressions.append(f"count(DISTINCT {name}) AS c{i}_distinct")
+                    elif pg_type in ("numeric", "decimal"):
+                        expressions.append(f"max(scale({name})) AS c{i}_scale")
+                        expressions.append(f"max(length(trunc(abs({name}))::text)) AS c{i}_integer_digits")
+
+                query = f"SELECT {', '.join(expressions)} FROM {table}"
+                if not exact:
+                    query += f" TABLESAMPLE SYSTEM ({sample_percent})"
+                row = await conn.fetchrow(query)
+
+                profiles = {}
+                for i, column in enumerate(columns):
+                    prefix = f"c{i}_"
+                    profile = {"rows": row["sampled_rows"]}
+                    for key in row.keys():
+                        if key.startswith(prefix):
+                            value = row[key]
+                            profile[key[len(prefix):]] = int(value) if value is not None else None
+                    profiles[column.name] = profile
+
+                return {
+                    "sampled_rows": row["sampled_rows"],
+                    "sample_percent": round(min(sample_percent, 100.0), 4),
+                    "exact": exact,
+                    "columns": profiles
+                }
+        finally:
+            if connection:
+                await pool.close()
+
     async def close(self):
         """Close connection pool."""
         if self._pool:
@@ -0,0 +1,198 @@
+import asyncio
+import fnmatch
+import uuid
+from datetime import datetime
+from typing import Optional
+from config.database import settings
+from models.migration import (
+    MigrationRequest,
+    MigrationStatus,
+    MigrationProgress,
+    MigrationStatusResponse,
+    SchemaMigrationRequest,
+    TableMigrationState
+)
+from services.postgres_service import postgres_service
+from services.mapping_service import mapping_service
+from services.migration_service import migration_service
+
+
+class SchemaMigrationService:
+    """Migrate every matching table of a Postgres schema as one job.
+
+    Table workers take tables largest first, so the longest migration starts
+    right away instead of becoming the tail of the job. Each table runs as a
+    regular migration (own history record, checkpoints and scheduler slot);
+    the job rolls their progress up.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, MigrationStatusResponse] = {}
+        # The event loop keeps only weak references to tasks; these keep running jobs alive
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start_job(self, request: SchemaMigrationRequest) -> str:
+        """Select the schema's tables and start migrating them; returns the job ID."""
+        tables = await postgres_service.get_table_sizes(
+            request.source_schema,
+            request.source_connection
+        )
+        selected = [
+            t for t in tables
+            if self._matches(t["table_name"], request.include, request.exclude)
+        ]
+
+        if not selected:
+            raise ValueError(
+                f"No tables in schema '{request.source_schema}' match the include/exclude patterns"
+            )
+
+        job_id = str(uuid.uuid4())
+        # The scheduler admits only migration_max_per_source migrations of one source;
+        # more workers would just wait in its queue
+        workers = min(request.table_workers, settings.migration_max_per_source, len(selected))
+        # get_table_sizes already returns the largest tables first
+        states = [
+            TableMigrationState(
+                source_table=t["table_name"],
+                destination_table=f"{request.destination_prefix}{t['table_name']}",
+                size_bytes=t["size_bytes"],
+                total_records=t["estimated_rows"]
+            )
+            for t in selected
+        ]
+
+        self._jobs[job_id] = MigrationStatusResponse(
+            id=job_id,
+            status=MigrationStatus.RUNNING,
+            progress=MigrationProgress(
+                total_records=sum(s.total_records for s in states),
+                processed_records=0,
+                percentage=0.0,
+                pagination="schema",
+                parallelism=workers
+            ),
+            started_at=datetime.utcnow(),
+            tables=states
+        )
+
+        task = asyncio.create_task(self._run_job(job_id, request, workers))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return job_id
+
+    def get_status(self, job_id: str) -> Optional[MigrationStatusResponse]:
+        """Get status of a schema job with progress rolled up across its tables."""
+        status = self._jobs.get(job_id)
+        if status is None:
+            return None
+
+        for state in status.tables:
+            self._refresh(state)
+
+        total = sum(max(s.total_records, s.processed_records) for s in status.tables)
+        processed = sum(s.processed_records for s in status.tables)
+        status.progress.total_records = total
+        status.progress.processed_records = processed
+        if status.status == MigrationStatus.COMPLETED:
+            status.progress.percentage = 100.0
+        else:
+            status.progress.percentage = round(processed / total * 100, 2) if total > 0 else 0.0
+
+        return status
+
+    async def _run_job(self, job_id: str, request: SchemaMigrationRequest, workers: int) -> None:
+        status = self._jobs[job_id]
+        pending: asyncio.Queue = asyncio.Queue()
+        for state in status.tables:
+            pending.put_nowait(state)
+
+        async def worker():
+            while not pending.empty():
+                await self._migrate_table(job_id, request, pending.get_nowait())
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        for state in status.tables:
+            self._refresh(state)
+        failed = [s.source_table for s in status.tables if s.status == MigrationStatus.FAILED]
+
+        if failed:
+            status.status = MigrationStatus.FAILED
+            status.error_message = f"{len(failed)} of {len(status.tables)} tables failed: {', '.join(failed)}"
+        else:
+            status.status = MigrationStatus.COMPLETED
+        status.completed_at = datetime.utcnow()
+        self.get_status(job_id)
+
+    async def _migrate_table(
+        self,
+        job_id: str,
+        request: SchemaMigrationRequest,
+        state: TableMigrationState
+    ) -> None:
+        """Run one table's migration to completion, recording any failure on its state."""
+        try:
+            # The migration counts rows itself; an extra COUNT(*) here would scan twice
+            schema = await postgres_service.get_table_schema(
+                state.source_table,
+                request.source_schema,
+                request.source_connection,
+                count_rows=False
+            )
+            mappings = mapping_service.generate_mappings(schema, state.destination_table)["mappings"]
+
+            state.migration_id = await migration_service.execute_migration(MigrationRequest(
+                source_connection=request.source_connection,
+                source_schema=request.source_schema,
+                source_table=state.source_table,
+                destination_table=state.destination_table,
+                mappings=mappings,
+                create_table=request.create_table,
+                batch_size=request.batch_size,
+                adaptive_batch_size=request.adaptive_batch_size,
+                parallelism=request.parallelism,
+                extraction_method=request.extraction_method,
+                insert_mode=request.insert_mode,
+                insert_compression=request.insert_compression,
+                optimize_table=request.optimize_table,
+                shadow_load=request.shadow_load,
+                defer_merges=request.defer_merges,
+                priority=request.priority,
+                description=request.description or f"Schema migration {job_id}",
+                created_by=request.created_by
+            ))
+            await migration_service.wait_for_migration(state.migration_id)
+
+        except Exception as e:
+            state.status = MigrationStatus.FAILED
+            state.error_message = str(e)
+
+    @staticmethod
+    def _refresh(state: TableMigrationState) -> None:
+        """Copy a table's live migration status onto its job entry."""
+        if not state.migration_id:
+            return
+        table_status = migration_service.get_migration_status(state.migration_id)
+        if table_status is None:
+            return
+
+        state.status = table_status.status
+        state.error_message = table_status.error_message
+        if table_status.progress:
+            if table_status.progress.total_records:
+                state.total_records = table_status.progress.total_records
+            state.processed_records = table_status.progress.processed_records
+
+    @staticmethod
+    def _matches(table: str, include: list[str], exclude: list[str]) -> bool:
+        """Shell-style patterns: a table must match an include and no exclude."""
+        return (
+            any(fnmatch.fnmatchcase(table, pattern) for pattern in include)
+            and not any(fnmatch.fnmatchcase(table, pattern) for pattern in exclude)
+        )
+
+
+# Singleton instance
+schema_migration_service = SchemaMigrationService()
@@ -0,0 +1,438 @@
+import asyncio
+import json
+import logging
+import time
+import asyncpg
+from datetime import datetime
+from typing import Optional, Union
+from config.database import settings
+from models.schema import FieldMapping, TableSchema
+from models.migration import (
+    ChunkMismatch,
+    MigrationRequest,
+    MigrationStatus,
+    VerificationRequest,
+    VerificationResult
+)
+from services.postgres_service import postgres_service, INTEGER_KEY_TYPES
+from services.clickhouse_service import clickhouse_service
+from services.history_service import history_service
+from services.migration_service import migration_service
+from utils.checksum_sql import HASH_MODULUS, ChecksumPlan, build_checksum_plan, destination_hash, source_hash
+
+logger = logging.getLogger(__name__)
+
+# Drill-down depth after which remaining mismatched chunks are reported as they are
+MAX_LEVELS = 8
+
+
+class _KeyRangeChunking:
+    """Chunks are equal-width ranges of a single integer key; each level narrows them by fanout."""
+
+    name = "key-range"
+    scans_table = False
+
+    def __init__(self, source_key: str, destination_key: str, lo: int, width: int, fanout: int):
+        self.source_key = f'"{source_key}"'
+        self.destination_key = f"toInt64(`{destination_key}`)"
+        self.label = source_key
+        self.lo = lo
+        self.base_width = width
+        self.fanout = fanout
+
+    def width(self, level: int) -> int:
+        return max(1, -(-self.base_width // self.fanout ** level))
+
+    def bucket(self, level: int) -> tuple[str, str]:
+        # Destination rows below the source minimum get their own chunk, -1
+        w = self.width(level)
+        return (
+            f"CASE WHEN {self.source_key} < {self.lo} THEN -1 ELSE ({self.source_key}::bigint - {self.lo}) / {w} END",
+            f"if({self.destination_key} < {self.lo}, -1, intDiv({self.destination_key} - {self.lo}, {w}))"
+        )
+
+    def _bounds(self, level: int, chunk: int) -> tuple[Optional[int], int]:
+        if chunk < 0:
+            return None, self.lo
+        w = self.width(level)
+        return self.lo + chunk * w, self.lo + (chunk + 1) * w
+
+    def where(self, level: int, chunks: list[int]) -> tuple[str, str]:
+        source, destination = [], []
+        for chunk in chunks:
+            lower, upper = self._bounds(level, chunk)
+            if lower is None:
+                source.append(f"{self.source_key} < {upper}")
+                destination.append(f"{self.destination_key} < {upper}")
+            else:
+                source.append(f"({self.source_key} >= {lower} AND {self.source_key} < {upper})")
+                destination.append(f"({self.destination_key} >= {lower} AND {self.destination_key} < {upper})")
+        return f"({' OR '.join(source)})", f"({' OR '.join(destination)})"
+
+    def splittable(self, level: int, chunk: int) -> bool:
+        return chunk >= 0 and self.width(level) > 1
+
+    def describe(self, level: int, chunk: int) -> str:
+        lower, upper = self._bounds(level, chunk)
+        if lower is None:
+            return f"{self.label} < {upper}"
+        return f"{self.label} in [{lower}, {upper})"
+
+
+class _HashChunking:
+    """Chunks are residues of a key (or whole-row) hash; each level multiplies the modulus by fanout."""
+
+    scans_table = True
+
+    def __init__(self, source_hash_expr: str, destination_hash_expr: str, chunks: int, fanout: int, label: str):
+        self.source_hash = source_hash_expr
+        self.destination_hash = destination_hash_expr
+        self.chunks = chunks
+        self.fanout = fanout
+        self.label = label
+        self.name = f"{label}-hash"
+
+    def modulus(self, level: int) -> int:
+        return self.chunks * self.fanout ** level
+
+    def bucket(self, level: int) -> tuple[str, str]:
+        m = self.modulus(level)
+        return f"{self.source_hash} % {m}", f"{self.destination_hash} % {m}"
+
+    def where(self, level: int, chunks: list[int]) -> tuple[str, str]:
+        m = self.modulus(level)
+        values = ", ".join(str(c) for c in chunks)
+        return f"{self.source_hash} % {m} IN ({values})", f"{self.destination_hash} % {m} IN ({values})"
+
+    def splittable(self, level: int, chunk: int) -> bool:
+        return True
+
+    def describe(self, level: int, chunk: int) -> str:
+        return f"hash({self.label}) % {self.modulus(level)} = {chunk}"
+
+
+class VerificationService:
+    """Prove a migrated table matches its source without moving rows into Python.
+
+    Both databases reduce every chunk of the key space to a row count and
+    the sum, modulo 2^64, of a 60-bit MD5 over each row's canonical text.
+    The sum is order independent, so each side scans however it likes:
+    Postgres in parallel ctid ranges of one exported snapshot, ClickHouse
+    as a single GROUP BY. Only chunks whose aggregates differ are split
+    further; the small mismatched chunks left at the end are compared key
+    by key.
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, VerificationResult] = {}
+        # The event loop keeps only weak references to tasks; these keep running verifications alive
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self, migration_id: str, request: VerificationRequest) -> VerificationResult:
+        """Start verifying a finished migration; the result is also written to its history."""
+        current = self._jobs.get(migration_id)
+        if current and current.status == MigrationStatus.RUNNING:
+            raise ValueError(f"Migration {migration_id} is already being verified")
+
+        record, migration = await migration_service.load_request(migration_id, request.source_connection)
+        mappings = [m for m in migration.mappings if not m.skip]
+
+        result = VerificationResult(
+            migration_id=migration_id,
+            status=MigrationStatus.RUNNING,
+            started_at=datetime.utcnow()
+        )
+        self._jobs[migration_id] = result
+        task = asyncio.create_task(self._run(result, record, migration, mappings, request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return result
+
+    async def get_result(self, migration_id: str) -> Optional[VerificationResult]:
+        """The running or latest verification of a migration, from memory or its history record."""
+        if migration_id in self._jobs:
+            return self._jobs[migration_id]
+
+        record = await clickhouse_service.run(history_service.get_migration_by_id, migration_id)
+        if record is None:
+            return None
+        stored = json.loads(record.get("metadata") or "{}").get("verification")
+        return VerificationResult(**stored) if stored else None
+
+    async def _run(
+        self,
+        result: VerificationResult,
+        record: dict,
+        migration: MigrationRequest,
+        mappings: list[FieldMapping],
+        request: VerificationRequest
+    ) -> None:
+        start_time = time.time()
+        try:
+            await self._verify(result, migration, mappings, request)
+            result.status = MigrationStatus.COMPLETED
+        except Exception as e:
+            result.status = MigrationStatus.FAILED
+            result.error_message = str(e)
+            logger.exception("Verification of %s failed", result.migration_id)
+        finally:
+            result.completed_at = datetime.utcnow()
+            result.duration_seconds = round(time.time() - start_time, 2)
+
+        try:
+            metadata = json.loads(record.get("metadata") or "{}")
+            metadata["verification"] = result.model_dump(mode="json")
+            await clickhouse_service.run(history_service.update_metadata, result.migration_id, metadata)
+        except Exception:
+            logger.exception("Could not store verification of %s", result.migration_id)
+
+    async def _verify(
+        self,
+        result: VerificationResult,
+        migration: MigrationRequest,
+        mappings: list[FieldMapping],
+        request: VerificationRequest
+    ) -> None:
+        schema = await postgres_service.get_table_schema(
+            migration.source_table,
+            migration.source_schema,
+            migration.source_connection,
+            count_rows=False
+        )
+        key_fields = [c.name for c in schema.columns if c.primary_key]
+        plan = build_checksum_plan(mappings, key_fields)
+        result.verified_columns = plan.columns
+        result.unverified_columns = plan.unverified_columns
+
+        definition = await clickhouse_service.run(clickhouse_service.get_table_engine, migration.destination_table)
+        if definition is None:
+            raise ValueError(f"Destination table {migration.destination_table} does not exist")
+        # Replacing/Collapsing tables may still hold superseded versions until merged
+        final = " FINAL" if "Replacing" in definition[0] or "Collapsing" in definition[0] else ""
+
+        source_table = f'"{migration.source_schema}"."{migration.source_table}"'
+        destination_table = f"{migration.destination_table}{final}"
+        parallelism = min(request.parallelism, settings.migration_max_parallelism)
+
+        async with postgres_service.exported_snapshot(
+            migration.source_connection,
+            readers=parallelism
+        ) as (pool, conn, snapshot_id):
+            chunking = await self._chunking(conn, source_table, schema, mappings, plan, request)
+            result.chunking = chunking.name
+            partitions = await postgres_service.compute_ctid_ranges(
+                conn,
+                migration.source_table,
+                migration.source_schema,
+                parallelism
+            )
+
+            async def aggregate(level: int, where: tuple[Optional[str], Optional[str]]):
+                source_bucket, destination_bucket = chunking.bucket(level)
+                ranges = partitions if level == 0 or chunking.scans_table else [(None, [])]
+                source_queries = [
+                    self._source_aggregate_query(source_table, source_bucket, plan, where[0], ctid)
+                    for ctid, _ in ranges
+                ]
+                destination_query = self._destination_aggregate_query(
+                    destination_table, destination_bucket, plan, where[1]
+                )
+                source_parts = await asyncio.gather(
+                    *(postgres_service.fetch_in_snapshot(pool, snapshot_id, q) for q in source_queries),
+                    clickhouse_service.run(clickhouse_service.execute_query, destination_query)
+                )
+                destination = source_parts.pop()
+                return self._merge(row for part in source_parts for row in part), self._merge(destination["data"])
+
+            source, destination = await aggregate(0, (None, None))
+            result.source_rows = sum(rows for rows, _ in source.values())
+            result.destination_rows = sum(rows for rows, _ in destination.values())
+            result.chunks = len(source.keys() | destination.keys())
+
+            frontier = self._mismatched(source, destination)
+            result.mismatched_chunks = len(frontier)
+            level = 0
+            leaves: list[tuple[int, int, int, int]] = []
+
+            while frontier:
+                if len(frontier) > request.max_drill_chunks:
+                    result.truncated = True
+                    frontier = frontier[:request.max_drill_chunks]
+
+                split = []
+                for chunk, source_rows, destination_rows in frontier:
+                    if (
+                        level + 1 < MAX_LEVELS
+                        and chunking.splittable(level, chunk)
+                        and max(source_rows, destination_rows) > request.leaf_rows
+                    ):
+                        split.append(chunk)
+                    else:
+                        leaves.append((level, chunk, source_rows, destination_rows))
+                if not split:
+                    break
+
+                source, destination = await aggregate(level + 1, chunking.where(level, split))
+                level += 1
+                frontier = self._mismatched(source, destination)
+
+            result.levels = level + 1
+            leaves = leaves[:request.max_drill_chunks]
+            result.chunk_mismatches = [
+                ChunkMismatch(
+                    level=leaf_level,
+                    chunk=chunking.describe(leaf_level, chunk),
+                    source_rows=source_rows,
+                    destination_rows=destination_rows
+                )
+                for leaf_level, chunk, source_rows, destination_rows in leaves
+            ]
+
+            for leaf_level, chunk, _, _ in leaves:
+                source_where, destination_where = chunking.where(leaf_level, [chunk])
+                source_rows, destination_rows = await asyncio.gather(
+                    postgres_service.fetch_in_snapshot(
+                        pool,
+                        snapshot_id,
+                        self._source_rows_query(source_table, plan, source_where, request.leaf_rows + 1)
+                    ),
+                    clickhouse_service.run(
+                        clickhouse_service.execute_query,
+                        self._destination_rows_query(destination_table, plan, destination_where, request.leaf_rows + 1)
+                    )
+                )
+                self._compare_rows(
+                    result,
+                    [(r["key"], r["hash"]) for r in source_rows],
+                    [(r["key"], r["hash"]) for r in destination_rows["data"]],
+                    request
+                )
+
+        result.matched = result.mismatched_chunks == 0
+
+    async def _chunking(
+        self,
+        conn: asyncpg.Connection,
+        source_table: str,
+        schema: TableSchema,
+        mappings: list[FieldMapping],
+        plan: ChecksumPlan,
+        request: VerificationRequest
+    ) -> Union[_KeyRangeChunking, _HashChunking]:
+        """Split on a single integer primary key when there is one, otherwise on a key or row hash."""
+        key_columns = [c for c in schema.columns if c.primary_key]
+        by_source = {m.source_field: m for m in mappings}
+
+        if (
+            len(key_columns) == 1
+            and key_columns[0].type.lower() in INTEGER_KEY_TYPES
+            and plan.source_key_text is not None
+        ):
+            key = key_columns[0].name
+            bounds = await conn.fetchrow(f'SELECT MIN("{key}") AS lo, MAX("{key}") AS hi FROM {source_table}')
+            lo = bounds["lo"] if bounds["lo"] is not None else 0
+            hi = bounds["hi"] if bounds["hi"] is not None else 0
+            width = max(1, -(-(hi - lo + 1) // request.chunks))
+            return _KeyRangeChunking(key, by_source[key].destination_field, lo, width, request.fanout)
+
+        if plan.source_key_text is not None:
+            return _HashChunking(
+                source_hash(plan.source_key_text),
+                destination_hash(plan.destination_key_text),
+                request.chunks,
+                request.fanout,
+                "key"
+            )
+
+        return _HashChunking(plan.source_row_hash, plan.destination_row_hash, request.chunks, request.fanout, "row")
+
+    @staticmethod
+    def _source_aggregate_query(
+        table: str,
+        bucket: str,
+        plan: ChecksumPlan,
+        where: Optional[str],
+        ctid_range: Optional[str]
+    ) -> str:
+        predicates = [p for p in (where, ctid_range) if p]
+        query = f"SELECT {bucket} AS chunk, count(*) AS row_count, sum({plan.source_row_hash}) AS checksum FROM {table}"
+        if predicates:
+            query += " WHERE " + " AND ".join(predicates)
+        return query + " GROUP BY 1"
+
+    @staticmethod
+    def _destination_aggregate_query(table: str, bucket: str, plan: ChecksumPlan, where: Optional[str]) -> str:
+        # sum() over UInt64 wraps modulo 2^64, matching the reduction applied to Postgres' exact sum
+        query = f"SELECT {bucket} AS chunk, count() AS row_count, sum({plan.destination_row_hash}) AS checksum FROM {table}"
+        if where:
+            query += f" WHERE {where}"
+        return query + " GROUP BY chunk"
+
+    @staticmethod
+    def _source_rows_query(table: str, plan: ChecksumPlan, where: str, limit: int) -> str:
+        key = plan.source_key_text or "NULL"
+        return f"SELECT {key} AS key, {plan.source_row_hash} AS hash FROM {table} WHERE {where} LIMIT {limit}"
+
+    @staticmethod
+    def _destination_rows_query(table: str, plan: ChecksumPlan, where: str, limit: int) -> str:
+        key = plan.destination_key_text or "NULL"
+        return f"SELECT {key} AS key, {plan.destination_row_hash} AS hash FROM {table} WHERE {where} LIMIT {limit}"
+
+    @staticmethod
+    def _merge(rows) -> dict[int, tuple[int, int]]:
+        """Add up per-chunk (row_count, checksum) partials, checksums modulo 2^64."""
+        merged: dict[int, tuple[int, int]] = {}
+        for row in rows:
+            count, checksum = merged.get(row["chunk"], (0, 0))
+            merged[row["chunk"]] = (
+                count + int(row["row_count"]),
+                (checksum + int(row["checksum"] or 0)) % HASH_MODULUS
+            )
+        return merged
+
+    @staticmethod
+    def _mismatched(source: dict, destination: dict) -> list[tuple[int, int, int]]:
+        """(chunk, source_rows, destination_rows) for chunks whose aggregates differ."""
+        return [
+            (chunk, source.get(chunk, (0, 0))[0], destination.get(chunk, (0, 0))[0])
+            for chunk in sorted(source.keys() | destination.keys())
+            if source.get(chunk) != destination.get(chunk)
+        ]
+
+    @staticmethod
+    def _compare_rows(
+        result: VerificationResult,
+        source: list[tuple[Optional[str], int]],
+        destination: list[tuple[Optional[str], int]],
+        request: VerificationRequest
+    ) -> None:
+        """Classify a leaf chunk's rows as missing, extra or changed; keyless rows go by hash."""
+        if len(source) > request.leaf_rows or len(destination) > request.leaf_rows:
+            # Comparing partial listings would report rows that are merely unlisted
+            result.truncated = True
+            return
+
+        def by_key(rows):
+            grouped: dict[str, list[int]] = {}
+            for key, row_hash in rows:
+                grouped.setdefault(key if key is not None else format(int(row_hash), "015x"), []).append(int(row_hash))
+            return grouped
+
+        source_keys, destination_keys = by_key(source), by_key(destination)
+        for key in sorted(source_keys.keys() | destination_keys.keys()):
+            source_hashes = sorted(source_keys.get(key, []))
+            destination_hashes = sorted(destination_keys.get(key, []))
+            if source_hashes == destination_hashes:
+                continue
+            if len(source_hashes) > len(destination_hashes):
+                target = result.missing_keys
+            elif len(source_hashes) < len(destination_hashes):
+                target = result.extra_keys
+            else:
+                target = result.changed_keys
+            if len(target) < request.sample_keys:
+                target.append(key)
+
+
+# Singleton instance
+verification_service = VerificationService()
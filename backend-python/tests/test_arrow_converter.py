@@ -0,0 +1,83 @@
+import ipaddress
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pyarrow as pa
+import pytest
+
+from models.schema import FieldMapping
+from utils.arrow_converter import build_arrow_table, clickhouse_to_arrow_type
+
+
+def convert(values, source_type, destination_type):
+    mapping = FieldMapping(
+        source_field="c",
+        source_type=source_type,
+        destination_field="c",
+        destination_type=destination_type
+    )
+    return build_arrow_table([(v,) for v in values], [mapping]).column(0).to_pylist()
+
+
+@pytest.mark.parametrize("destination_type", ["DateTime", "Nullable(DateTime)"])
+def test_sub_second_timestamps_are_floored_to_seconds(destination_type):
+    value = datetime(2024, 1, 1, 12, 30, 45, 987654)
+    assert convert([value], "timestamp", destination_type) == [datetime(2024, 1, 1, 12, 30, 45)]
+
+
+def test_tz_aware_timestamps_are_floored_to_datetime64_unit():
+    value = datetime(2024, 1, 1, 12, 30, 45, 987654, tzinfo=timezone(timedelta(hours=2)))
+    result = convert([value, None], "timestamp with time zone", "Nullable(DateTime64(3))")
+    assert result == [datetime(2024, 1, 1, 10, 30, 45, 987000), None]
+
+
+def test_decimal_scale_overflow_is_truncated():
+    values = [Decimal("1.234"), Decimal("-5.559"), None]
+    result = convert(values, "numeric", "Nullable(Decimal(10, 2))")
+    assert result == [Decimal("1.23"), Decimal("-5.55"), None]
+
+
+def test_decimal_precision_overflow_still_raises():
+    with pytest.raises(pa.ArrowInvalid):
+        convert([Decimal("123456789012.5")], "numeric", "Decimal(10, 2)")
+
+
+def test_integer_overflow_still_raises():
+    with pytest.raises(pa.ArrowInvalid):
+        convert([70000], "integer", "Int16")
+
+
+@pytest.mark.parametrize("ch_type, expected", [
+    ("Decimal32(2)", pa.decimal128(9, 2)),
+    ("Nullable(Decimal64(4))", pa.decimal128(18, 4)),
+    ("Decimal128(38)", pa.decimal128(38, 38)),
+    ("Decimal256(10)", pa.decimal256(76, 10)),
+    ("Decimal(10, 2)", pa.decimal128(10, 2)),
+])
+def test_sized_decimals_have_fixed_arrow_types(ch_type, expected):
+    assert clickhouse_to_arrow_type(ch_type) == expected
+
+
+def test_uuid_values_become_text():
+    value = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    assert convert([value, None], "uuid", "Nullable(UUID)") == [str(value), None]
+
+
+def test_bytea_stays_binary_in_string_columns():
+    result = convert([b"\xff\x00raw", None], "bytea", "String")
+    assert result == [b"\xff\x00raw", b""]
+
+
+@pytest.mark.parametrize("value", [
+    ipaddress.ip_interface("10.0.0.1/24"),
+    ipaddress.ip_address("2001:db8::1"),
+    ipaddress.ip_network("192.168.0.0/16"),
+])
+def test_inet_and_cidr_values_become_text(value):
+    assert convert([value], "inet", "String") == [str(value)]
+
+
+def test_interval_values_become_seconds():
+    result = convert([timedelta(hours=1, seconds=1.5), None], "interval", "Nullable(Float64)")
+    assert result == [3601.5, None]
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+
+from models.schema import FieldMapping
+from services.postgres_service import postgres_service
+from services.cdc_service import DELETED_COLUMN, VERSION_COLUMN, cdc_service, parse_pg_array
+from utils.transform_plan import compile_row_converter
+
+MAPPINGS = [
+    FieldMapping(source_field="id", source_type="bigint", destination_field="id", destination_type="Int64"),
+    FieldMapping(source_field="active", source_type="boolean", destination_field="active", destination_type="UInt8"),
+    FieldMapping(source_field="tags", source_type="ARRAY", destination_field="tags", destination_type="Array(String)"),
+    FieldMapping(source_field="scores", source_type="integer[]", destination_field="scores", destination_type="String"),
+    FieldMapping(source_field="body", source_type="text", destination_field="body", destination_type="Nullable(String)"),
+]
+
+
+def columns(**values):
+    return [{"name": name, "value": value} for name, value in values.items()]
+
+
+def to_rows(*changes):
+    items = [{"lsn": f"0/{i + 1:X}", "change": change} for i, change in enumerate(changes)]
+    return cdc_service._changes_to_rows(items, MAPPINGS, compile_row_converter(MAPPINGS), ["id"])
+
+
+def test_update_keeps_unchanged_toasted_column_from_old_tuple():
+    old = columns(id=1, active=True, tags="{a}", scores="{1,2}", body="long toasted text")
+    rows = to_rows({
+        "action": "U",
+        "columns": columns(id=1, active=False, tags="{a,b}", scores="{3}"),
+        "identity": old
+    })
+
+    assert len(rows) == 1
+    assert rows[0]["body"] == "long toasted text"
+    assert rows[0][DELETED_COLUMN] == 0
+
+
+def test_missing_column_without_old_value_raises():
+    with pytest.raises(ValueError, match="no value for body"):
+        to_rows({"action": "U", "columns": columns(id=1, active=True, tags="{}", scores="{}")})
+
+
+def test_values_are_converted_like_bulk_loads():
+    row = to_rows({
+        "action": "I",
+        "columns": columns(id=7, active=True, tags='{x,"y z",NULL}', scores="{1,2}", body=None)
+    })[0]
+
+    assert row["active"] == 1
+    assert row["tags"] == ["x", "y z", None]
+    assert row["scores"] == "[1, 2]"
+    assert row[VERSION_COLUMN] == 1
+
+
+def test_delete_uses_full_old_tuple():
+    old = columns(id=1, active=False, tags="{}", scores="{}", body="b")
+    row = to_rows({"action": "D", "identity": old})[0]
+
+    assert row["id"] == 1
+    assert row[DELETED_COLUMN] == 1
+
+
+def test_parse_pg_array_element_types():
+    assert parse_pg_array("{1,NULL,3}", "integer") == [1, None, 3]
+    assert parse_pg_array("{t,f}", "boolean") == [True, False]
+    assert parse_pg_array('{"a\\"b","c,d",NULL}') == ['a"b', "c,d", None]
+
+
+def test_key_change_deletes_the_old_key():
+    old = columns(id=1, active=True, tags="{}", scores="{}", body="b")
+    rows = to_rows({
+        "action": "U",
+        "columns": columns(id=2, active=True, tags="{}", scores="{}", body="b"),
+        "identity": old
+    })
+
+    assert [(r["id"], r[DELETED_COLUMN]) for r in rows] == [(1, 1), (2, 0)]
+
+
+class FakeSlotConnection:
+    def __init__(self, data: str):
+        self.data = data
+
+    async def fetch(self, query, *args):
+        return [{"lsn": "0/1", "data": self.data}]
+
+
+def test_high_precision_numeric_change_keeps_every_digit():
+    mappings = [
+        FieldMapping(source_field="id", source_type="bigint", destination_field="id", destination_type="Int64"),
+        FieldMapping(
+            source_field="amount", source_type="numeric(38,18)",
+            destination_field="amount", destination_type="Decimal(38,18)"
+        ),
+        FieldMapping(
+            source_field="rates", source_type="numeric[]",
+            destination_field="rates", destination_type="Array(Decimal(38,18))"
+        ),
+    ]
+    data = (
+        '{"action":"I","columns":[{"name":"id","type":"bigint","value":1},'
+        '{"name":"amount","type":"numeric(38,18)","value":12345678901234567890.123456789012345678},'
+        '{"name":"rates","type":"numeric[]","value":"{0.100000000000000000001,2}"}]}'
+    )
+    changes = asyncio.run(postgres_service.peek_slot_changes(FakeSlotConnection(data), "slot", "t", "public"))
+    row = cdc_service._changes_to_rows(changes, mappings, compile_row_converter(mappings), ["id"])[0]
+
+    assert row["amount"] == Decimal("12345678901234567890.123456789012345678")
+    assert row["rates"] == [Decimal("0.100000000000000000001"), Decimal("2")]
+    assert json.loads(json.dumps(row, default=str))["amount"] == "12345678901234567890.123456789012345678"
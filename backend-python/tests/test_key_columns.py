@@ -0,0 +1,98 @@
+import pytest
+
+from models.migration import MigrationRequest
+from models.schema import ColumnDefinition, FieldMapping, TableSchema
+from services.mapping_service import mapping_service
+from services.migration_service import migration_service
+
+
+def make_schema(primary_key: bool = False, unique_keys: list[list[str]] = ()) -> TableSchema:
+    return TableSchema(
+        table="events",
+        schema="public",
+        columns=[
+            ColumnDefinition(name="id", type="bigint", nullable=False, primary_key=primary_key),
+            ColumnDefinition(name="updated_at", type="timestamp without time zone", nullable=False),
+            ColumnDefinition(name="payload", type="text", nullable=True),
+        ],
+        unique_keys=list(unique_keys)
+    )
+
+
+def make_mappings(schema: TableSchema) -> list[FieldMapping]:
+    return [FieldMapping(**m) for m in mapping_service.generate_mappings(schema, "events")["mappings"]]
+
+
+def incremental_request(schema: TableSchema) -> MigrationRequest:
+    return MigrationRequest(
+        source_table="events",
+        destination_table="events",
+        mappings=make_mappings(schema),
+        incremental=True,
+        watermark_column="updated_at"
+    )
+
+
+def test_incremental_without_unique_key_is_rejected():
+    schema = make_schema()
+    request = incremental_request(schema)
+
+    with pytest.raises(ValueError, match="primary key or NOT NULL unique index"):
+        migration_service._resolve_key_columns(request, schema)
+    with pytest.raises(ValueError, match="primary key or NOT NULL unique index"):
+        migration_service._destination_ddl(request, schema, make_mappings(schema))
+
+
+def test_incremental_keyset_and_order_by_use_the_full_key():
+    schema = make_schema(primary_key=True)
+    request = incremental_request(schema)
+
+    assert migration_service._resolve_key_columns(request, schema) == ["updated_at", "id"]
+    ddl = migration_service._destination_ddl(request, schema, make_mappings(schema))
+    assert "ReplacingMergeTree(updated_at)" in ddl
+    assert "ORDER BY (id)" in ddl
+
+
+def test_incremental_falls_back_to_a_unique_index():
+    schema = make_schema(unique_keys=[["id"]])
+    request = incremental_request(schema)
+
+    assert migration_service._resolve_key_columns(request, schema) == ["updated_at", "id"]
+    assert "ORDER BY (id)" in migration_service._destination_ddl(request, schema, make_mappings(schema))
+
+
+def test_replacing_merge_tree_requires_order_by():
+    schema = make_schema()
+    with pytest.raises(ValueError, match="unique row key"):
+        mapping_service.generate_ddl_from_mappings("events", make_mappings(schema), version_column="updated_at")
+
+
+def key_column_request(schema: TableSchema, key_column: str) -> MigrationRequest:
+    return MigrationRequest(
+        source_table="events",
+        destination_table="events",
+        mappings=make_mappings(schema),
+        key_column=key_column
+    )
+
+
+def test_non_unique_key_column_gets_the_unique_key_as_tiebreaker():
+    schema = make_schema(primary_key=True)
+    request = key_column_request(schema, "updated_at")
+
+    assert migration_service._resolve_key_columns(request, schema) == ["updated_at", "id"]
+
+
+def test_unique_key_column_is_used_alone():
+    schema = make_schema(unique_keys=[["updated_at"], ["id"]])
+    request = key_column_request(schema, "updated_at")
+
+    assert migration_service._resolve_key_columns(request, schema) == ["updated_at"]
+
+
+def test_non_unique_key_column_without_unique_key_is_rejected():
+    schema = make_schema()
+    request = key_column_request(schema, "updated_at")
+
+    with pytest.raises(ValueError, match="is not unique"):
+        migration_service._resolve_key_columns(request, schema)
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from models.migration import ExtractionMethod, InsertMode, MigrationCheckpoint, MigrationRequest
+from models.schema import FieldMapping
+from services.checkpoint_service import CheckpointTracker
+from services.clickhouse_service import clickhouse_service
+from services.migration_pipeline import Batch
+from services.migration_service import migration_service
+from services.postgres_service import postgres_service
+
+SOURCE_ROWS = [{"id": i} for i in range(1, 2001)]
+
+REQUEST = MigrationRequest(
+    source_table="events",
+    destination_table="events",
+    mappings=[FieldMapping(source_field="id", source_type="bigint", destination_field="id", destination_type="Int64")],
+    insert_mode=InsertMode.ROW,
+    adaptive_batch_size=True
+)
+
+
+async def fake_keyset(table, schema, columns, key_columns, last_key, limit, connection, **kwargs):
+    start = last_key[0] if last_key else 0
+    return SOURCE_ROWS[start:start + limit]
+
+
+def run(checkpoint: MigrationCheckpoint, sizes: list[int], loaded: int, emitted: int):
+    """Extract `emitted` batches sized by `sizes`, load the first `loaded`; return tokens and the saved checkpoint."""
+    checkpoints = {0: checkpoint}
+    tracker = CheckpointTracker(checkpoints, record_plan=True)
+    _, load = migration_service._build_stages("m1", REQUEST, REQUEST.mappings, ["id"])
+    saved = [checkpoint.model_copy()]
+    sizer = iter(sizes)
+
+    def batch_rows(range_id: int, seq: int) -> int:
+        planned = tracker.planned_rows(range_id, seq)
+        return next(sizer) if planned is None else planned
+
+    async def consume():
+        tokens, batches = {}, []
+        extract = migration_service._extract_batches(
+            REQUEST, ["id"], ["id"], ["bigint"], (None, []), checkpoint, batch_rows
+        )
+        async for batch in extract:
+            if tracker.emitted(batch):
+                saved.append(checkpoint.model_copy())
+            batches.append(batch)
+            if len(batches) == emitted:
+                break
+        for batch in batches[:loaded]:
+            load(batch)
+            tokens[batch.seq] = batch.token
+            if tracker.loaded(batch):
+                saved.append(checkpoint.model_copy())
+        # Batches emitted but never loaded were in flight when the run died
+        for batch in batches[loaded:]:
+            load(batch)
+            tokens[batch.seq] = batch.token
+        return tokens
+
+    return asyncio.run(consume()), saved[-1]
+
+
+def test_resumed_range_replays_batch_sizes_and_tokens(monkeypatch):
+    monkeypatch.setattr(postgres_service, "extract_data_keyset", fake_keyset)
+    monkeypatch.setattr(clickhouse_service, "insert_rows", lambda *args, **kwargs: 0)
+
+    # First run: three batches in flight, only the first confirmed before the failure
+    first, saved = run(MigrationCheckpoint(migration_id="m1", range_id=0), [100, 200, 400], loaded=1, emitted=3)
+    assert saved.next_seq == 1
+    assert saved.plan_start_seq == 1
+    assert saved.planned_rows == "[200, 400]"
+
+    # The resumed run's sizer has shrunk, but the in-flight batches are cut as before
+    second, _ = run(saved.model_copy(), [50, 50], loaded=3, emitted=3)
+    assert second[1] == first[1]
+    assert second[2] == first[2]
+    assert second[3].split(":")[3] == "50"
+
+
+def test_plan_is_not_recorded_for_fixed_batches():
+    checkpoint = MigrationCheckpoint(migration_id="m1", range_id=0)
+    tracker = CheckpointTracker({0: checkpoint})
+
+    assert tracker.emitted(Batch(0, [], 100, last_key="[100]")) is None
+    assert checkpoint.planned_rows == "[]"
+
+
+def test_keyless_resume_continues_offset_in_ctid_order(monkeypatch):
+    calls = []
+
+    async def fake_offset(table, schema, columns, offset, limit, connection, **kwargs):
+        calls.append((offset, kwargs.get("order_by_ctid")))
+        return SOURCE_ROWS[offset:offset + limit]
+
+    monkeypatch.setattr(postgres_service, "extract_data", fake_offset)
+    checkpoint = MigrationCheckpoint(migration_id="m1", range_id=0, next_seq=3, last_key="[300]")
+
+    async def first_batch():
+        extract = migration_service._extract_batches(
+            REQUEST, ["id"], [], [], (None, []), checkpoint, lambda range_id, seq: 100
+        )
+        return await extract.__anext__()
+
+    batch = asyncio.run(first_batch())
+    assert calls == [(300, True)]
+    assert batch.seq == 3
+    assert batch.last_key == "[400]"
+
+
+def test_copy_migration_that_failed_midway_is_not_resumed(monkeypatch):
+    request = REQUEST.model_copy(update={"extraction_method": ExtractionMethod.COPY, "adaptive_batch_size": False})
+    checkpoint = MigrationCheckpoint(migration_id="m1", range_id=0)
+    tracker = CheckpointTracker({0: checkpoint})
+    # The first COPY chunk is confirmed, the second fails to load and the run dies
+    tracker.loaded(Batch(0, "1\n2\n", 2))
+    launched = []
+
+    async def fake_load_request(migration_id, source_connection=None):
+        return {"status": "failed"}, request
+
+    async def fake_run(func, *args, **kwargs):
+        return {0: checkpoint}
+
+    monkeypatch.setattr(migration_service, "load_request", fake_load_request)
+    monkeypatch.setattr(clickhouse_service, "run", fake_run)
+    monkeypatch.setattr(migration_service, "_launch", lambda *args: launched.append(args))
+
+    with pytest.raises(ValueError, match="COPY extraction"):
+        asyncio.run(migration_service.resume_migration("m1"))
+    assert checkpoint.next_seq == 1
+    assert launched == []
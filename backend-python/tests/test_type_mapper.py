@@ -0,0 +1,23 @@
+from utils.type_mapper import narrow_type
+
+PROFILE = {"rows": 1000, "non_null": 1000, "integer_digits": 3, "scale": 1}
+
+
+def test_declared_decimal_keeps_scale_and_narrows_precision():
+    narrowed, reasons = narrow_type("numeric(12,4)", "Decimal(12,4)", PROFILE, exact=True)
+
+    assert narrowed == "Decimal(7, 4)"
+    assert "scale 4 kept" in reasons[0]
+
+
+def test_sampled_profile_leaves_decimals_alone():
+    narrowed, _ = narrow_type("numeric(12,4)", "Decimal(12,4)", PROFILE, exact=False)
+
+    assert narrowed == "Decimal(12,4)"
+
+
+def test_unconstrained_numeric_keeps_default_scale():
+    narrowed, reasons = narrow_type("numeric", "Decimal128(38)", PROFILE, exact=True)
+
+    assert narrowed == "Decimal128(38)"
+    assert "declare the column as numeric(p, s)" in reasons[0]
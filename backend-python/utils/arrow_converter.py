@@ -0,0 +1,168 @@
+import ipaddress
+import json
+import re
+import uuid
+from datetime import timedelta
+from typing import Optional, Sequence
+import pyarrow as pa
+import pyarrow.compute as pc
+from models.schema import FieldMapping
+from utils.transform_plan import is_array_source, null_default
+
+# ClickHouse scalar types with a direct Arrow equivalent
+ARROW_TYPES = {
+    "int8": pa.int8(),
+    "int16": pa.int16(),
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "uint8": pa.uint8(),
+    "uint16": pa.uint16(),
+    "uint32": pa.uint32(),
+    "uint64": pa.uint64(),
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+    "string": pa.string(),
+    "uuid": pa.string(),
+    "date": pa.date32(),
+    "datetime": pa.timestamp("s"),
+}
+
+
+# Precision implied by each DecimalN(S) width
+DECIMAL_WIDTH_PRECISION = {"32": 9, "64": 18, "128": 38, "256": 76}
+# Arrow timestamp units and the floor_temporal unit truncating to them
+TIMESTAMP_FLOOR_UNITS = {"s": "second", "ms": "millisecond", "us": "microsecond", "ns": "nanosecond"}
+# asyncpg values Arrow cannot infer (uuid, inet, cidr); they are sent as their text form
+TEXT_VALUE_TYPES = (
+    uuid.UUID,
+    ipaddress.IPv4Address,
+    ipaddress.IPv6Address,
+    ipaddress.IPv4Network,
+    ipaddress.IPv6Network,
+)
+
+
+def _unwrap(ch_type: str, wrapper: str) -> Optional[str]:
+    match = re.fullmatch(rf"{wrapper}\((.*)\)", ch_type.strip(), flags=re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+def clickhouse_to_arrow_type(ch_type: str) -> Optional[pa.DataType]:
+    """Map a ClickHouse column type to an Arrow type, or None to keep the inferred one."""
+    inner = _unwrap(ch_type, "Nullable") or _unwrap(ch_type, "LowCardinality")
+    if inner:
+        return clickhouse_to_arrow_type(inner)
+
+    element = _unwrap(ch_type, "Array")
+    if element:
+        element_type = clickhouse_to_arrow_type(element)
+        return pa.list_(element_type) if element_type else None
+
+    lowered = ch_type.strip().lower()
+    if lowered in ARROW_TYPES:
+        return ARROW_TYPES[lowered]
+
+    datetime64 = re.fullmatch(r"datetime64\((\d)(?:,.*)?\)", lowered)
+    if datetime64:
+        unit = {0: "s", 3: "ms", 6: "us", 9: "ns"}.get(int(datetime64.group(1)), "ms")
+        return pa.timestamp(unit)
+
+    decimal = re.fullmatch(r"decimal\((\d+),\s*(\d+)\)", lowered)
+    if decimal:
+        precision, scale = int(decimal.group(1)), int(decimal.group(2))
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+
+    # DecimalN(S) fixes the precision by width; the default numeric mapping is Decimal128(38)
+    sized_decimal = re.fullmatch(r"decimal(32|64|128|256)\((\d+)\)", lowered)
+    if sized_decimal:
+        precision = DECIMAL_WIDTH_PRECISION[sized_decimal.group(1)]
+        scale = int(sized_decimal.group(2))
+        return pa.decimal256(precision, scale) if precision > 38 else pa.decimal128(precision, scale)
+
+    return None
+
+
+def _truncate_to(column: pa.Array, target: pa.DataType) -> pa.Array:
+    """Drop precision the target cannot hold, as ClickHouse does on insert.
+
+    Timestamps are floored to the target unit and decimals truncated to the
+    target scale, so the following safe cast only fails on real overflow.
+    """
+    if pa.types.is_timestamp(column.type) and pa.types.is_timestamp(target):
+        return pc.floor_temporal(column, unit=TIMESTAMP_FLOOR_UNITS[target.unit])
+    if pa.types.is_decimal(column.type) and pa.types.is_decimal(target) and column.type.scale > target.scale:
+        return pc.round(column, ndigits=target.scale, round_mode="towards_zero")
+    return column
+
+
+def _to_arrow(values: Sequence) -> pa.Array:
+    """pa.array over raw asyncpg values, normalising the Python types Arrow cannot take as-is.
+
+    Columns hold one Python type, so the first non-null value decides:
+    uuid and inet/cidr become their text, bytea stays binary instead of
+    being read as UTF-8, and interval becomes seconds rather than an
+    integer count of microseconds.
+    """
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, TEXT_VALUE_TYPES):
+        return pa.array([None if v is None else str(v) for v in values], pa.string())
+    if isinstance(sample, (bytes, bytearray, memoryview)):
+        return pa.array([None if v is None else bytes(v) for v in values], pa.binary())
+    if isinstance(sample, timedelta):
+        return pa.array([None if v is None else v.total_seconds() for v in values], pa.float64())
+    return pa.array(values)
+
+
+def _convert_column(values: Sequence, mapping: FieldMapping) -> pa.Array:
+    dest_type = mapping.destination_type.lower()
+    target = clickhouse_to_arrow_type(mapping.destination_type)
+
+    # Arrays destined for a String column are the one case serialized per value
+    if is_array_source(mapping.source_type) and "array" not in dest_type:
+        values = [json.dumps(v) if v is not None else None for v in values]
+
+    column = _to_arrow(values)
+
+    if pa.types.is_boolean(column.type):
+        column = pc.cast(column, pa.uint8())
+
+    # ClickHouse String holds arbitrary bytes; casting bytea to Arrow string would demand UTF-8
+    if pa.types.is_binary(column.type) and target is not None and pa.types.is_string(target):
+        target = None
+
+    if target is not None and not column.type.equals(target):
+        if pa.types.is_null(column.type):
+            column = pa.nulls(len(column), type=target)
+        else:
+            column = pc.cast(_truncate_to(column, target), target)
+
+    default = null_default(dest_type)
+    if default is not None and column.null_count:
+        column = pc.fill_null(column, pa.scalar(default).cast(column.type))
+
+    return column
+
+
+def build_record_batch(
+    rows: Sequence[Sequence],
+    mappings: list[FieldMapping]
+) -> pa.RecordBatch:
+    """Build a RecordBatch from positional rows whose leading columns follow mappings.
+
+    Rows are transposed once and every mapping is then applied to a whole
+    column, so conversions run as Arrow compute kernels instead of per cell.
+    """
+    columns = list(zip(*rows)) if rows else [() for _ in mappings]
+    arrays = [_convert_column(columns[i], mapping) for i, mapping in enumerate(mappings)]
+    return pa.RecordBatch.from_arrays(
+        arrays,
+        names=[m.destination_field for m in mappings]
+    )
+
+
+def build_arrow_table(
+    rows: Sequence[Sequence],
+    mappings: list[FieldMapping]
+) -> pa.Table:
+    """Wrap build_record_batch in the Table shape clickhouse-connect inserts."""
+    return pa.Table.from_batches([build_record_batch(rows, mappings)])
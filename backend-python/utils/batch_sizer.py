@@ -0,0 +1,114 @@
+import sys
+from typing import Optional, Sequence
+
+# Sampled rows when estimating the size of a positional batch
+SAMPLE_ROWS = 64
+# History of chosen sizes kept for progress reporting
+HISTORY_LENGTH = 50
+
+
+def _value_bytes(value) -> int:
+    size = sys.getsizeof(value)
+    # Container elements are separate objects (arrays, decoded json)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(v) for v in value.values())
+    elif isinstance(value, (list, tuple)):
+        size += sum(sys.getsizeof(v) for v in value)
+    return size
+
+
+def estimate_rows_bytes(rows: Sequence[Sequence]) -> int:
+    """Approximate the in-memory size of positional rows from an evenly spaced sample."""
+    if not rows:
+        return 0
+    step = max(1, len(rows) // SAMPLE_ROWS)
+    sample = rows[::step]
+    sampled = sum(sys.getsizeof(row) + sum(_value_bytes(v) for v in row) for row in sample)
+    return int(sampled * len(rows) / len(sample))
+
+
+def estimate_columns_bytes(columns: Sequence[Sequence]) -> int:
+    """Approximate the in-memory size of per-column value lists from sampled positions."""
+    if not columns or not columns[0]:
+        return 0
+    count = len(columns[0])
+    step = max(1, count // SAMPLE_ROWS)
+    positions = range(0, count, step)
+    sampled = sum(_value_bytes(column[i]) for column in columns for i in positions)
+    return int(sampled * count / len(positions)) + sum(sys.getsizeof(column) for column in columns)
+
+
+class BatchSizer:
+    """Rows per batch: fixed, or tuned toward a target batch size and batch time.
+
+    In adaptive mode the first size comes from the byte budget divided by an
+    estimated row width. After every loaded batch, bytes per row and the
+    slower of extract/insert seconds per row are smoothed, and the next size
+    is the largest that fits both the byte and the time target. A step never
+    more than doubles or halves the size, so one noisy batch can't swing it.
+    """
+
+    def __init__(
+        self,
+        initial_rows: int,
+        adaptive: bool = False,
+        target_bytes: int = 16 * 1024 * 1024,
+        target_seconds: float = 2.0,
+        min_rows: int = 1000,
+        max_rows: int = 1_000_000,
+        row_bytes_hint: Optional[float] = None,
+        smoothing: float = 0.3
+    ):
+        self.adaptive = adaptive
+        self._target_bytes = target_bytes
+        self._target_seconds = target_seconds
+        self._min_rows = min_rows
+        self._max_rows = max(min_rows, max_rows)
+        self._smoothing = smoothing
+        self.row_bytes: Optional[float] = row_bytes_hint
+        self._row_seconds: Optional[float] = None
+
+        if adaptive and row_bytes_hint:
+            initial_rows = self._clamp(target_bytes / row_bytes_hint)
+        self.rows = initial_rows
+        self.history: list[int] = [initial_rows]
+
+    def _clamp(self, rows: float) -> int:
+        return int(min(self._max_rows, max(self._min_rows, rows)))
+
+    def _smooth(self, previous: Optional[float], sample: float) -> float:
+        if previous is None:
+            return sample
+        return previous + self._smoothing * (sample - previous)
+
+    def observe(self, rows: int, nbytes: int, extract_seconds: float, load_seconds: float) -> int:
+        """Feed one loaded batch's measurements and return the next batch size."""
+        if not self.adaptive or rows <= 0:
+            return self.rows
+
+        if nbytes > 0:
+            self.row_bytes = self._smooth(self.row_bytes, nbytes / rows)
+        # Stages overlap, so the slower one sets the pace of the whole pipeline
+        batch_seconds = max(extract_seconds, load_seconds)
+        if batch_seconds > 0:
+            self._row_seconds = self._smooth(self._row_seconds, batch_seconds / rows)
+
+        candidates = []
+        if self.row_bytes:
+            candidates.append(self._target_bytes / self.row_bytes)
+        if self._row_seconds:
+            candidates.append(self._target_seconds / self._row_seconds)
+        if not candidates:
+            return self.rows
+
+        wanted = min(candidates)
+        wanted = min(self.rows * 2, max(self.rows / 2, wanted))
+        new_rows = self._clamp(wanted)
+
+        # Ignore jitter under 10% so the reported size only moves on real changes
+        if abs(new_rows - self.rows) > self.rows * 0.1:
+            self.rows = new_rows
+            self.history.append(new_rows)
+            del self.history[:-HISTORY_LENGTH]
+
+        return self.rows
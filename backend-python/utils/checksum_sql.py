@@ -0,0 +1,156 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+from models.schema import FieldMapping
+
+# Row checksums are summed modulo 2^64, where ClickHouse's UInt64 sum() wraps
+HASH_MODULUS = 2 ** 64
+
+_INTEGER_SOURCES = {"smallint", "int2", "integer", "int", "int4", "serial", "bigint", "int8", "bigserial"}
+_TEXT_SOURCES = {"varchar", "character varying", "text", "json", "jsonb"}
+# char(n) pads with spaces; Postgres drops the padding when casting to text
+_PADDED_SOURCES = {"char", "character", "bpchar"}
+
+
+@dataclass
+class ChecksumPlan:
+    """Matching Postgres and ClickHouse expressions for hashing migrated rows."""
+
+    source_row_hash: str
+    destination_row_hash: str
+    # Key columns rendered as one text value, None for keyless tables
+    source_key_text: Optional[str]
+    destination_key_text: Optional[str]
+    columns: list[str]
+    unverified_columns: list[str]
+
+
+def _unwrap(dest_type: str) -> tuple[str, bool]:
+    """ClickHouse type without Nullable/LowCardinality wrappers, and whether it was Nullable."""
+    inner = dest_type.strip()
+    nullable = False
+    while True:
+        match = re.fullmatch(r"(Nullable|LowCardinality)\((.*)\)", inner)
+        if not match:
+            return inner, nullable
+        nullable = nullable or match.group(1) == "Nullable"
+        inner = match.group(2).strip()
+
+
+def _decimal_scale(dest_type: str) -> Optional[int]:
+    match = re.fullmatch(r"Decimal\(\s*\d+\s*,\s*(\d+)\s*\)|Decimal(?:32|64|128|256)\((\d+)\)", dest_type)
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+def column_text(mapping: FieldMapping) -> Optional[tuple[str, str]]:
+    """(Postgres, ClickHouse) expressions rendering one migrated column as identical text.
+
+    Returns None for types whose text forms cannot be made to agree exactly
+    (floats, arrays, bytea, time, unknown types); those columns are left out
+    of the row hash rather than reported as false mismatches.
+    """
+    source_type = re.sub(r"\(.*\)$", "", mapping.source_type.lower().strip()).strip()
+    dest_type, nullable = _unwrap(mapping.destination_type)
+    pg = f'"{mapping.source_field}"'
+    ch = f"`{mapping.destination_field}`"
+
+    if source_type in _INTEGER_SOURCES and re.fullmatch(r"U?Int\d+", dest_type):
+        pair, default = (f"{pg}::text", f"toString({ch})"), "0"
+    elif source_type in ("boolean", "bool") and re.fullmatch(r"U?Int\d+|Bool", dest_type):
+        pair, default = (f"{pg}::int::text", f"toString(toUInt8({ch}))"), "0"
+    elif source_type in _TEXT_SOURCES and dest_type == "String":
+        pair, default = (f"{pg}::text", ch), ""
+    elif source_type in _PADDED_SOURCES and dest_type == "String":
+        pair, default = (f"{pg}::text", f"trimRight({ch})"), ""
+    elif source_type == "uuid" and dest_type == "UUID":
+        pair, default = (f"{pg}::text", f"toString({ch})"), "00000000-0000-0000-0000-000000000000"
+    elif source_type == "date" and dest_type in ("Date", "Date32"):
+        pair, default = (f"to_char({pg}, 'YYYY-MM-DD')", f"toString({ch})"), "1970-01-01"
+    elif source_type in ("timestamp", "timestamp without time zone") and dest_type.startswith("DateTime"):
+        # Wall-clock seconds; naive timestamps are stored in the server's time zone
+        pair = (
+            f"to_char({pg}, 'YYYY-MM-DD HH24:MI:SS')",
+            f"formatDateTime({ch}, '%Y-%m-%d %H:%i:%S')"
+        )
+        default = "1970-01-01 00:00:00"
+    elif source_type in ("timestamptz", "timestamp with time zone") and dest_type.startswith("DateTime64"):
+        pair = (
+            f"floor(extract(epoch FROM {pg}) * 1000)::bigint::text",
+            f"toString(toUnixTimestamp64Milli({ch}))"
+        )
+        default = "0"
+    elif source_type in ("timestamptz", "timestamp with time zone") and dest_type.startswith("DateTime"):
+        pair, default = (f"floor(extract(epoch FROM {pg}))::bigint::text", f"toString(toUnixTimestamp({ch}))"), "0"
+    elif source_type in ("numeric", "decimal") and _decimal_scale(dest_type) is not None:
+        scale = _decimal_scale(dest_type)
+        pair = (f"trunc({pg}, {scale})::text", f"toDecimalString({ch}, {scale})")
+        default = "0." + "0" * scale if scale else "0"
+    else:
+        return None
+
+    source_expr, destination_expr = pair
+    if nullable:
+        return f"COALESCE({source_expr}, '\\N')", f"ifNull({destination_expr}, '\\\\N')"
+    # NULLs were loaded into non-Nullable columns as the type's default
+    return f"COALESCE({source_expr}, '{default}')", destination_expr
+
+
+def source_hash(text_expr: str) -> str:
+    """Postgres: the first 60 bits of md5(text) as a non-negative bigint."""
+    return f"('x' || substr(md5({text_expr}), 1, 15))::bit(60)::bigint"
+
+
+def destination_hash(text_expr: str) -> str:
+    """ClickHouse: the same 60 bits of MD5(text) as a UInt64."""
+    return f"reinterpretAsUInt64(reverse(unhex(concat('0', substring(hex(MD5({text_expr})), 1, 15)))))"
+
+
+def _join(source_parts: list[str], destination_parts: list[str]) -> tuple[str, str]:
+    """Join column texts with the ASCII unit separator on both sides."""
+    return (
+        f"concat_ws(chr(31), {', '.join(source_parts)})",
+        f"arrayStringConcat([{', '.join(destination_parts)}], '\\x1F')"
+    )
+
+
+def build_checksum_plan(mappings: list[FieldMapping], key_fields: list[str]) -> ChecksumPlan:
+    """Hash expressions over every comparable column; key_fields are source names.
+
+    Raises ValueError when no mapped column can be compared.
+    """
+    columns, unverified = [], []
+    source_parts, destination_parts = [], []
+    key_parts: dict[str, tuple[str, str]] = {}
+
+    for mapping in mappings:
+        texts = column_text(mapping)
+        if texts is None:
+            unverified.append(mapping.destination_field)
+            continue
+        columns.append(mapping.destination_field)
+        source_parts.append(texts[0])
+        destination_parts.append(texts[1])
+        if mapping.source_field in key_fields:
+            key_parts[mapping.source_field] = texts
+
+    if not columns:
+        raise ValueError("None of the mapped columns have types that can be compared across databases")
+
+    source_row, destination_row = _join(source_parts, destination_parts)
+    source_key = destination_key = None
+    if key_fields and all(k in key_parts for k in key_fields):
+        source_key, destination_key = _join(
+            [key_parts[k][0] for k in key_fields],
+            [key_parts[k][1] for k in key_fields]
+        )
+
+    return ChecksumPlan(
+        source_row_hash=source_hash(source_row),
+        destination_row_hash=destination_hash(destination_row),
+        source_key_text=source_key,
+        destination_key_text=destination_key,
+        columns=columns,
+        unverified_columns=unverified
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ClientThreadPool(Generic[T]):
+    """Bounded worker threads for a blocking client library.
+
+    Blocking calls are shipped to the pool with run() so the event loop keeps
+    serving other requests. Clients are not shared between threads: each
+    thread lazily creates its own from client_factory, which suits clients
+    (HTTP sessions, clickhouse-connect) that are not safe for concurrent use.
+    A key selects between differently configured clients of the same thread;
+    client_factory receives it when one is given.
+    """
+
+    def __init__(self, name: str, max_workers: int, client_factory: Callable[..., T]):
+        self._factory = client_factory
+        self._local = threading.local()
+        self._clients: list[T] = []
+        self._lock = threading.Lock()
+        self._name = name
+        self._max_workers = max(1, max_workers)
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix=self._name
+            )
+        return self._executor
+
+    def client(self, key: Optional[Hashable] = None) -> T:
+        """Return the calling thread's client for key, creating it on first use."""
+        clients = getattr(self._local, "clients", None)
+        if clients is None:
+            clients = self._local.clients = {}
+
+        client = clients.get(key)
+        if client is None:
+            client = self._factory() if key is None else self._factory(key)
+            clients[key] = client
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on the pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        """Stop the worker threads and close every client they created."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            close = getattr(client, "close", None) or getattr(client, "disconnect", None)
+            if close:
+                close()
+        self._local = threading.local()
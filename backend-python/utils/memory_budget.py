@@ -0,0 +1,62 @@
+import asyncio
+from typing import Optional
+
+
+class MemoryBudget:
+    """Byte budget for batches held in memory, optionally nested in a parent budget.
+
+    acquire() waits until the bytes fit, so a producer that reserves each
+    batch before handing it on is throttled once the budget is full. A
+    reservation larger than the whole budget is still granted when nothing
+    else is held, so an oversized batch slows a migration down instead of
+    deadlocking it. Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, limit_bytes: int, parent: Optional["MemoryBudget"] = None):
+        self.limit_bytes = max(1, limit_bytes)
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self._parent = parent
+        self._waiters: list[asyncio.Future] = []
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.used_bytes == 0 or self.used_bytes + nbytes <= self.limit_bytes
+
+    async def acquire(self, nbytes: int) -> None:
+        """Reserve nbytes here and in the parent, waiting for room in both."""
+        while not self._fits(nbytes):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+        self.used_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+
+        if self._parent:
+            try:
+                await self._parent.acquire(nbytes)
+            except BaseException:
+                self._release_local(nbytes)
+                raise
+
+    def release(self, nbytes: int) -> None:
+        """Return a reservation made with acquire()."""
+        self._release_local(nbytes)
+        if self._parent:
+            self._parent.release(nbytes)
+
+    def close(self) -> None:
+        """Hand back whatever is still reserved, e.g. after a failed migration."""
+        if self.used_bytes:
+            self.release(self.used_bytes)
+
+    def _release_local(self, nbytes: int) -> None:
+        self.used_bytes = max(0, self.used_bytes - nbytes)
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """Retry an async call on transient errors with jittered exponential backoff.
+
+    The n-th retry waits between half and all of base_delay * 2**(n-1),
+    capped at max_delay, so retries from concurrent callers spread out
+    instead of hitting a recovering server together.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 1,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retryable: Callable[[BaseException], bool] = lambda e: True
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before the given (1-based) retry."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (retry - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        description: str = "Call",
+        on_retry: Optional[Callable[[BaseException], None]] = None
+    ) -> T:
+        """Await func(), calling it again after a backoff while it fails retryably."""
+        retry = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                retry += 1
+                if retry >= self.attempts or not self.retryable(e):
+                    raise
+                wait = self.delay(retry)
+                logger.warning(
+                    "%s failed (%s); retry %d/%d in %.1fs", description, e, retry, self.attempts - 1, wait
+                )
+                if on_retry:
+                    on_retry(e)
+                await asyncio.sleep(wait)
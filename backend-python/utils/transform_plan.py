@@ -0,0 +1,171 @@
+import json
+from typing import Any, Callable, Sequence
+from models.schema import FieldMapping
+from utils.type_mapper import TYPE_MAPPING
+
+# Element types that serialize identically as JSON and as ClickHouse array literals
+_NUMERIC_MARKERS = ("int", "float", "decimal")
+
+
+def is_array_source(source_type: str) -> bool:
+    """information_schema reports arrays as ARRAY; user-edited types may use int[]."""
+    pg_type = source_type.lower().strip()
+    return pg_type == "array" or pg_type.endswith("[]")
+
+
+def null_default(dest_type: str):
+    """Python value substituted for NULL in non-Nullable columns."""
+    if "nullable" in dest_type:
+        return None
+    # Checked first so Array(Int32) defaults to [] rather than 0
+    if "array" in dest_type:
+        return []
+    if "int" in dest_type or "uint" in dest_type:
+        return 0
+    if "float" in dest_type or "decimal" in dest_type:
+        return 0.0
+    if "string" in dest_type:
+        return ""
+    return None
+
+
+def _sql_null_default(dest_type: str):
+    """SQL literal substituted for NULL in non-Nullable columns (mirrors the row path)."""
+    if "nullable" in dest_type:
+        return None
+    if "array" in dest_type:
+        return "'[]'"
+    if "int" in dest_type or "uint" in dest_type:
+        return "'0'"
+    if "float" in dest_type or "decimal" in dest_type:
+        return "'0'"
+    if "string" in dest_type:
+        return "''"
+    return None
+
+
+def build_copy_expressions(mappings: list[FieldMapping]) -> list[str]:
+    """Build a SELECT list whose COPY text output ClickHouse reads as TabSeparated.
+
+    Postgres' text COPY format and ClickHouse's TabSeparated format share the
+    same escaping and \\N null marker, so the per-cell conversions done in
+    Python for the fetch path are pushed into SQL here instead.
+    """
+    expressions = []
+
+    for mapping in mappings:
+        column = f'"{mapping.source_field}"'
+        source_type = mapping.source_type.lower().strip()
+        dest_type = mapping.destination_type.lower()
+
+        if source_type in ("boolean", "bool"):
+            expr = f"{column}::int"
+        elif is_array_source(source_type) and "array" in dest_type:
+            if any(marker in dest_type for marker in _NUMERIC_MARKERS):
+                expr = f"array_to_json({column})::text"
+            else:
+                # ClickHouse array literals need single-quoted, backslash-escaped strings
+                expr = (
+                    f"'[' || array_to_string(ARRAY(SELECT '''' || "
+                    f"replace(replace(e::text, '\\', '\\\\'), '''', '\\''') || '''' "
+                    f"FROM unnest({column}) AS e), ',') || ']'"
+                )
+        elif is_array_source(source_type):
+            expr = f"array_to_json({column})::text"
+        else:
+            expr = column
+
+        default = _sql_null_default(dest_type)
+        if default is not None:
+            # COPY emits text anyway, so casting keeps COALESCE's argument types aligned
+            expr = f"COALESCE(({expr})::text, {default})"
+
+        expressions.append(expr)
+
+    return expressions
+
+
+def _compile_expression(mapping: FieldMapping, index: int, namespace: dict) -> str:
+    """Pick the cheapest Python expression converting value r[index] for one mapping."""
+    source_type = mapping.source_type.lower().strip()
+    dest_type = mapping.destination_type.lower()
+    default = repr(null_default(dest_type))
+    encode_json = "array" not in dest_type
+    v = f"r[{index}]"
+
+    if source_type in ("boolean", "bool"):
+        return f"({default} if {v} is None else (1 if {v} else 0))"
+
+    if is_array_source(source_type) and encode_json:
+        # asyncpg always decodes arrays to lists
+        return f"({default} if {v} is None else _dumps({v}))"
+
+    if source_type in ("json", "jsonb") and encode_json:
+        # json/jsonb arrive as text unless a decoding codec is registered
+        return f"({default} if {v} is None else (_dumps({v}) if isinstance({v}, (list, dict)) else {v}))"
+
+    if source_type not in TYPE_MAPPING and not is_array_source(source_type):
+        # Hand-edited or unknown source types keep the fully general conversion
+        def convert(value, default=null_default(dest_type)):
+            if value is None:
+                return default
+            if isinstance(value, bool):
+                return 1 if value else 0
+            if encode_json and isinstance(value, (list, dict)):
+                return json.dumps(value)
+            return value
+
+        namespace[f"_convert_{index}"] = convert
+        return f"_convert_{index}({v})"
+
+    if default != "None":
+        return f"({default} if {v} is None else {v})"
+
+    return v
+
+
+def compile_row_converter(
+    mappings: list[FieldMapping]
+) -> Callable[[Sequence[Sequence]], list[tuple]]:
+    """Compile mappings once into a function turning positional rows into insert tuples.
+
+    Rows must start with one value per mapping, in mapping order (trailing
+    values such as keyset columns are dropped). Every decision that depends
+    only on the mapping is made here: the per-mapping conversions are inlined
+    into a single generated list comprehension, so the per-row work is one
+    tuple build with no dict, no type-string inspection and no extra calls.
+    """
+    namespace: dict[str, Any] = {"_dumps": json.dumps}
+    expressions = [
+        _compile_expression(mapping, index, namespace)
+        for index, mapping in enumerate(mappings)
+    ]
+    source = (
+        "def convert_rows(rows):\n"
+        f"    return [({', '.join(expressions)},) for r in rows]\n"
+    )
+    exec(source, namespace)
+    return namespace["convert_rows"]
+
+
+def compile_column_converter(
+    mappings: list[FieldMapping]
+) -> Callable[[Sequence[Sequence]], list[list]]:
+    """Compile mappings into a function turning positional rows into one value list per column.
+
+    Same conversions as compile_row_converter, laid out for columnar inserts:
+    one generated comprehension per column, so no per-row tuple is built and
+    the insert needs no transposition.
+    """
+    namespace: dict[str, Any] = {"_dumps": json.dumps}
+    expressions = [
+        _compile_expression(mapping, index, namespace)
+        for index, mapping in enumerate(mappings)
+    ]
+    columns = ", ".join(f"[{expr} for r in rows]" for expr in expressions)
+    source = (
+        "def convert_columns(rows):\n"
+        f"    return [{columns}]\n"
+    )
+    exec(source, namespace)
+    return namespace["convert_columns"]
@@ -130,3 +130,110 @@ def validate_type_mapping(postgres_type: str) -> dict:
         "warning": f"Unknown type '{postgres_type}', defaulting to String",
         "clickhouse_type": "String"
     }
+
+
+# Signed widths tried narrowest first when profiling integer columns
+INTEGER_WIDTHS = [
+    ("Int8", -2 ** 7, 2 ** 7 - 1),
+    ("Int16", -2 ** 15, 2 ** 15 - 1),
+    ("Int32", -2 ** 31, 2 ** 31 - 1),
+    ("Int64", -2 ** 63, 2 ** 63 - 1),
+]
+INTEGER_SOURCE_TYPES = {"smallint", "int2", "integer", "int", "int4", "serial", "bigint", "int8", "bigserial"}
+TEXT_SOURCE_TYPES = {"text", "varchar", "character varying", "char", "character", "bpchar"}
+# LowCardinality pays off below ~10k distinct values that repeat a lot
+LOW_CARDINALITY_MAX_DISTINCT = 10_000
+LOW_CARDINALITY_MAX_RATIO = 0.1
+# A sampled integer range must fit this many times over
+SAMPLE_HEADROOM = 2
+
+
+def _decimal_shape(ch_type: str) -> Optional[tuple[int, int]]:
+    """(precision, scale) of a Decimal type, or None."""
+    match = re.fullmatch(r"Decimal\((\d+),\s*(\d+)\)", ch_type)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = re.fullmatch(r"Decimal(32|64|128|256)\((\d+)\)", ch_type)
+    if match:
+        precision = {"32": 9, "64": 18, "128": 38, "256": 76}[match.group(1)]
+        return precision, int(match.group(2))
+    return None
+
+
+def narrow_type(postgres_type: str, clickhouse_type: str, profile: dict, exact: bool) -> tuple[str, list[str]]:
+    """Tighten a mapped ClickHouse type to the values a profile observed.
+
+    profile holds rows, non_null and, by type, min/max, distinct or
+    scale/integer_digits (see PostgresService.profile_columns). A sampled
+    profile (exact=False) leaves SAMPLE_HEADROOM spare on integers, never
+    narrows decimals and never drops Nullable, since unsampled rows may
+    differ. Decimals keep their mapped scale and only lose precision.
+    Returns the type and one reason per observation.
+    """
+    pg_type = re.sub(r"\(.*\)$", "", postgres_type.lower().strip()).strip()
+    base = clickhouse_type.strip()
+    nullable_match = re.fullmatch(r"Nullable\((.*)\)", base)
+    nullable = nullable_match is not None
+    if nullable:
+        base = nullable_match.group(1).strip()
+    rows, non_null = profile.get("rows", 0), profile.get("non_null", 0)
+    seen = "in the whole table" if exact else f"in a {rows:,}-row sample"
+    reasons = []
+    low_cardinality = False
+
+    if not rows:
+        return clickhouse_type, reasons
+
+    if pg_type in INTEGER_SOURCE_TYPES and profile.get("min") is not None and base in ("Int16", "Int32", "Int64"):
+        factor = 1 if exact else SAMPLE_HEADROOM
+        low, high = profile["min"] * factor, profile["max"] * factor
+        names = [name for name, _, _ in INTEGER_WIDTHS]
+        for name, lower, upper in INTEGER_WIDTHS:
+            if lower <= low and high <= upper:
+                if names.index(name) < names.index(base):
+                    reasons.append(
+                        f"{name}: values {seen} span {profile['min']:,}..{profile['max']:,}"
+                        + ("" if exact else f", which fits {SAMPLE_HEADROOM}x over")
+                    )
+                    base = name
+                break
+
+    decimal = _decimal_shape(base)
+    if pg_type in ("numeric", "decimal") and decimal and exact and profile.get("integer_digits") is not None:
+        # Later rows may carry more decimal places than any seen so far, so the scale stays
+        precision, scale = decimal
+        integer_digits = profile["integer_digits"]
+        needed = max(1, integer_digits + scale)
+        if needed < precision:
+            base = f"Decimal({needed}, {scale})"
+            reasons.append(
+                f"{base}: values {seen} have up to {integer_digits} integer digits; scale {scale} kept"
+            )
+        elif needed > precision:
+            reasons.append(
+                f"Values {seen} have up to {integer_digits} integer digits, more than {base} holds "
+                f"with scale {scale}; declare the column as numeric(p, s)"
+            )
+
+    if pg_type in TEXT_SOURCE_TYPES and base == "String" and profile.get("distinct") is not None and non_null:
+        distinct = profile["distinct"]
+        if distinct <= LOW_CARDINALITY_MAX_DISTINCT and distinct / non_null <= LOW_CARDINALITY_MAX_RATIO:
+            low_cardinality = True
+            reasons.append(
+                f"LowCardinality: {distinct:,} distinct values across {non_null:,} non-null rows {seen}"
+            )
+
+    if nullable and non_null == rows:
+        if exact:
+            nullable = False
+            reasons.append("Not Nullable: no NULLs in the whole table")
+        else:
+            reasons.append(
+                f"No NULLs {seen}; kept Nullable since the sample cannot rule them out "
+                f"(profile the whole table to drop it)"
+            )
+
+    narrowed = f"Nullable({base})" if nullable else base
+    if low_cardinality:
+        narrowed = f"LowCardinality({narrowed})"
+    return narrowed, reasons